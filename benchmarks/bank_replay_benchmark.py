@@ -0,0 +1,70 @@
+"""
+Measures BankDomainAggregate replay cost against transaction history length.
+
+With the running balance maintained incrementally the per-event replay cost
+stays flat, so total replay time grows linearly. The integrity-check mode
+recomputes the balance on every transaction and is shown for comparison.
+
+Usage: python -m benchmarks.bank_replay_benchmark
+"""
+import os
+import time
+from uuid import uuid4
+
+os.environ.setdefault("INFRASTRUCTURE_FACTORY", "eventsourcing.popo:Factory")
+
+from boe.applications.bank_domain_apps import BankManagerApp  # noqa: E402
+from boe.lib.domains.bank_domain import (  # noqa: E402
+    BankDomainAggregate,
+    BankDomainFactory,
+    BankTransactionMethodEnum
+)
+
+HISTORY_LENGTHS = [500, 1000, 2000, 4000, 8000]
+
+
+def build_account_history(app: BankManagerApp, transaction_count: int):
+    aggregate = BankDomainFactory.build_bank_domain_aggregate(owner_id=uuid4(), is_overdraft_protected=True)
+
+    for n in range(transaction_count):
+        aggregate.apply_transaction_to_account(
+            transaction=BankDomainFactory.build_bank_transaction_entity(
+                account_id=aggregate.id,
+                item_id=uuid4(),
+                method=BankTransactionMethodEnum.add if n % 3 else BankTransactionMethodEnum.subtract,
+                value=5
+            )
+        )
+
+    app.save(aggregate)
+    return aggregate.id
+
+
+def time_replay(app: BankManagerApp, aggregate_id) -> float:
+    started = time.perf_counter()
+    app.repository.get(aggregate_id=aggregate_id)
+    return time.perf_counter() - started
+
+
+def main():
+    app = BankManagerApp()
+
+    print(f"{'transactions':>12} {'incremental (s)':>16} {'us/event':>9} {'integrity check (s)':>20} {'us/event':>9}")
+    for transaction_count in HISTORY_LENGTHS:
+        aggregate_id = build_account_history(app=app, transaction_count=transaction_count)
+
+        BankDomainAggregate.integrity_check_enabled = False
+        incremental = time_replay(app=app, aggregate_id=aggregate_id)
+
+        BankDomainAggregate.integrity_check_enabled = True
+        integrity_checked = time_replay(app=app, aggregate_id=aggregate_id)
+        BankDomainAggregate.integrity_check_enabled = False
+
+        print(
+            f"{transaction_count:>12} {incremental:>16.4f} {incremental / transaction_count * 1e6:>9.1f} "
+            f"{integrity_checked:>20.4f} {integrity_checked / transaction_count * 1e6:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
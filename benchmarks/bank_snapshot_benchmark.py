@@ -0,0 +1,77 @@
+"""
+Measures BankManagerApp.repository.get latency for an account with a long
+transaction history, with and without snapshotting.
+
+Usage: python -m benchmarks.bank_snapshot_benchmark
+"""
+import os
+import statistics
+import tempfile
+import time
+from uuid import uuid4
+
+os.environ["INFRASTRUCTURE_FACTORY"] = "eventsourcing.sqlite:Factory"
+
+from boe.applications.bank_domain_apps import BankManagerApp  # noqa: E402
+from boe.lib.domains.bank_domain import BankDomainFactory, BankTransactionMethodEnum  # noqa: E402
+
+TRANSACTION_COUNT = 10000
+SAVE_EVERY = 100
+GET_ROUNDS = 5
+
+
+class UnsnapshottedBankManagerApp(BankManagerApp):
+    snapshotting_intervals = None
+
+
+def make_app(app_class, db_path: str) -> BankManagerApp:
+    os.environ["SQLITE_DBNAME"] = db_path
+    return app_class()
+
+
+def build_account_history(app: BankManagerApp):
+    aggregate = BankDomainFactory.build_bank_domain_aggregate(owner_id=uuid4(), is_overdraft_protected=True)
+
+    for n in range(TRANSACTION_COUNT):
+        aggregate.apply_transaction_to_account(
+            transaction=BankDomainFactory.build_bank_transaction_entity(
+                account_id=aggregate.id,
+                item_id=uuid4(),
+                method=BankTransactionMethodEnum.add,
+                value=1
+            )
+        )
+        if n % SAVE_EVERY == 0:
+            app.save(aggregate)
+
+    app.save(aggregate)
+    return aggregate.id
+
+
+def time_get(app: BankManagerApp, aggregate_id) -> float:
+    timings = []
+    for _ in range(GET_ROUNDS):
+        started = time.perf_counter()
+        app.repository.get(aggregate_id=aggregate_id)
+        timings.append(time.perf_counter() - started)
+
+    return statistics.median(timings)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {}
+        for app_class in (UnsnapshottedBankManagerApp, BankManagerApp):
+            app = make_app(app_class=app_class, db_path=os.path.join(tmp_dir, f"{app_class.__name__}.sqlite"))
+            aggregate_id = build_account_history(app=app)
+            intervals = app.snapshotting_intervals or {}
+            label = ", ".join(f"{t.__name__} every {i} events" for t, i in intervals.items()) or "no snapshots"
+            results[label] = time_get(app=app, aggregate_id=aggregate_id)
+
+    print(f"repository.get for {TRANSACTION_COUNT} transactions (median of {GET_ROUNDS})")
+    for label, latency in results.items():
+        print(f"{label:>42} {latency * 1000:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
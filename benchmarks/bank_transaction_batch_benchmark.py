@@ -0,0 +1,92 @@
+"""
+Compares bank worker throughput for one NewTransactionEvent per line item
+against NewTransactionBatchEvent messages carrying several line items.
+
+Messages go through the worker decode path (json body, event factory,
+BankManagerApp.handle_event) against a SQLite event store. Mongo and AMQP
+clients are replaced with mocks so only the app and event store are timed.
+
+Usage: python -m benchmarks.bank_transaction_batch_benchmark
+"""
+import json
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from uuid import uuid4
+
+os.environ["INFRASTRUCTURE_FACTORY"] = "eventsourcing.sqlite:Factory"
+
+from boe.applications.bank_domain_apps import BankDomainAppEventFactory, BankManagerApp  # noqa: E402
+from boe.lib.domains.bank_domain import BankTransactionMethodEnum  # noqa: E402
+
+LINE_ITEM_COUNT = 2000
+BATCH_SIZES = [1, 10, 50]
+
+
+def make_line_items():
+    return [
+        {"item_id": str(uuid4()), "transaction_method": BankTransactionMethodEnum.add.value, "value": 1}
+        for _ in range(LINE_ITEM_COUNT)
+    ]
+
+
+def make_message_bodies(account_id: str, line_items: list, batch_size: int):
+    if batch_size == 1:
+        return [
+            json.dumps({"NewTransactionEvent": dict(line_item, account_id=account_id)})
+            for line_item in line_items
+        ]
+
+    return [
+        json.dumps({
+            "NewTransactionBatchEvent": {
+                "account_id": account_id,
+                "transactions": line_items[n:n + batch_size]
+            }
+        })
+        for n in range(0, len(line_items), batch_size)
+    ]
+
+
+def handle_bodies(app: BankManagerApp, bodies: list):
+    factories = {
+        "NewTransactionEvent": BankDomainAppEventFactory.build_new_transaction_event,
+        "NewTransactionBatchEvent": BankDomainAppEventFactory.build_new_transaction_batch_event,
+    }
+    for body in bodies:
+        for event_name, payload in json.loads(body).items():
+            app.handle_event(factories[event_name](**payload))
+
+
+def main():
+    line_items = make_line_items()
+
+    with patch("boe.applications.bank_domain_apps.BankDomainWriteModel"), \
+            patch("boe.applications.bank_domain_apps.NotificationWorkerClient"), \
+            patch("boe.applications.bank_domain_apps.ServiceMetricPublisher"), \
+            tempfile.TemporaryDirectory() as tmp_dir:
+
+        print(f"{'batch size':>10} {'messages':>9} {'msg/s':>9} {'transactions/s':>15}")
+        for batch_size in BATCH_SIZES:
+            os.environ["SQLITE_DBNAME"] = os.path.join(tmp_dir, f"batch_{batch_size}.sqlite")
+            app = BankManagerApp()
+
+            account_id = str(uuid4())
+            app.handle_event(
+                BankDomainAppEventFactory.build_establish_new_account_event(
+                    owner_id=account_id,
+                    is_overdraft_protected=True
+                )
+            )
+            bodies = make_message_bodies(account_id=account_id, line_items=line_items, batch_size=batch_size)
+
+            started = time.perf_counter()
+            handle_bodies(app=app, bodies=bodies)
+            elapsed = time.perf_counter() - started
+
+            print(f"{batch_size:>10} {len(bodies):>9} {len(bodies) / elapsed:>9.0f} {LINE_ITEM_COUNT / elapsed:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compares serialize_object_to_dict (JSON encode then json.loads) and the
+per-field parsing of the query models against encode_value and
+decode_document from boe.utils.bson_utils.
+
+Both paths finish with BSON.encode / BSON.decode so the numbers include
+what pymongo does with the documents, the JSON path stores UUIDs and
+datetimes as strings and has to parse them back on read.
+
+Usage: python -m benchmarks.bson_codec_benchmark
+"""
+import time
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from bson import BSON
+
+from boe.lib.domains.store_domain import StoreAggregate, StoreEntity, StoreItemEntity
+from boe.lib.domains.task_domain import TaskAggregate, TaskEntity, TaskStatusEnum
+from boe.utils.bson_utils import decode_document, encode_value
+from boe.utils.serialization_utils import serialize_object_to_dict
+
+ITERATIONS = 2000
+STORE_ITEM_COUNT = 50
+
+
+def build_task_aggregate() -> TaskAggregate:
+    return TaskAggregate.create(
+        task=TaskEntity(
+            id=uuid4(),
+            owner_id=uuid4(),
+            name='Clean Room',
+            description='Clean the room before dinner',
+            status=TaskStatusEnum.incomplete,
+            value=10.0,
+            evidence_required=True,
+            due_date=datetime.now(),
+            evidence_data=b'evidence' * 64,
+        )
+    )
+
+
+def build_store_aggregate() -> StoreAggregate:
+    store_item_map = {}
+    for n in range(STORE_ITEM_COUNT):
+        store_item = StoreItemEntity(id=uuid4(), value=float(n), name=f'Item {n}', description='A store item')
+        store_item_map[str(store_item.id)] = store_item
+
+    return StoreAggregate.create(store=StoreEntity(id=uuid4(), family_id=uuid4()), store_item_map=store_item_map)
+
+
+def parse_legacy_task(task_data: dict) -> TaskEntity:
+    """Mirrors the parsing the task query model did for serialize_object_to_dict documents"""
+    return TaskEntity(
+        id=UUID(task_data['id']),
+        owner_id=UUID(task_data['owner_id']),
+        name=task_data['name'],
+        description=task_data['description'],
+        status=TaskStatusEnum(task_data['status']),
+        value=task_data['value'],
+        evidence_required=task_data['evidence_required'],
+        due_date=datetime.fromisoformat(task_data['due_date']),
+        is_validated=task_data['is_validated'],
+        evidence_data=task_data['evidence_data'].encode() if task_data['evidence_data'] else None,
+        created=datetime.fromisoformat(task_data['created']),
+    )
+
+
+def run(label: str, func) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - started
+
+    print(f"{label:<48} {elapsed / ITERATIONS * 1e6:>9.1f} us/op")
+    return elapsed
+
+
+def main():
+    task_aggregate = build_task_aggregate()
+    store_aggregate = build_store_aggregate()
+
+    print(f"{ITERATIONS} iterations, store with {STORE_ITEM_COUNT} items\n")
+
+    json_task = run(
+        "task encode: serialize_object_to_dict", lambda: BSON.encode(serialize_object_to_dict(task_aggregate))
+    )
+    bson_task = run("task encode: encode_value", lambda: BSON.encode(encode_value(task_aggregate)))
+
+    json_store = run(
+        "store encode: serialize_object_to_dict", lambda: BSON.encode(serialize_object_to_dict(store_aggregate))
+    )
+    bson_store = run("store encode: encode_value", lambda: BSON.encode(encode_value(store_aggregate)))
+
+    json_task_document = BSON.encode(serialize_object_to_dict(task_aggregate.task))
+    bson_task_document = BSON.encode(encode_value(task_aggregate.task))
+
+    json_decode = run("task decode: manual parse", lambda: parse_legacy_task(BSON.decode(json_task_document)))
+    bson_decode = run(
+        "task decode: decode_document", lambda: decode_document(TaskEntity, BSON.decode(bson_task_document))
+    )
+
+    print()
+    print(f"task encode speedup:  {json_task / bson_task:.1f}x")
+    print(f"store encode speedup: {json_store / bson_store:.1f}x")
+    print(f"task decode speedup:  {json_decode / bson_decode:.1f}x")
+    print(f"task document size:   {len(json_task_document)} bytes JSON path, {len(bson_task_document)} bytes BSON path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measures the cold import time of the modules a worker or the API imports at
+startup, each in a fresh interpreter.
+
+Importing a module no longer resolves secrets, the last row is the import
+of the AWS Secrets Manager client that every process used to pay at startup
+before fetching the credentials over the network. The benchmark fails when
+importing a module resolves a secret.
+
+Usage: python -m benchmarks.import_time_benchmark
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+MODULES = [
+    "boe.env",
+    "boe.secrets",
+    "boe.clients.client",
+    "boe.lib.mongo_client_registry",
+    "boe.lib.worker_runtime",
+    "boe.applications.bank_domain_apps",
+    "boe.workers.supervisor",
+    "boe.api.core_api",
+    "cbaxter1988_utils.aws_secrets_manager_utils",
+]
+
+SCRIPT = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+secrets = sys.modules.get("boe.secrets")
+assert secrets is None or not secrets._secrets, "secrets resolved at import"
+print(elapsed)
+"""
+
+
+def measure_import(module: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(module=module)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    return float(result.stdout)
+
+
+def main():
+    print(f"Median cold import time of {RUNS} runs\n")
+    print(f"{'module':<45} {'ms':>8}")
+
+    for module in MODULES:
+        elapsed = statistics.median(measure_import(module=module) for _ in range(RUNS))
+        print(f"{module:<45} {elapsed * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Reports the import cost of a Lambda handler module, the bulk of the init phase
+of a cold start, and fails when it exceeds LAMBDA_IMPORT_BUDGET_MS.
+
+The handler is imported in a fresh interpreter with -X importtime, with an
+in-memory event store and the MongoDB credentials read from env vars, so it
+runs without the backing services. The report lists the slowest modules by
+cumulative import time and the self time of each top level package. In the
+function the credentials come from Secrets Manager, whose client import is
+reported by benchmarks.import_time_benchmark.
+
+Usage: python -m benchmarks.lambda_import_cost_report [handler_module]
+"""
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from boe.env import LAMBDA_IMPORT_BUDGET_MS
+
+HANDLER_MODULE = "boe.lambda_handlers.task_manager_worker"
+TOP_COUNT = 15
+
+IMPORT_ENV = {
+    "INFRASTRUCTURE_FACTORY": "eventsourcing.popo:Factory",
+    "SECRET_PROVIDERS": "env",
+    "MONGO_DB_USERNAME": "report",
+    "MONGO_DB_PASSWORD": "report",
+}
+
+
+def get_import_times(module: str) -> list:
+    """
+    :param module:
+    :return: (module, self_us, cumulative_us) of every module imported, in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, **IMPORT_ENV),
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+    import_times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        import_times.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return import_times
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else HANDLER_MODULE
+    import_times = get_import_times(module=module)
+
+    total_ms = sum(self_us for _, self_us, _ in import_times) / 1000
+    packages = Counter()
+    for name, self_us, _ in import_times:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"{module}: {len(import_times)} modules imported in {total_ms:.1f}ms\n")
+
+    print(f"{'module':<50} {'cumulative ms':>14}")
+    for name, _, cumulative_us in sorted(import_times, key=lambda import_time: -import_time[2])[:TOP_COUNT]:
+        print(f"{name:<50} {cumulative_us / 1000:>14.1f}")
+
+    print(f"\n{'package':<50} {'self ms':>14}")
+    for package, self_us in packages.most_common(TOP_COUNT):
+        print(f"{package:<50} {self_us / 1000:>14.1f}")
+
+    if total_ms > LAMBDA_IMPORT_BUDGET_MS:
+        print(f"\nOver the cold start budget of {LAMBDA_IMPORT_BUDGET_MS}ms")
+        sys.exit(1)
+
+    print(f"\nWithin the cold start budget of {LAMBDA_IMPORT_BUDGET_MS}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compares the add_item / DuplicateKeyError / update_item projection write
+against ProjectionWriter single upserts and buffered bulk_write flushes.
+
+Writes go to an in-memory stand-in for a pymongo Collection which adds a
+fixed latency per round-trip, so the numbers show the cost of round-trips
+and exceptions rather than of a Mongo server.
+
+Usage: python -m benchmarks.projection_writer_benchmark
+"""
+import time
+from uuid import uuid4
+
+from boe.lib.projection_writer import ProjectionWriter
+from cbaxter1988_utils.pymongo_utils import add_item, update_item
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import BulkWriteResult
+
+ROUND_TRIP_SECONDS = 0.0002
+AGGREGATE_COUNT = 200
+VERSIONS_PER_AGGREGATE = 10
+
+
+class InMemoryCollection:
+    """Minimal stand-in for the pymongo Collection calls made by the projection writes"""
+
+    def __init__(self):
+        self.documents = {}
+        self.round_trips = 0
+
+    def _round_trip(self):
+        self.round_trips += 1
+        time.sleep(ROUND_TRIP_SECONDS)
+
+    @staticmethod
+    def _matches(document: dict, query: dict) -> bool:
+        for clause in query.get("$or", [{}]):
+            for key, condition in clause.items():
+                if "$lt" in condition and not (key in document and document[key] < condition["$lt"]):
+                    break
+                if "$exists" in condition and (key in document) != condition["$exists"]:
+                    break
+            else:
+                return True
+        return False
+
+    def _update(self, query: dict, update: dict, upsert: bool = False) -> bool:
+        document = self.documents.get(query["_id"])
+        if document is None:
+            if not upsert:
+                return False
+            self.documents[query["_id"]] = dict(update["$set"], _id=query["_id"])
+            return True
+
+        if not self._matches(document=document, query=query):
+            if upsert:
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return False
+
+        document.update(update["$set"])
+        for field in update.get("$unset", {}):
+            document.pop(field, None)
+        return True
+
+    def insert_one(self, document: dict):
+        self._round_trip()
+        if document["_id"] in self.documents:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.documents[document["_id"]] = dict(document)
+
+    def update_one(self, query: dict, update: dict, upsert: bool = False):
+        self._round_trip()
+        self._update(query=query, update=update, upsert=upsert)
+
+    def bulk_write(self, requests: list, ordered: bool = True):
+        self._round_trip()
+        for request in requests:
+            self._update(query=request._filter, update=request._doc, upsert=request._upsert)
+        return BulkWriteResult({"nUpserted": 0, "nModified": len(requests)}, acknowledged=True)
+
+
+def make_writes():
+    record_ids = [str(uuid4()) for _ in range(AGGREGATE_COUNT)]
+    return [
+        (record_id, {"_id": record_id, "name": f"name-{version}", "version": version})
+        for version in range(1, VERSIONS_PER_AGGREGATE + 1)
+        for record_id in record_ids
+    ]
+
+
+def write_add_then_update(collection: InMemoryCollection, writes: list):
+    for record_id, document in writes:
+        try:
+            add_item(collection=collection, item=dict(document))
+        except DuplicateKeyError:
+            update_item(collection=collection, item_id=record_id, new_values=document)
+
+
+def write_upsert(collection: InMemoryCollection, writes: list, buffer_size: int = 0):
+    writer = ProjectionWriter(collection=collection, buffer_size=buffer_size)
+    for record_id, document in writes:
+        writer.upsert(record_id=record_id, document=document, version=document["version"])
+    writer.flush()
+
+
+def main():
+    writes = make_writes()
+    runs = [
+        ("add_item/update_item", lambda collection: write_add_then_update(collection=collection, writes=writes)),
+        ("upsert", lambda collection: write_upsert(collection=collection, writes=writes)),
+        ("upsert buffer=100", lambda collection: write_upsert(collection=collection, writes=writes, buffer_size=100)),
+    ]
+
+    print(f"{'writer':>22} {'round trips':>12} {'writes/s':>10}")
+    for name, run in runs:
+        collection = InMemoryCollection()
+
+        started = time.perf_counter()
+        run(collection)
+        elapsed = time.perf_counter() - started
+
+        print(f"{name:>22} {collection.round_trips:>12} {len(writes) / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
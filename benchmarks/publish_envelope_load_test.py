@@ -0,0 +1,124 @@
+"""
+Load tests the publishing API routes with the legacy envelope encoding
+(serialize_object, json.loads, json.dumps and extract_name_from_object)
+against serialize_envelope.
+
+Requests are sent through the Flask test client and the PikaPublisherClient
+publishes to an in-memory publisher, so the numbers show the API and
+envelope overhead rather than RabbitMQ round-trips. The publish_event
+section times the envelope encoding of the same events on its own.
+
+Usage: python -m benchmarks.publish_envelope_load_test
+"""
+import json
+import time
+from datetime import datetime
+from unittest.mock import patch
+from uuid import uuid4
+
+from boe.api.core_api import app
+from boe.applications.bank_domain_apps import BankDomainAppEventFactory
+from boe.applications.task_domain_apps import TaskManagerAppEventFactory
+from boe.clients.client import PikaPublisherClient
+from boe.utils.core_utils import extract_name_from_object
+from boe.utils.serialization_utils import serialize_envelope, serialize_object
+
+REQUEST_COUNT = 3000
+PUBLISH_COUNT = 20000
+
+
+class InMemoryPublisher:
+    """Stand-in for the PublisherPool which keeps the published bodies"""
+
+    def __init__(self, **kwargs):
+        self.bodies = []
+
+    def publish_message(self, exchange, routing_key, body, properties=None):
+        self.bodies.append(body)
+
+
+def legacy_serialize_envelope(event, content_type=None) -> str:
+    return json.dumps({extract_name_from_object(event): json.loads(serialize_object(event))})
+
+
+def build_requests():
+    family_id = uuid4()
+    return [
+        (
+            f"/api/v1/family/{family_id}/store",
+            {"NewStoreItemEvent": {"item_name": "Ice Cream", "item_description": "One scoop", "item_value": 5.0}}
+        ),
+        (f"/api/v1/family/{family_id}/store", {"RemoveStoreItem": {"item_id": str(uuid4())}}),
+        ("/api/v1/task_events", {"MarkTaskCompleteEvent": {"task_id": str(uuid4())}}),
+    ]
+
+
+def build_events():
+    return [
+        TaskManagerAppEventFactory.build_new_task_event(
+            name='Clean Room',
+            description='Clean the room before dinner',
+            due_date=datetime.now(),
+            owner_id=str(uuid4()),
+            task_id=str(uuid4()),
+            evidence_required=True,
+            value=10.0
+        ),
+        BankDomainAppEventFactory.build_new_transaction_batch_event(
+            account_id=str(uuid4()),
+            transactions=[
+                {"item_id": str(uuid4()), "value": float(n), "transaction_method": n % 2} for n in range(20)
+            ]
+        ),
+    ]
+
+
+def load_test_api(label: str, encode_envelope) -> float:
+    client = app.test_client()
+    requests = build_requests()
+
+    with patch("boe.clients.client.serialize_envelope", encode_envelope):
+        started = time.perf_counter()
+        for n in range(REQUEST_COUNT):
+            path, body = requests[n % len(requests)]
+            client.post(path, json=body)
+        elapsed = time.perf_counter() - started
+
+    print(f"{label:<36} {REQUEST_COUNT / elapsed:>9.0f} requests/s")
+    return elapsed
+
+
+def time_publish_event(label: str, encode_envelope) -> float:
+    publisher_client = PikaPublisherClient(worker_exchange=None, worker_routing_key="bench")
+    events = build_events()
+
+    with patch("boe.clients.client.serialize_envelope", encode_envelope):
+        started = time.perf_counter()
+        for n in range(PUBLISH_COUNT):
+            publisher_client.publish_event(event=events[n % len(events)])
+        elapsed = time.perf_counter() - started
+
+    print(f"{label:<36} {elapsed / PUBLISH_COUNT * 1e6:>9.1f} us/publish")
+    return elapsed
+
+
+def main():
+    with patch("boe.clients.client.get_publisher_pool", InMemoryPublisher):
+        for event in build_events():
+            assert serialize_envelope(event) == legacy_serialize_envelope(event)
+
+        print(f"API load test, {REQUEST_COUNT} requests")
+        legacy_api = load_test_api("legacy envelope", legacy_serialize_envelope)
+        envelope_api = load_test_api("serialize_envelope", serialize_envelope)
+
+        print(f"\npublish_event, {PUBLISH_COUNT} events")
+        legacy_publish = time_publish_event("legacy envelope", legacy_serialize_envelope)
+        envelope_publish = time_publish_event("serialize_envelope", serialize_envelope)
+
+    print()
+    print(f"API throughput gain:   {(legacy_api / envelope_api - 1) * 100:.1f}%")
+    print(f"publish_event speedup: {legacy_publish / envelope_publish:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
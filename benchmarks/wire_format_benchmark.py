@@ -0,0 +1,115 @@
+"""
+Compares the JSON and MessagePack wire formats of the worker messages,
+the encoded size of each event type and the time a worker spends decoding
+the body and rebuilding the event with its factory.
+
+AddEvidenceEvent is measured with printable evidence so it can be sent as
+JSON at all, binary evidence only round-trips through MessagePack.
+
+Usage: python -m benchmarks.wire_format_benchmark
+"""
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from boe.applications.bank_domain_apps import BankDomainAppEventFactory
+from boe.applications.store_domain_apps import StoreManagerAppEventFactory
+from boe.applications.task_domain_apps import TaskManagerAppEventFactory
+from boe.utils.serialization_utils import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    deserialize_envelope,
+    serialize_envelope
+)
+
+ITERATIONS = 5000
+EVIDENCE_SIZE = 64 * 1024
+
+
+def build_events():
+    task_id = str(uuid4())
+    account_id = str(uuid4())
+
+    return [
+        (
+            TaskManagerAppEventFactory.build_new_task_event(
+                name='Clean Room',
+                description='Clean the room before dinner',
+                due_date=datetime.now(),
+                owner_id=str(uuid4()),
+                task_id=task_id,
+                evidence_required=True,
+                value=10.0
+            ),
+            TaskManagerAppEventFactory.build_new_task_event
+        ),
+        (
+            TaskManagerAppEventFactory.build_mark_task_complete_event(task_id=task_id),
+            TaskManagerAppEventFactory.build_mark_task_complete_event
+        ),
+        (
+            TaskManagerAppEventFactory.build_add_evidence_event(
+                task_id=task_id,
+                data=bytes(range(32, 127)) * (EVIDENCE_SIZE // 95)
+            ),
+            TaskManagerAppEventFactory.build_add_evidence_event
+        ),
+        (
+            StoreManagerAppEventFactory.build_new_store_item_event(
+                store_id=str(uuid4()),
+                item_name='Ice Cream',
+                item_description='One scoop',
+                item_value=5.0
+            ),
+            StoreManagerAppEventFactory.build_new_store_item_event
+        ),
+        (
+            BankDomainAppEventFactory.build_new_transaction_event(
+                item_id=str(uuid4()),
+                account_id=account_id,
+                transaction_method=0,
+                value=10.0
+            ),
+            BankDomainAppEventFactory.build_new_transaction_event
+        ),
+        (
+            BankDomainAppEventFactory.build_new_transaction_batch_event(
+                account_id=account_id,
+                transactions=[
+                    {"item_id": str(uuid4()), "value": float(n), "transaction_method": n % 2} for n in range(50)
+                ]
+            ),
+            None
+        ),
+    ]
+
+
+def time_decode(body, content_type: str, event_factory) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for payload in deserialize_envelope(body, content_type=content_type).values():
+            if event_factory is not None:
+                event_factory(**payload)
+
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+
+def main():
+    print(f"{ITERATIONS} decodes per event type, decode includes the event factory\n")
+    print(f"{'event':<28} {'json B':>9} {'msgpack B':>10} {'json us':>9} {'msgpack us':>11} {'speedup':>8}")
+
+    for event, event_factory in build_events():
+        json_body = serialize_envelope(event, content_type=JSON_CONTENT_TYPE).encode()
+        msgpack_body = serialize_envelope(event, content_type=MSGPACK_CONTENT_TYPE)
+
+        json_decode = time_decode(json_body, JSON_CONTENT_TYPE, event_factory)
+        msgpack_decode = time_decode(msgpack_body, MSGPACK_CONTENT_TYPE, event_factory)
+
+        print(
+            f"{type(event).__name__:<28} {len(json_body):>9} {len(msgpack_body):>10} "
+            f"{json_decode:>9.1f} {msgpack_decode:>11.1f} {json_decode / msgpack_decode:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
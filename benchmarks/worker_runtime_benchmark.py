@@ -0,0 +1,206 @@
+"""
+Compares the throughput of the blocking and asyncio worker runtimes on an
+in-memory broker stand-in.
+
+The bank worker path (envelope decode, event factory, BankManagerApp.handle_event,
+ack) handles NewTransactionEvent messages spread over a set of accounts. The
+event store is in memory, the Mongo write model is replaced with a stand-in
+that sleeps IO_LATENCY_MS per save, standing in for the round trip to Mongo.
+Each runtime is fed by a broker stand-in that delivers no more than the
+prefetch count of unacked messages, like RabbitMQ does.
+
+Usage: python -m benchmarks.worker_runtime_benchmark
+"""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+from uuid import uuid4
+
+from boe.applications.bank_domain_apps import BankDomainAppEventFactory, BankManagerApp
+from boe.lib.async_consumer import ApplicationExecutor, AsyncQueueConsumer
+from boe.lib.concurrent_consumer import (
+    ConcurrentQueueConsumer,
+    OrderedDispatcher,
+    ThreadSafeChannel,
+    get_prefetch_count,
+    make_ordering_key_getter
+)
+from boe.lib.domains.bank_domain import BankTransactionMethodEnum
+from boe.utils.serialization_utils import deserialize_envelope
+from pika.spec import Basic, BasicProperties
+
+MESSAGE_COUNT = 1000
+ACCOUNT_COUNT = 64
+IO_LATENCY_MS = 2
+CONCURRENCIES = [1, 8, 32]
+
+
+class LatentWriteModel:
+    def save_bank_aggregate(self, aggregate, domain_events):
+        time.sleep(IO_LATENCY_MS / 1000)
+
+
+class InMemoryConnection:
+    """Runs the callbacks scheduled by a ThreadSafeChannel straight away"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def add_callback_threadsafe(self, callback):
+        with self._lock:
+            callback()
+
+
+class InMemoryChannel:
+    """
+    Broker stand-in for the blocking runtimes, a delivery waits until fewer than prefetch_count messages are unacked.
+    """
+
+    def __init__(self, prefetch_count: int):
+        self.connection = InMemoryConnection()
+        self.acked = 0
+        self.unacked = threading.Semaphore(prefetch_count)
+        self.all_acked = threading.Event()
+        self.expected = 0
+
+    def deliver(self, on_message, messages):
+        self.expected = len(messages)
+        for delivery_tag, body in enumerate(messages, start=1):
+            self.unacked.acquire()
+            on_message(self, Basic.Deliver(delivery_tag=delivery_tag), BasicProperties(), body)
+
+        self.all_acked.wait()
+
+    def basic_ack(self, delivery_tag: int, multiple: bool = False):
+        self.acked += 1
+        self.unacked.release()
+        if self.acked == self.expected:
+            self.all_acked.set()
+
+    basic_nack = basic_ack
+
+
+class AsyncInMemoryChannel:
+    """Broker stand-in for the asyncio runtime, acks arrive on the event loop"""
+
+    def __init__(self, prefetch_count: int):
+        self.acked = 0
+        self.unacked = asyncio.Semaphore(prefetch_count)
+
+    async def deliver(self, consumer: AsyncQueueConsumer, messages):
+        for delivery_tag, body in enumerate(messages, start=1):
+            await self.unacked.acquire()
+            consumer.on_message(self, Basic.Deliver(delivery_tag=delivery_tag), BasicProperties(), body)
+
+        await consumer.drain()
+        # Lets the acks scheduled by the last handlers run
+        await asyncio.sleep(0)
+
+    def basic_ack(self, delivery_tag: int, multiple: bool = False):
+        self.acked += 1
+        self.unacked.release()
+
+    def basic_nack(self, delivery_tag: int, multiple: bool = False, requeue: bool = True):
+        self.basic_ack(delivery_tag=delivery_tag)
+
+
+def make_on_message_callback(app: BankManagerApp):
+    def on_message_callback(ch, method, properties, body):
+        for event_name, payload in deserialize_envelope(body=body, content_type=properties.content_type).items():
+            app.handle_event(BankDomainAppEventFactory.build_new_transaction_event(**payload))
+
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    return on_message_callback
+
+
+def make_messages(account_ids):
+    return [
+        json.dumps({
+            "NewTransactionEvent": {
+                "account_id": account_ids[n % len(account_ids)],
+                "item_id": str(uuid4()),
+                "transaction_method": BankTransactionMethodEnum.add.value,
+                "value": 1
+            }
+        }).encode()
+        for n in range(MESSAGE_COUNT)
+    ]
+
+
+def run_blocking(on_message_callback, messages, concurrency: int) -> InMemoryChannel:
+    channel = InMemoryChannel(prefetch_count=get_prefetch_count(concurrency=concurrency))
+    if concurrency == 1:
+        channel.deliver(on_message_callback, messages)
+        return channel
+
+    consumer = ConcurrentQueueConsumer(
+        amqp_host="", amqp_username="", amqp_password="", queue_name="bench",
+        callback=on_message_callback,
+        get_ordering_key=make_ordering_key_getter("account_id"),
+        concurrency=concurrency
+    )
+    dispatcher = OrderedDispatcher(concurrency=concurrency)
+    thread_safe_channel = ThreadSafeChannel(channel=channel)
+    channel.deliver(
+        lambda ch, method, properties, body: consumer._dispatch(
+            dispatcher, thread_safe_channel, method, properties, body
+        ),
+        messages
+    )
+    dispatcher.shutdown(wait=True)
+    return channel
+
+
+def run_asyncio(on_message_callback, messages, concurrency: int) -> AsyncInMemoryChannel:
+    consumer = AsyncQueueConsumer(
+        amqp_host="", amqp_username="", amqp_password="", queue_name="bench",
+        callback=on_message_callback,
+        get_ordering_key=make_ordering_key_getter("account_id"),
+        concurrency=concurrency
+    )
+    channel = AsyncInMemoryChannel(prefetch_count=get_prefetch_count(concurrency=concurrency))
+
+    async def run():
+        consumer.executor = ApplicationExecutor(max_workers=concurrency)
+        await channel.deliver(consumer=consumer, messages=messages)
+        consumer.executor.shutdown(wait=True)
+
+    asyncio.run(run())
+    return channel
+
+
+def main():
+    with patch("boe.applications.bank_domain_apps.BankDomainWriteModel", LatentWriteModel), \
+            patch("boe.applications.bank_domain_apps.NotificationWorkerClient"), \
+            patch("boe.applications.bank_domain_apps.ServiceMetricPublisher"):
+
+        print(f"{MESSAGE_COUNT} messages over {ACCOUNT_COUNT} accounts, {IO_LATENCY_MS}ms write model latency\n")
+        print(f"{'runtime':<10} {'concurrency':>11} {'msg/s':>9}")
+
+        for runtime, run in [("blocking", run_blocking), ("asyncio", run_asyncio)]:
+            for concurrency in CONCURRENCIES:
+                app = BankManagerApp()
+                account_ids = [
+                    str(app.handle_event(
+                        BankDomainAppEventFactory.build_establish_new_account_event(
+                            owner_id=str(uuid4()),
+                            is_overdraft_protected=True
+                        )
+                    ))
+                    for _ in range(ACCOUNT_COUNT)
+                ]
+                messages = make_messages(account_ids=account_ids)
+
+                started = time.perf_counter()
+                channel = run(make_on_message_callback(app=app), messages, concurrency)
+                elapsed = time.perf_counter() - started
+
+                assert channel.acked == MESSAGE_COUNT
+                print(f"{runtime:<10} {concurrency:>11} {MESSAGE_COUNT / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,19 @@ from boe.env import (
     STORE_TABLE,
     APP_DB,
     BANK_ACCOUNT_TABLE,
-    CREDENTIAL_STORE_TABLE
+    BANK_TRANSACTION_TABLE,
+    CREDENTIAL_STORE_TABLE,
+    PROJECTION_TRACKING_TABLE
 )
-from boe.secrets import MONGO_DB_USERNAME, MONGO_DB_PASSWORD
+from boe.secrets import get_mongo_db_credentials
 from cbaxter1988_utils.pymongo_utils import get_mongo_client_w_auth, get_collection, get_database
 
+db_username, db_password = get_mongo_db_credentials()
+
 client = get_mongo_client_w_auth(
     db_host=MONGO_HOST,
-    db_username=MONGO_DB_USERNAME,
-    db_password=MONGO_DB_PASSWORD,
+    db_username=db_username,
+    db_password=db_password,
     db_port=MONGO_PORT
 )
 
@@ -25,7 +29,9 @@ tables = [
     STORE_TABLE,
     USER_ACCOUNT_TABLE,
     BANK_ACCOUNT_TABLE,
-    CREDENTIAL_STORE_TABLE
+    BANK_TRANSACTION_TABLE,
+    CREDENTIAL_STORE_TABLE,
+    PROJECTION_TRACKING_TABLE
 ]
 
 for table in tables:
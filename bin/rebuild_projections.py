@@ -0,0 +1,237 @@
+"""
+Rebuilds the Mongo projections of a domain from its event store.
+
+Aggregate ids are read from the notification log, partitioned across a process pool by a consistent hash of the
+aggregate id and replayed in chunks. Each worker writes its projections through a buffered write model, so every
+chunk is flushed as bulk writes. Completed chunks are appended to the checkpoint file, a rebuild started with the
+same checkpoint skips the aggregates already rebuilt.
+
+Projections are written through the version guard of ProjectionWriter, so a rebuild only repairs documents stored
+at the same or an older version than the event store. With --drop the projection collections of the domain are
+dropped (and their indexes created again) before the rebuild, which repairs any read model, the checkpoint file
+is then started over.
+
+Usage:
+    python -m bin.rebuild_projections --domain bank --workers 8
+    python -m bin.rebuild_projections --domain bank --drop
+    python -m bin.rebuild_projections --domain task --sqlite /tmp/task_events.sqlite --checkpoint /tmp/task.ckpt
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Set, Tuple
+from uuid import UUID
+
+DOMAINS = {
+    "bank": ("boe.applications.bank_domain_apps:BankManagerApp", "boe.lib.domains.bank_domain:BankDomainWriteModel"),
+    "store": ("boe.applications.store_domain_apps:StoreManagerApp", "boe.lib.domains.store_domain:StoreDomainWriteModel"),
+    "task": ("boe.applications.task_domain_apps:TaskManagerApp", "boe.lib.domains.task_domain:TaskDomainWriteModel"),
+    "user": ("boe.applications.user_domain_apps:UserManagerApp", "boe.lib.domains.user_domain:UserDomainWriteModel"),
+}
+
+# Names of the boe.env tables holding the projections of each domain
+DOMAIN_TABLES = {
+    "bank": ("BANK_ACCOUNT_TABLE", "BANK_TRANSACTION_TABLE"),
+    "store": ("STORE_TABLE",),
+    "task": ("TASK_TABLE",),
+    "user": ("FAMILY_TABLE", "USER_ACCOUNT_TABLE", "CREDENTIAL_STORE_TABLE"),
+}
+
+NOTIFICATION_PAGE_SIZE = 1000
+
+_worker_app = None
+
+
+def _import_topic(topic: str):
+    module_name, class_name = topic.split(":")
+    module = __import__(module_name, fromlist=[class_name])
+    return getattr(module, class_name)
+
+
+def prepare_event_store_env(sqlite_path: str = None):
+    if sqlite_path:
+        os.environ["INFRASTRUCTURE_FACTORY"] = "eventsourcing.sqlite:Factory"
+        os.environ["SQLITE_DBNAME"] = sqlite_path
+    else:
+        from boe.workers.env_setup import prepare_eventsourcing_postgres_env
+        prepare_eventsourcing_postgres_env()
+
+
+def build_app(domain: str, buffer_size: int = 0):
+    app_topic, write_model_topic = DOMAINS[domain]
+
+    app = _import_topic(app_topic)()
+    app.write_model = _import_topic(write_model_topic)(buffer_size=buffer_size)
+    return app
+
+
+def scan_aggregate_ids(app) -> Tuple[List[UUID], int]:
+    """
+    Reads the notification log and returns the aggregate ids in order of creation and the count of events
+    """
+    aggregate_ids: Dict[UUID, None] = {}
+    event_count = 0
+    start = 1
+
+    while True:
+        notifications = app.recorder.select_notifications(start=start, limit=NOTIFICATION_PAGE_SIZE)
+        if not notifications:
+            break
+
+        for notification in notifications:
+            aggregate_ids.setdefault(notification.originator_id)
+        event_count += len(notifications)
+        start = notifications[-1].id + 1
+
+    return list(aggregate_ids), event_count
+
+
+def make_chunks(aggregate_ids: List[UUID], partition_count: int, chunk_size: int) -> List[List[UUID]]:
+    from boe.utils.sharding_utils import get_shard_for_aggregate_id
+
+    partitions: List[List[UUID]] = [[] for _ in range(partition_count)]
+    for aggregate_id in aggregate_ids:
+        partitions[get_shard_for_aggregate_id(aggregate_id=aggregate_id, shard_count=partition_count)].append(
+            aggregate_id
+        )
+
+    return [
+        partition[n:n + chunk_size]
+        for partition in partitions
+        for n in range(0, len(partition), chunk_size)
+    ]
+
+
+def load_checkpoint(checkpoint_path: str) -> Set[UUID]:
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return set()
+
+    with open(checkpoint_path) as checkpoint_file:
+        return {UUID(line.strip()) for line in checkpoint_file if line.strip()}
+
+
+def save_checkpoint(checkpoint_path: str, aggregate_ids: List[UUID]):
+    if not checkpoint_path:
+        return
+
+    with open(checkpoint_path, "a") as checkpoint_file:
+        checkpoint_file.writelines(f"{aggregate_id}\n" for aggregate_id in aggregate_ids)
+
+
+def drop_projections(domain: str):
+    """
+    Drops the projection collections of the domain and creates the read model indexes again
+    """
+    from boe import env
+    from boe.lib.domains.read_model_indexes import set_up_read_model_indexes
+    from boe.lib.mongo_client_registry import get_mongo_client
+    from cbaxter1988_utils.pymongo_utils import get_database
+
+    database = get_database(client=get_mongo_client(), db_name=env.APP_DB)
+    for table_name in DOMAIN_TABLES[domain]:
+        table = getattr(env, table_name)
+        print(f"Dropping {table}")
+        database.drop_collection(table)
+
+    set_up_read_model_indexes()
+
+
+def init_worker(domain: str, sqlite_path: str, buffer_size: int):
+    global _worker_app
+
+    prepare_event_store_env(sqlite_path=sqlite_path)
+    _worker_app = build_app(domain=domain, buffer_size=buffer_size)
+
+
+def rebuild_chunk(aggregate_ids: List[UUID]) -> Tuple[List[UUID], int]:
+    """
+    Replays each aggregate from its events and saves its projection, the chunk is flushed before returning.
+    """
+    from eventsourcing.application import mutate_aggregate
+
+    event_count = 0
+    for aggregate_id in aggregate_ids:
+        domain_events = list(_worker_app.events.get(originator_id=aggregate_id))
+        aggregate = mutate_aggregate(None, domain_events)
+
+        _worker_app.save_projection(aggregate=aggregate, domain_events=domain_events)
+        event_count += len(domain_events)
+
+    _worker_app.write_model.flush()
+    return aggregate_ids, event_count
+
+
+def rebuild_projections(
+        domain: str,
+        workers: int,
+        chunk_size: int,
+        sqlite_path: str = None,
+        checkpoint_path: str = None,
+        drop: bool = False
+):
+    prepare_event_store_env(sqlite_path=sqlite_path)
+
+    if drop:
+        drop_projections(domain=domain)
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    aggregate_ids, total_events = scan_aggregate_ids(app=build_app(domain=domain))
+    completed_ids = load_checkpoint(checkpoint_path=checkpoint_path)
+    pending_ids = [aggregate_id for aggregate_id in aggregate_ids if aggregate_id not in completed_ids]
+
+    print(
+        f"Rebuilding {domain}: {len(pending_ids)} of {len(aggregate_ids)} aggregates, "
+        f"{total_events} events in the log, {workers} workers"
+    )
+
+    chunks = make_chunks(aggregate_ids=pending_ids, partition_count=workers, chunk_size=chunk_size)
+    rebuilt_aggregates = 0
+    replayed_events = 0
+    started = time.perf_counter()
+
+    # Workers are spawned so none of them inherits a MongoClient or database connection from this process
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers, initializer=init_worker, initargs=(domain, sqlite_path, chunk_size)) as pool:
+        for chunk_ids, chunk_events in pool.imap_unordered(rebuild_chunk, chunks):
+            save_checkpoint(checkpoint_path=checkpoint_path, aggregate_ids=chunk_ids)
+
+            rebuilt_aggregates += len(chunk_ids)
+            replayed_events += chunk_events
+            elapsed = time.perf_counter() - started
+
+            print(
+                f"{rebuilt_aggregates}/{len(pending_ids)} aggregates, {replayed_events} events, "
+                f"{replayed_events / elapsed:.0f} events/s"
+            )
+
+    print(f"Rebuilt {rebuilt_aggregates} {domain} aggregates in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuilds the Mongo projections of a domain from its event store")
+    parser.add_argument("--domain", required=True, choices=sorted(DOMAINS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=500, help="aggregates per bulk write")
+    parser.add_argument("--sqlite", help="path of a SQLite event store, the Postgres event store is used by default")
+    parser.add_argument("--checkpoint", help="file of rebuilt aggregate ids, used to resume a rebuild")
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="drop the projection collections of the domain first, required to repair projections of newer versions"
+    )
+    args = parser.parse_args()
+
+    rebuild_projections(
+        domain=args.domain,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        sqlite_path=args.sqlite,
+        checkpoint_path=args.checkpoint,
+        drop=args.drop
+    )
+
+
+if __name__ == "__main__":
+    main()
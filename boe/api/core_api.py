@@ -1,17 +1,22 @@
+from functools import partial
 from http import HTTPStatus
+from itertools import chain
 from uuid import uuid4, UUID
 
 from boe.clients.store_worker_client import StoreWorkerClient
 from boe.clients.task_manager_client import TaskManagerWorkerClient
 from boe.clients.user_manager_worker_client import UserManagerWorkerClient
-from boe.env import API_LISTEN_PORT
+from boe.env import API_LISTEN_PORT, BLOB_STORE_CHUNK_SIZE
+from boe.lib.blob_store import DEFAULT_MIME_TYPE, get_blob_store, guess_mime_type
 from boe.lib.domains.store_domain import StoreDomainQueryModel
 from boe.lib.domains.task_domain import TaskDomainQueryModel
 from boe.lib.domains.user_domain import UserDomainQueryModel, SubscriptionTypeEnum, UserAccountTypeEnum
+from boe.lib.domains.read_model_indexes import set_up_read_model_indexes
+from boe.lib.mongo_client_registry import get_mongo_pool_stats
 from cbaxter1988_utils.flask_utils import build_json_response
 from cbaxter1988_utils.log_utils import get_logger
 from cbaxter1988_utils.serialization_utils import serialize_object
-from flask import Flask, request
+from flask import Flask, Response, request
 from flask_cors import CORS, cross_origin
 
 logger = get_logger("BOE_API")
@@ -145,6 +150,52 @@ def get_child_task(child_id):
     return build_json_response(status=HTTPStatus.OK, payload=serialize_object(results))
 
 
+@app.route("/api/v1/task/<task_id>/evidence", methods=['POST'])
+@cross_origin()
+def upload_task_evidence(task_id):
+    """
+    Streams the request body into the blob store in chunks and publishes the evidence reference to the task.
+    """
+    try:
+        task_uuid = UUID(task_id)
+    except ValueError:
+        return build_json_response(status=HTTPStatus.BAD_REQUEST, payload={"msg": f"Invalid task id '{task_id}'"})
+
+    blob_store = get_blob_store()
+    blob_ref = blob_store.put_stream(
+        chunks=iter(partial(request.stream.read, BLOB_STORE_CHUNK_SIZE), b''),
+        mime_type=None if request.mimetype in ('', DEFAULT_MIME_TYPE) else request.mimetype
+    )
+
+    task_manager_worker_client = TaskManagerWorkerClient()
+    task_manager_worker_client.publish_attach_evidence_event(task_id=task_uuid, blob_ref=blob_ref)
+
+    return build_json_response(status=HTTPStatus.OK, payload=serialize_object(blob_ref))
+
+
+@app.route("/api/v1/evidence/<blob_hash>", methods=['GET'])
+@cross_origin()
+def get_evidence(blob_hash):
+    blob_store = get_blob_store()
+    try:
+        if not blob_store.exists(blob_hash=blob_hash):
+            return build_json_response(
+                status=HTTPStatus.NOT_FOUND,
+                payload={"msg": f"Evidence '{blob_hash}' not found"}
+            )
+    except ValueError as err:
+        return build_json_response(status=HTTPStatus.EXPECTATION_FAILED, payload={"msg": str(err)})
+
+    chunks = blob_store.iter_chunks(blob_hash=blob_hash)
+    first_chunk = next(chunks, b'')
+
+    return Response(
+        chain([first_chunk], chunks),
+        mimetype=guess_mime_type(head=first_chunk),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
 @app.route("/api/v1/registration/family/local", methods=['POST'])
 @cross_origin()
 def register_family_local():
@@ -225,5 +276,12 @@ def get_family_member(family_id, member_id):
         return build_json_response(status=HTTPStatus.OK, payload=serialize_object(user_account))
 
 
+@app.route("/api/v1/metrics/mongo_pool", methods=['GET'])
+@cross_origin()
+def get_mongo_pool_metrics():
+    return build_json_response(status=HTTPStatus.OK, payload=get_mongo_pool_stats())
+
+
 if __name__ == '__main__':
+    set_up_read_model_indexes()
     app.run(host="0.0.0.0", port=API_LISTEN_PORT)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from functools import singledispatchmethod
+from functools import partial, singledispatchmethod
+from typing import List
 from uuid import UUID
 
 from boe.applications.transcodings import (
@@ -9,6 +10,8 @@ from boe.applications.transcodings import (
     BankAccountEntityTranscoding
 )
 from boe.clients.notification_worker_client import NotificationWorkerClient
+from boe.env import BANK_ACCOUNT_SNAPSHOT_INTERVAL, ASYNC_PROJECTIONS
+from boe.lib.aggregate_cache import CachedApplication
 from boe.lib.common_models import AppEvent
 from boe.lib.domains.bank_domain import (
     BankDomainFactory,
@@ -17,7 +20,7 @@ from boe.lib.domains.bank_domain import (
     BankDomainAggregate
 )
 from boe.metrics import ServiceMetricPublisher
-from eventsourcing.application import Application
+from boe.utils.eventsourcing_utils import build_snapshotting_intervals
 from eventsourcing.persistence import Transcoder
 
 
@@ -35,6 +38,12 @@ class NewTransactionEvent(AppEvent):
     value: float
 
 
+@dataclass(frozen=True)
+class NewTransactionBatchEvent(AppEvent):
+    account_id: UUID
+    transactions: List[NewTransactionEvent]
+
+
 @dataclass(frozen=True)
 class BankAccountCreatedNotification(AppEvent):
     account_id: str
@@ -46,6 +55,12 @@ class BankTransactionProcessedNotification(AppEvent):
     transaction_id: str
 
 
+@dataclass(frozen=True)
+class BankTransactionBatchProcessedNotification(AppEvent):
+    account_id: str
+    transaction_ids: List[str]
+
+
 class BankDomainAppEventFactory:
     @staticmethod
     def build_establish_new_account_event(owner_id: str, is_overdraft_protected: bool):
@@ -68,8 +83,31 @@ class BankDomainAppEventFactory:
             value=value
         )
 
+    @staticmethod
+    def build_new_transaction_batch_event(
+            account_id,
+            transactions: List[dict]
+    ):
+        return NewTransactionBatchEvent(
+            account_id=UUID(account_id),
+            transactions=[
+                BankDomainAppEventFactory.build_new_transaction_event(
+                    item_id=transaction['item_id'],
+                    account_id=account_id,
+                    transaction_method=transaction['transaction_method'],
+                    value=transaction['value']
+                )
+                for transaction in transactions
+            ]
+        )
+
+
+class BankManagerApp(CachedApplication):
+    snapshotting_intervals = build_snapshotting_intervals({
+        BankDomainAggregate: BANK_ACCOUNT_SNAPSHOT_INTERVAL
+    })
+    async_projections = ASYNC_PROJECTIONS
 
-class BankManagerApp(Application):
     def __init__(self):
         super().__init__()
         self.factory = BankDomainFactory()
@@ -86,9 +124,8 @@ class BankManagerApp(Application):
         transcoder.register(BankTransactionEntityTranscoding())
         transcoder.register(BankTransactionMethodEnumTranscoding())
 
-    def _save_aggregate(self, aggregate):
-        self.write_model.save_bank_aggregate(aggregate=aggregate)
-        self.save(aggregate)
+    def save_projection(self, aggregate: BankDomainAggregate, domain_events: List[BankDomainAggregate.Event]):
+        self.write_model.save_bank_aggregate(aggregate=aggregate, domain_events=domain_events)
 
     @singledispatchmethod
     def handle_event(self, event):
@@ -103,13 +140,7 @@ class BankManagerApp(Application):
 
         self._save_aggregate(aggregate=aggregate)
 
-        self.notification_worker_client.publish_app_event(
-            event=BankAccountCreatedNotification(account_id=str(aggregate.id))
-        )
-
-        self.metric_publisher.incr_bank_account_created_success_metric(
-            service_name=self._service_name
-        )
+        self.after_commit(partial(self._notify_account_created, account_id=aggregate.id))
         return aggregate.id
 
     @handle_event.register(NewTransactionEvent)
@@ -126,11 +157,61 @@ class BankManagerApp(Application):
 
         self._save_aggregate(aggregate=aggregate)
 
+        self.after_commit(
+            partial(self._notify_transaction_processed, account_id=aggregate.id, transaction_id=transaction.id)
+        )
+        return aggregate.id
+
+    @handle_event.register(NewTransactionBatchEvent)
+    def _handle_new_transaction_batch_event(self, event: NewTransactionBatchEvent) -> UUID:
+        transactions = [
+            self.factory.build_bank_transaction_entity(
+                item_id=transaction_event.item_id,
+                method=transaction_event.transaction_method,
+                account_id=transaction_event.account_id,
+                value=transaction_event.value
+            )
+            for transaction_event in event.transactions
+        ]
+
+        aggregate: BankDomainAggregate = self.repository.get(aggregate_id=event.account_id)
+        aggregate.apply_transactions_to_account(transactions=transactions)
+
+        self._save_aggregate(aggregate=aggregate)
+
+        self.after_commit(partial(
+            self._notify_transaction_batch_processed,
+            account_id=aggregate.id,
+            transaction_ids=[transaction.id for transaction in transactions]
+        ))
+        return aggregate.id
+
+    def _notify_account_created(self, account_id: UUID):
+        self.notification_worker_client.publish_app_event(
+            event=BankAccountCreatedNotification(account_id=str(account_id))
+        )
+
+        self.metric_publisher.incr_bank_account_created_success_metric(
+            service_name=self._service_name
+        )
+
+    def _notify_transaction_processed(self, account_id: UUID, transaction_id: UUID):
         self.notification_worker_client.publish_app_event(
             event=BankTransactionProcessedNotification(
-                account_id=str(aggregate.id),
-                transaction_id=str(transaction.id)
+                account_id=str(account_id),
+                transaction_id=str(transaction_id)
             )
         )
         self.metric_publisher.incr_transaction_processed_success_metric(service_name=self._service_name)
-        return aggregate.id
+
+    def _notify_transaction_batch_processed(self, account_id: UUID, transaction_ids: List[UUID]):
+        self.notification_worker_client.publish_app_event(
+            event=BankTransactionBatchProcessedNotification(
+                account_id=str(account_id),
+                transaction_ids=[str(transaction_id) for transaction_id in transaction_ids]
+            )
+        )
+        self.metric_publisher.incr_transaction_batch_processed_success_metric(
+            service_name=self._service_name,
+            transaction_count=len(transaction_ids)
+        )
@@ -1,9 +1,12 @@
 from dataclasses import dataclass
 from functools import singledispatchmethod
 from logging import getLogger
+from typing import List
 from uuid import UUID
 
 from boe.applications.transcodings import StoreEntityTranscoding, StoreItemEntityTranscoding
+from boe.env import STORE_SNAPSHOT_INTERVAL, ASYNC_PROJECTIONS
+from boe.lib.aggregate_cache import CachedApplication
 from boe.lib.common_models import AppEvent
 from boe.lib.domains.store_domain import (
     StoreDomainWriteModel,
@@ -11,7 +14,7 @@ from boe.lib.domains.store_domain import (
     StoreDomainFactory
 )
 from boe.metrics import ServiceMetricPublisher
-from eventsourcing.application import Application
+from boe.utils.eventsourcing_utils import build_snapshotting_intervals
 from eventsourcing.persistence import Transcoder
 
 logger = getLogger("StoreManagerApp")
@@ -69,7 +72,11 @@ class StoreManagerAppEventFactory:
         )
 
 
-class StoreManagerApp(Application):
+class StoreManagerApp(CachedApplication):
+    snapshotting_intervals = build_snapshotting_intervals({
+        StoreAggregate: STORE_SNAPSHOT_INTERVAL
+    })
+    async_projections = ASYNC_PROJECTIONS
 
     def __init__(self):
         super().__init__()
@@ -79,6 +86,12 @@ class StoreManagerApp(Application):
         self._service_name = "StoreManagerApp"
 
     def get_store(self, aggregate_id: UUID) -> StoreAggregate:
+        """
+        Returns a store to read, it stays cached and must not be changed.
+        """
+        return self.repository.get(aggregate_id=aggregate_id, checkout=False)
+
+    def _checkout_store(self, aggregate_id: UUID) -> StoreAggregate:
         return self.repository.get(aggregate_id=aggregate_id)
 
     def register_transcodings(self, transcoder: Transcoder):
@@ -86,11 +99,10 @@ class StoreManagerApp(Application):
         transcoder.register(StoreEntityTranscoding())
         transcoder.register(StoreItemEntityTranscoding())
 
-    def _save_aggregate(self, aggregate: StoreAggregate):
-
-        self.save(aggregate)
+    def save_projection(self, aggregate: StoreAggregate, domain_events: List[StoreAggregate.Event]):
         self.write_model.save_store_aggregate(
-            aggregate=aggregate
+            aggregate=aggregate,
+            domain_events=domain_events
         )
 
     @singledispatchmethod
@@ -111,7 +123,7 @@ class StoreManagerApp(Application):
 
     @handle_event.register(NewStoreItemEvent)
     def _(self, event: NewStoreItemEvent) -> UUID:
-        store = self.get_store(aggregate_id=event.store_id)
+        store = self._checkout_store(aggregate_id=event.store_id)
 
         store_item = self.factory.build_store_item_entity(
             description=event.item_description,
@@ -127,7 +139,7 @@ class StoreManagerApp(Application):
 
     @handle_event.register(RemoveStoreItemEvent)
     def _(self, event: RemoveStoreItemEvent) -> UUID:
-        store = self.get_store(aggregate_id=event.store_id)
+        store = self._checkout_store(aggregate_id=event.store_id)
         store.remove_store_item(
             item_id=str(event.item_id)
         )
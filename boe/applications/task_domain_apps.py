@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from datetime import datetime
 from functools import singledispatchmethod
+from typing import List, Union
 from uuid import UUID
 
 import cbaxter1988_utils.log_utils
@@ -9,6 +10,9 @@ from boe.applications.transcodings import (
     TaskStatusEnumTranscoding,
     BytesTranscoding
 )
+from boe.env import TASK_SNAPSHOT_INTERVAL, ASYNC_PROJECTIONS
+from boe.lib.aggregate_cache import CachedApplication
+from boe.lib.blob_store import BlobNotFound, get_blob_store, validate_blob_hash
 from boe.lib.common_models import AppEvent
 from boe.lib.domains.task_domain import (
     TaskAggregate,
@@ -16,7 +20,7 @@ from boe.lib.domains.task_domain import (
     TaskDomainWriteModel,
     TaskStatusEnum
 )
-from eventsourcing.application import Application
+from boe.utils.eventsourcing_utils import build_snapshotting_intervals
 from eventsourcing.persistence import Transcoder
 
 logger = cbaxter1988_utils.log_utils.get_logger("TaskDomainApps")
@@ -44,6 +48,13 @@ class TaskManagerAppEventFactory:
         task_id: UUID
         data: bytes
 
+    @dataclass(frozen=True)
+    class AttachEvidenceEvent(AppEvent):
+        task_id: UUID
+        evidence_hash: str
+        evidence_size: int
+        evidence_mime_type: str
+
     @dataclass(frozen=True)
     class MarkTaskCompleteEvent(AppEvent):
         task_id: UUID
@@ -96,19 +107,66 @@ class TaskManagerAppEventFactory:
     def build_add_evidence_event(
             cls,
             task_id: str,
-            data: bytes
+            data: Union[bytes, str]
     ) -> "TaskManagerAppEventFactory.AddEvidenceEvent":
+        # MessagePack messages carry the evidence as bytes, JSON messages as a decoded string
         return cls.AddEvidenceEvent(
             task_id=UUID(task_id),
-            data=data
+            data=data if isinstance(data, bytes) else data.encode()
         )
 
+    @classmethod
+    def build_attach_evidence_event(
+            cls,
+            task_id: str,
+            evidence_hash: str,
+            evidence_size: int,
+            evidence_mime_type: str
+    ) -> "TaskManagerAppEventFactory.AttachEvidenceEvent":
+        return cls.AttachEvidenceEvent(
+            task_id=UUID(task_id),
+            evidence_hash=validate_blob_hash(blob_hash=evidence_hash),
+            evidence_size=evidence_size,
+            evidence_mime_type=evidence_mime_type
+        )
+
+
+# Events of the TaskManagerApp by envelope name, shared by the task manager worker and Lambda handler
+TASK_MANAGER_APP_EVENT_MAP = {
+    'NewTaskEvent': {
+        "event_factory": TaskManagerAppEventFactory.build_new_task_event,
+        "event_class": TaskManagerAppEventFactory.NewTaskEvent
+    },
+    'MarkTaskCompleteEvent': {
+        "event_factory": TaskManagerAppEventFactory.build_mark_task_complete_event,
+        "event_class": TaskManagerAppEventFactory.MarkTaskCompleteEvent
+    },
+    'UpdateTaskValueEvent': {
+        "event_factory": TaskManagerAppEventFactory.build_update_task_value_event,
+        "event_class": TaskManagerAppEventFactory.UpdateTaskValueEvent
+    },
+    'AddEvidenceEvent': {
+        "event_factory": TaskManagerAppEventFactory.build_add_evidence_event,
+        "event_class": TaskManagerAppEventFactory.AddEvidenceEvent
+    },
+    'AttachEvidenceEvent': {
+        "event_factory": TaskManagerAppEventFactory.build_attach_evidence_event,
+        "event_class": TaskManagerAppEventFactory.AttachEvidenceEvent
+    },
+}
+
+
+class TaskManagerApp(CachedApplication):
+    snapshotting_intervals = build_snapshotting_intervals({
+        TaskAggregate: TASK_SNAPSHOT_INTERVAL
+    })
+    async_projections = ASYNC_PROJECTIONS
 
-class TaskManagerApp(Application):
     def __init__(self):
         super().__init__()
         self.factory = TaskDomainFactory()
         self.write_model = TaskDomainWriteModel()
+        self.blob_store = get_blob_store()
 
     def register_transcodings(self, transcoder: Transcoder):
         super().register_transcodings(transcoder)
@@ -118,11 +176,16 @@ class TaskManagerApp(Application):
         transcoder.register(BytesTranscoding())
 
     def get_task_aggregate(self, task_id: UUID) -> TaskAggregate:
+        """
+        Returns a task to read, it stays cached and must not be changed.
+        """
+        return self.repository.get(task_id, checkout=False)
+
+    def _checkout_task_aggregate(self, task_id: UUID) -> TaskAggregate:
         return self.repository.get(task_id)
 
-    def _save_aggregate(self, aggregate: TaskAggregate):
-        self.write_model.save_aggregate(aggregate)
-        self.save(aggregate)
+    def save_projection(self, aggregate: TaskAggregate, domain_events: List[TaskAggregate.Event]):
+        self.write_model.save_aggregate(aggregate, domain_events=domain_events)
 
     @singledispatchmethod
     def handle_event(self, event):
@@ -139,22 +202,20 @@ class TaskManagerApp(Application):
             name=event.name,
             _id=str(event.task_id)
         )
-        self.write_model.save_aggregate(task_aggregate)
+        self._save_aggregate(task_aggregate)
 
-        self.save(task_aggregate)
         return task_aggregate.id
 
     @handle_event.register(TaskManagerAppEventFactory.MarkTaskCompleteEvent)
     def _(self, event: TaskManagerAppEventFactory.MarkTaskCompleteEvent):
-        task_aggregate = self.get_task_aggregate(task_id=event.task_id)
+        task_aggregate = self._checkout_task_aggregate(task_id=event.task_id)
         task_aggregate.mark_task_complete()
 
-        self.write_model.save_aggregate(task_aggregate)
-        self.save(task_aggregate)
+        self._save_aggregate(task_aggregate)
 
     @handle_event.register(TaskManagerAppEventFactory.UpdateTaskValueEvent)
     def _(self, event: TaskManagerAppEventFactory.UpdateTaskValueEvent):
-        aggregate = self.get_task_aggregate(task_id=event.task_id)
+        aggregate = self._checkout_task_aggregate(task_id=event.task_id)
 
         aggregate.change_value(value=event.value)
 
@@ -164,10 +225,31 @@ class TaskManagerApp(Application):
 
     @handle_event.register(TaskManagerAppEventFactory.AddEvidenceEvent)
     def _(self, event: TaskManagerAppEventFactory.AddEvidenceEvent):
-        aggregate = self.get_task_aggregate(task_id=event.task_id)
+        # Evidence sent inline is moved to the blob store, so the event store only keeps its reference
+        aggregate = self._checkout_task_aggregate(task_id=event.task_id)
+
+        if aggregate.task.evidence_required:
+            blob_ref = self.blob_store.put(data=event.data)
+            aggregate.attach_task_evidence(blob_hash=blob_ref.hash, size=blob_ref.size, mime_type=blob_ref.mime_type)
+
+        self._save_aggregate(aggregate=aggregate)
+
+        return aggregate.id
+
+    @handle_event.register(TaskManagerAppEventFactory.AttachEvidenceEvent)
+    def _(self, event: TaskManagerAppEventFactory.AttachEvidenceEvent):
+        aggregate = self._checkout_task_aggregate(task_id=event.task_id)
 
         if aggregate.task.evidence_required:
-            aggregate.add_task_evidence(data=event.data)
+            # The blob is uploaded through the API, a hash it never stored would leave the task with no evidence
+            if not self.blob_store.exists(blob_hash=event.evidence_hash):
+                raise BlobNotFound(f"Blob '{event.evidence_hash}' not found")
+
+            aggregate.attach_task_evidence(
+                blob_hash=event.evidence_hash,
+                size=event.evidence_size,
+                mime_type=event.evidence_mime_type
+            )
 
         self._save_aggregate(aggregate=aggregate)
 
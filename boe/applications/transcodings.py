@@ -1,5 +1,6 @@
 from dataclasses import asdict
 
+from boe.lib.blob_store import BlobRef
 from boe.lib.domains.bank_domain import (
     BankAccountEntity,
     BankTransactionEntity,
@@ -55,7 +56,8 @@ class TaskEntityTranscoding(Transcoding):
         return asdict(o)
 
     def decode(self, d: dict):
-        return TaskEntity(**d)
+        evidence = d.pop("evidence", None)
+        return TaskEntity(**d, evidence=BlobRef(**evidence) if evidence else None)
 
 
 class UserAccountEntityTranscoding(Transcoding):
@@ -71,7 +73,7 @@ class UserAccountEntityTranscoding(Transcoding):
 
 class LocalCredentialTranscoding(Transcoding):
     type = LocalCredential
-    name = "UserAccountEntity"
+    name = "LocalCredential"
 
     def encode(self, o: LocalCredential) -> str:
         return asdict(o)
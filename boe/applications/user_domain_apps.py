@@ -2,7 +2,7 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime
 from functools import singledispatchmethod
-from typing import Union
+from typing import List, Union
 from uuid import UUID
 
 from boe.applications.store_domain_apps import StoreManagerAppEventFactory
@@ -23,9 +23,13 @@ from boe.env import (
     STAGE,
     BOE_APP_EXCHANGE,
     USER_MANAGER_QUEUE_ROUTING_KEY,
-    STORE_MANAGER_QUEUE_ROUTING_KEY
+    STORE_MANAGER_QUEUE_ROUTING_KEY,
+    FAMILY_SNAPSHOT_INTERVAL,
+    USER_ACCOUNT_SNAPSHOT_INTERVAL,
+    ASYNC_PROJECTIONS
 
 )
+from boe.lib.aggregate_cache import CachedApplication
 from boe.lib.common_models import AppEvent, AppNotification
 from boe.lib.domains.user_domain import (
     UserDomainFactory,
@@ -33,13 +37,15 @@ from boe.lib.domains.user_domain import (
     SubscriptionTypeEnum,
     FamilyAggregate,
     UserAccountAggregate,
-    UserDomainWriteModel
+    UserDomainWriteModel,
+    LocalCredential
 )
 from boe.metrics import ServiceMetricPublisher
 from cbaxter1988_utils.aws_cognito_utils import add_new_user_basic, get_cognito_idp_client
 from cbaxter1988_utils.log_utils import get_logger
 from eventsourcing.application import Application
 from eventsourcing.persistence import Transcoder
+from boe.utils.eventsourcing_utils import build_snapshotting_intervals
 from boe.utils.password_utils import hash_password
 
 logger = get_logger("UserManagerApp")
@@ -227,7 +233,12 @@ class UserAuthManagerEventFactory:
 f = UserManagerAppEventFactory
 
 
-class UserManagerApp(Application):
+class UserManagerApp(CachedApplication):
+    snapshotting_intervals = build_snapshotting_intervals({
+        FamilyAggregate: FAMILY_SNAPSHOT_INTERVAL,
+        UserAccountAggregate: USER_ACCOUNT_SNAPSHOT_INTERVAL
+    })
+    async_projections = ASYNC_PROJECTIONS
 
     def __init__(self):
         super().__init__()
@@ -267,11 +278,25 @@ class UserManagerApp(Application):
     def _get_user_account_aggregate(self, family_id: UUID) -> UserAccountAggregate:
         return self.repository.get(aggregate_id=family_id)
 
+    def save_projection(
+            self,
+            aggregate: Union[FamilyAggregate, UserAccountAggregate],
+            domain_events: List[Union[FamilyAggregate.Event, UserAccountAggregate.Event]]
+    ):
+        self.write_model.save_aggregate(aggregate, domain_events=domain_events)
+
+        if isinstance(aggregate, UserAccountAggregate) and isinstance(aggregate.credential, LocalCredential):
+            self.write_model.save_local_credential(
+                username=aggregate.credential.username,
+                password_hash=aggregate.credential.password_hash,
+                user_id=aggregate.id,
+
+            )
+
     def _save_aggregate(self, aggregate: Union[FamilyAggregate, UserAccountAggregate]):
 
         try:
-            self.write_model.save_aggregate(aggregate)
-            self.save(aggregate)
+            super()._save_aggregate(aggregate=aggregate)
         except Exception:
             logger.error(f"Trouble Saving Aggregate {aggregate}")
             raise
@@ -313,12 +338,6 @@ class UserManagerApp(Application):
             )
         )
         self._save_aggregate(aggregate=user_aggregate)
-        self.write_model.save_local_credential(
-            username=user_aggregate.credential.username,
-            password_hash=user_aggregate.credential.password_hash,
-            user_id=user_aggregate.id,
-
-        )
 
         family_aggregate.add_family_member(user_aggregate_id=user_aggregate.id),
         self._save_aggregate(family_aggregate)
@@ -357,12 +376,6 @@ class UserManagerApp(Application):
         family_aggregate = self._get_family_aggregate(family_id=event.family_id)
 
         self._save_aggregate(user_aggregate)
-        self.write_model.save_local_credential(
-            username=user_aggregate.credential.username,
-            password_hash=user_aggregate.credential.password_hash,
-            user_id=user_aggregate.id,
-
-        )
 
         family_aggregate.add_family_member(
             user_aggregate_id=user_aggregate.id
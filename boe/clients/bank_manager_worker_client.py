@@ -1,7 +1,10 @@
+from typing import List
+
 from boe.applications.bank_domain_apps import BankDomainAppEventFactory
 from boe.clients.client import PikaPublisherClient
-from boe.env import BOE_APP_EXCHANGE, BANK_MANAGER_QUEUE_ROUTING_KEY
+from boe.env import BOE_APP_EXCHANGE, BANK_MANAGER_QUEUE_ROUTING_KEY, BANK_MANAGER_WORKER_SHARD_COUNT
 from boe.lib.domains.bank_domain import BankTransactionMethodEnum
+from boe.utils.sharding_utils import get_shard_for_aggregate_id, make_shard_routing_key
 
 
 class BankManagerWorkerClient(PikaPublisherClient):
@@ -13,6 +16,22 @@ class BankManagerWorkerClient(PikaPublisherClient):
 
         )
         self.app_event_factory = BankDomainAppEventFactory()
+        self.shard_count = BANK_MANAGER_WORKER_SHARD_COUNT
+
+    def get_account_routing_key(self, account_id: str) -> str:
+        """
+        Routes every event of an account to the same shard, preserving per-account ordering.
+
+        :param account_id:
+        :return:
+        """
+        if self.shard_count <= 1:
+            return self.routing_key
+
+        return make_shard_routing_key(
+            routing_key=self.routing_key,
+            shard=get_shard_for_aggregate_id(aggregate_id=account_id, shard_count=self.shard_count)
+        )
 
     def publish_new_bank_account_event(self, owner_id: str):
         event = self.app_event_factory.build_establish_new_account_event(
@@ -20,7 +39,7 @@ class BankManagerWorkerClient(PikaPublisherClient):
             is_overdraft_protected=True
         )
 
-        self.publish_event(event=event)
+        self.publish_event(event=event, routing_key=self.get_account_routing_key(account_id=owner_id))
 
     def publish_new_transaction_event(
             self,
@@ -37,6 +56,21 @@ class BankManagerWorkerClient(PikaPublisherClient):
         )
 
         self.publish_event(
+            event=event,
+            routing_key=self.get_account_routing_key(account_id=account_id)
+        )
+
+    def publish_new_transaction_batch_event(self, account_id: str, transactions: List[dict]):
+        """
+        Publishes several transactions for one account as a single message.
 
-            event=event
+        :param account_id:
+        :param transactions: dicts with item_id, transaction_method and value keys
+        :return:
+        """
+        event = self.app_event_factory.build_new_transaction_batch_event(
+            account_id=account_id,
+            transactions=transactions
         )
+
+        self.publish_event(event=event, routing_key=self.get_account_routing_key(account_id=account_id))
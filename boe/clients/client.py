@@ -1,40 +1,60 @@
 import json
+from copy import copy
 from typing import Union
 
 import pika
-from boe.env import AMQP_HOST, RABBITMQ_PASSWORD, RABBITMQ_USERNAME, BOE_APP_EXCHANGE
+from boe.env import AMQP_CONTENT_TYPE, AMQP_HOST, BOE_APP_EXCHANGE
 from boe.lib.common_models import AppEvent, AppNotification
-from boe.utils.core_utils import extract_name_from_object
-from boe.utils.serialization_utils import serialize_object
-from cbaxter1988_utils.pika_utils import make_pika_publisher
+from boe.lib.publisher_pool import get_publisher_pool
+from boe.utils.serialization_utils import JSON_CONTENT_TYPE, serialize_envelope
 
 
 class PikaPublisherClient:
-    def __init__(self, worker_exchange, worker_routing_key):
-        self.publisher = make_pika_publisher(
-            amqp_host=AMQP_HOST,
-            amqp_username=RABBITMQ_USERNAME,
-            amqp_password=RABBITMQ_PASSWORD,
+    content_type = AMQP_CONTENT_TYPE
 
-        )
+    def __init__(self, worker_exchange, worker_routing_key):
+        # Borrows the connections of the process, a publish is a basic_publish instead of a connection per message
+        self.publisher = get_publisher_pool(amqp_host=AMQP_HOST)
 
         self.exchange = BOE_APP_EXCHANGE
         self.routing_key = worker_routing_key
 
-    def publish_event(self, event: Union[AppEvent, AppNotification], properties: pika.BasicProperties = None):
+    def publish_event(
+            self,
+            event: Union[AppEvent, AppNotification],
+            properties: pika.BasicProperties = None,
+            routing_key: str = None
+    ):
+        """
+        Publishes event in the {EventName: payload} envelope, encoded by the content_type of properties or of
+        the client.
+
+        :param event:
+        :param properties:
+        :param routing_key: defaults to the routing key of the client
+        :return:
+        """
+        if properties is None:
+            properties = pika.BasicProperties(content_type=self.content_type)
+        elif properties.content_type is None:
+            # The caller may reuse its properties for other messages, they are left unchanged
+            properties = copy(properties)
+            properties.content_type = self.content_type
+
         self.publisher.publish_message(
             exchange=self.exchange,
-            routing_key=self.routing_key,
-            body=json.dumps({
-                extract_name_from_object(event): json.loads(serialize_object(event))
-            }),
+            routing_key=self.routing_key if routing_key is None else routing_key,
+            body=serialize_envelope(event=event, content_type=properties.content_type),
             properties=properties
         )
 
-    def publish(self, payload: dict, properties: pika.BasicProperties = None):
+    def publish(self, payload: dict, properties: pika.BasicProperties = None, routing_key: str = None):
+        if properties is None:
+            properties = pika.BasicProperties(content_type=JSON_CONTENT_TYPE)
+
         self.publisher.publish_message(
             exchange=self.exchange,
-            routing_key=self.routing_key,
+            routing_key=self.routing_key if routing_key is None else routing_key,
             body=json.dumps(payload),
             properties=properties
         )
@@ -1,9 +1,6 @@
-from dataclasses import asdict
-
 from boe.clients.client import PikaPublisherClient
 from boe.env import BOE_APP_EXCHANGE, NOTIFICATION_QUEUE_ROUTING_KEY
 from boe.lib.common_models import AppEvent
-from boe.utils.core_utils import extract_name_from_object
 
 
 class NotificationWorkerClient(PikaPublisherClient):
@@ -16,8 +13,4 @@ class NotificationWorkerClient(PikaPublisherClient):
         )
 
     def publish_app_event(self, event: AppEvent):
-        self.publish(
-            {
-                extract_name_from_object(event): asdict(event)
-            }
-        )
+        self.publish_event(event=event)
@@ -3,6 +3,7 @@ from uuid import UUID
 
 from boe.applications.task_domain_apps import TaskManagerAppEventFactory
 from boe.clients.client import PikaPublisherClient
+from boe.lib.blob_store import BlobRef
 from boe.env import BOE_APP_EXCHANGE, TASK_MANAGER_QUEUE_ROUTING_KEY
 
 
@@ -44,3 +45,11 @@ class TaskManagerWorkerClient(PikaPublisherClient):
         self.publish_event(event=self.event_factory.build_mark_task_complete_event(
             task_id=str(task_id)
         ))
+
+    def publish_attach_evidence_event(self, task_id: UUID, blob_ref: BlobRef):
+        self.publish_event(event=self.event_factory.build_attach_evidence_event(
+            task_id=str(task_id),
+            evidence_hash=blob_ref.hash,
+            evidence_size=blob_ref.size,
+            evidence_mime_type=blob_ref.mime_type
+        ))
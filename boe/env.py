@@ -1,26 +1,47 @@
 import os
 
-from boe.secrets import RABBITMQ_USERNAME, RABBITMQ_PASSWORD
-
 # Core Vars
 
 STAGE = os.getenv("STAGE", "LOCAL")
 API_LISTEN_PORT = os.getenv("API_LISTEN_PORT", 5001)
 
+# Domain Vars
+
+BANK_BALANCE_INTEGRITY_CHECK = os.getenv("BANK_BALANCE_INTEGRITY_CHECK", "n").lower() in ("y", "yes", "true", "1")
+
+# Secrets Vars, secrets are resolved on first use by the providers of SECRET_PROVIDERS in order.
+# "env" reads <NAME>_USERNAME and <NAME>_PASSWORD, "file" reads the JSON file SECRETS_FILE and "secrets_manager"
+# calls AWS Secrets Manager, through the JSON file SECRETS_CACHE_FILE kept for SECRETS_CACHE_TTL_SECONDS when set.
+
+SECRET_PROVIDERS = os.getenv("SECRET_PROVIDERS", "env,file,secrets_manager")
+SECRETS_FILE = os.getenv("SECRETS_FILE", "")
+SECRETS_CACHE_FILE = os.getenv("SECRETS_CACHE_FILE", "")
+SECRETS_CACHE_TTL_SECONDS = int(os.getenv("SECRETS_CACHE_TTL_SECONDS", 3600))
+
 # MongoDB Vars
 
 MONGO_HOST = os.getenv("MONGO_HOST", "192.168.1.5")
 MONGO_PORT = os.getenv("MONGO_PORT", 27017)
 
+# Shared MongoClient pool settings, a timeout of 0 leaves the pymongo default
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+
 _APP_DB = os.getenv("APP_DB", "BOE_MVP")
 _BANK_ACCOUNT_TABLE_ID = os.getenv("BANK_ACCOUNT_TABLE_ID", "bank_account_aggregate_table")
-_BANK_TRANSACTION_TABLE_ID = os.getenv("BANK_ACCOUNT_TABLE_ID", "bank_transaction_table")
+_BANK_TRANSACTION_TABLE_ID = os.getenv("BANK_TRANSACTION_TABLE_ID", "bank_transaction_table")
 
 _FAMILY_TABLE_ID = os.getenv("FAMILY_TABLE_ID", "family_aggregate_table")
 _USER_ACCOUNT_TABLE_ID = os.getenv("USER_ACCOUNT_TABLE_ID", "user_account_aggregate_table")
 _STORE_TABLE_ID = os.getenv("STORE_TABLE_ID", "store_aggregate_table")
 _TASK_TABLE_ID = os.getenv("TASK_TABLE_ID", "task_aggregate_table")
 _CREDENTIAL_STORE_TABLE_ID = os.getenv("CREDENTIAL_STORE_TABLE_ID", "credential_store_table")
+_PROJECTION_TRACKING_TABLE_ID = os.getenv("PROJECTION_TRACKING_TABLE_ID", "projection_tracking_table")
 
 APP_DB = f'{STAGE}_{_APP_DB}'.upper()
 BANK_ACCOUNT_TABLE = f'{STAGE}_{_BANK_ACCOUNT_TABLE_ID}'.upper()
@@ -31,13 +52,23 @@ USER_ACCOUNT_TABLE = f'{STAGE}_{_USER_ACCOUNT_TABLE_ID}'.upper()
 STORE_TABLE = f'{STAGE}_{_STORE_TABLE_ID}'.upper()
 TASK_TABLE = f'{STAGE}_{_TASK_TABLE_ID}'.upper()
 CREDENTIAL_STORE_TABLE = f'{STAGE}_{_CREDENTIAL_STORE_TABLE_ID}'.upper()
+PROJECTION_TRACKING_TABLE = f'{STAGE}_{_PROJECTION_TRACKING_TABLE_ID}'.upper()
 
 # Pika VARS
 
 AMQP_HOST = os.getenv("AMQP_HOST", '192.168.1.5')
 AMQP_PORT = os.getenv("AMQP_PORT", 5672)
 
-AMQP_URL = os.getenv("AMPQ_URL", f"amqp://{RABBITMQ_USERNAME}:{RABBITMQ_PASSWORD}@{AMQP_HOST}:{AMQP_PORT}")
+# Content type the clients publish events with, application/json or application/msgpack.
+# Workers decode each message by its content_type so both can be published during a rollout.
+AMQP_CONTENT_TYPE = os.getenv("AMQP_CONTENT_TYPE", "application/json")
+
+# Publisher Pool Vars, publishers borrow a connection from a process wide pool keeping up to PUBLISHER_POOL_SIZE
+# idle connections. A connection idle for longer than PUBLISHER_MAX_IDLE_SECONDS is reopened, as the broker drops
+# connections that miss their heartbeats.
+PUBLISHER_POOL_SIZE = int(os.getenv("PUBLISHER_POOL_SIZE", 8))
+PUBLISHER_HEARTBEAT_SECONDS = int(os.getenv("PUBLISHER_HEARTBEAT_SECONDS", 60))
+PUBLISHER_MAX_IDLE_SECONDS = int(os.getenv("PUBLISHER_MAX_IDLE_SECONDS", 60))
 
 _BANK_MANAGER_WORKER_QUEUE = os.getenv("BANK_MANAGER_APP_QUEUE", "bank_manager_worker_queue")
 _STORE_MANAGER_WORKER_QUEUE = os.getenv("STORE_MANAGER_APP_QUEUE", "store_manager_worker_queue")
@@ -69,6 +100,73 @@ STORE_MANAGER_QUEUE_ROUTING_KEY = 'store_manager_service'
 PERSISTENCE_QUEUE_ROUTING_KEY = 'persistence_service'
 NOTIFICATION_QUEUE_ROUTING_KEY = 'notification_service'
 
+# Number of bank manager worker shards, 1 consumes BANK_MANAGER_WORKER_QUEUE unsharded.
+# BANK_MANAGER_WORKER_SHARD selects the shard a bank manager worker process consumes.
+BANK_MANAGER_WORKER_SHARD_COUNT = int(os.getenv("BANK_MANAGER_WORKER_SHARD_COUNT", 1))
+BANK_MANAGER_WORKER_SHARD = int(os.getenv("BANK_MANAGER_WORKER_SHARD", 0))
+
+# Worker Concurrency Vars, a worker with a concurrency > 1 handles messages on that many threads, messages for the
+# same aggregate always on the same thread. Its prefetch count is concurrency * WORKER_PREFETCH_MULTIPLIER.
+
+BANK_MANAGER_WORKER_CONCURRENCY = int(os.getenv("BANK_MANAGER_WORKER_CONCURRENCY", 1))
+STORE_MANAGER_WORKER_CONCURRENCY = int(os.getenv("STORE_MANAGER_WORKER_CONCURRENCY", 1))
+TASK_MANAGER_WORKER_CONCURRENCY = int(os.getenv("TASK_MANAGER_WORKER_CONCURRENCY", 1))
+USER_MANAGER_WORKER_CONCURRENCY = int(os.getenv("USER_MANAGER_WORKER_CONCURRENCY", 1))
+WORKER_PREFETCH_MULTIPLIER = int(os.getenv("WORKER_PREFETCH_MULTIPLIER", 4))
+
+# Worker Runtime, "blocking" consumes with pika's BlockingConnection, "asyncio" consumes on an event loop and
+# handles up to the prefetch count of messages at once on WORKER_CONCURRENCY executor threads.
+WORKER_RUNTIME = os.getenv("WORKER_RUNTIME", "blocking")
+
+# Worker Batch Vars, a worker with a batch size > 1 collects up to that many messages or waits up to
+# WORKER_BATCH_TIMEOUT_MS, persists each aggregate they change once and acks the batch with one ack.
+
+BANK_MANAGER_WORKER_BATCH_SIZE = int(os.getenv("BANK_MANAGER_WORKER_BATCH_SIZE", 1))
+STORE_MANAGER_WORKER_BATCH_SIZE = int(os.getenv("STORE_MANAGER_WORKER_BATCH_SIZE", 1))
+TASK_MANAGER_WORKER_BATCH_SIZE = int(os.getenv("TASK_MANAGER_WORKER_BATCH_SIZE", 1))
+USER_MANAGER_WORKER_BATCH_SIZE = int(os.getenv("USER_MANAGER_WORKER_BATCH_SIZE", 1))
+WORKER_BATCH_TIMEOUT_MS = int(os.getenv("WORKER_BATCH_TIMEOUT_MS", 50))
+
+# Worker Runtime Vars, seconds between reconnects after the broker connection is lost and the number of events
+# between logs of the event timings, 0 disables them
+WORKER_RECONNECT_DELAY_SECONDS = float(os.getenv("WORKER_RECONNECT_DELAY_SECONDS", 5))
+WORKER_TIMING_LOG_EVERY = int(os.getenv("WORKER_TIMING_LOG_EVERY", 1000))
+
+# Worker Supervisor Vars, the supervisor keeps between WORKER_MIN_PROCESSES and WORKER_MAX_PROCESSES worker processes,
+# one per WORKER_MESSAGES_PER_PROCESS messages ready in the queue. A process told to stop has
+# WORKER_DRAIN_TIMEOUT_SECONDS to ack its messages in flight before it is killed.
+WORKER_MIN_PROCESSES = int(os.getenv("WORKER_MIN_PROCESSES", 1))
+WORKER_MAX_PROCESSES = int(os.getenv("WORKER_MAX_PROCESSES", 1))
+WORKER_MESSAGES_PER_PROCESS = int(os.getenv("WORKER_MESSAGES_PER_PROCESS", 500))
+WORKER_SCALE_INTERVAL_SECONDS = float(os.getenv("WORKER_SCALE_INTERVAL_SECONDS", 15))
+WORKER_DRAIN_TIMEOUT_SECONDS = float(os.getenv("WORKER_DRAIN_TIMEOUT_SECONDS", 30))
+
+# Snapshot Vars, interval is the number of events between snapshots per aggregate type, 0 disables
+
+BANK_ACCOUNT_SNAPSHOT_INTERVAL = int(os.getenv("BANK_ACCOUNT_SNAPSHOT_INTERVAL", 100))
+STORE_SNAPSHOT_INTERVAL = int(os.getenv("STORE_SNAPSHOT_INTERVAL", 50))
+TASK_SNAPSHOT_INTERVAL = int(os.getenv("TASK_SNAPSHOT_INTERVAL", 50))
+FAMILY_SNAPSHOT_INTERVAL = int(os.getenv("FAMILY_SNAPSHOT_INTERVAL", 50))
+USER_ACCOUNT_SNAPSHOT_INTERVAL = int(os.getenv("USER_ACCOUNT_SNAPSHOT_INTERVAL", 50))
+
+# Projection Vars, with ASYNC_PROJECTIONS the app handlers only write to the event store and the
+# projection worker maintains the Mongo read models from the notification logs
+
+ASYNC_PROJECTIONS = os.getenv("ASYNC_PROJECTIONS", "n").lower() in ("y", "yes", "true", "1")
+PROJECTION_BATCH_SIZE = int(os.getenv("PROJECTION_BATCH_SIZE", 500))
+PROJECTION_POLL_INTERVAL_SECONDS = float(os.getenv("PROJECTION_POLL_INTERVAL_SECONDS", 1))
+
+# Aggregate Cache Vars, number of hydrated aggregates kept per application, 0 disables
+
+AGGREGATE_CACHE_SIZE = int(os.getenv("AGGREGATE_CACHE_SIZE", 1000))
+
+# Blob Store Vars, task evidence is stored by content hash in the BLOB_STORE_BACKEND and events only carry the hash.
+# The local backend needs an absolute BLOB_STORE_PATH shared by the API and the task manager worker
+
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "/var/lib/boe/blobs")
+BLOB_STORE_CHUNK_SIZE = int(os.getenv("BLOB_STORE_CHUNK_SIZE", 1024 * 1024))
+
 # SQLLITE Vars
 
 _WORKER_EVENT_STORE = os.getenv('WORKER_EVENT_STORE', 'eventstore.sqllite')
@@ -96,3 +194,7 @@ POSTGRES_DB_PORT = os.getenv("POSTGRES_DB_PORT", '5432')
 POSTGRES_DB_NAME = os.getenv("POSTGRES_DB_NAME", 'eventsourcing')
 POSTGRES_DB_USER = os.getenv("POSTGRES_DB_USER", "eventsourcing")
 POSTGRES_DB_PASSWORD = os.getenv("POSTGRES_DB_PASSWORD", "eventsourcing")
+
+# Lambda Vars, the import of a handler module runs in the init phase of each cold start
+
+LAMBDA_IMPORT_BUDGET_MS = int(os.getenv("LAMBDA_IMPORT_BUDGET_MS", 1000))
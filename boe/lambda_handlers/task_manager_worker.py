@@ -1,2 +1,40 @@
+"""
+Lambda handler of the task manager, consuming the task manager events in batches of an SQS queue.
+
+The app, with its Mongo client, and the worker dispatch table are built when the module is imported, in the init
+phase of the function, and reused by every invocation of the execution environment.
+
+The event store is configured by INFRASTRUCTURE_FACTORY, the Postgres event store of the workers when unset.
+The local blob store writes under LAMBDA_BLOB_STORE_PATH unless BLOB_STORE_PATH is set, the deployment package
+at /var/task is read-only and /tmp is the only writable path of the function.
+"""
+import os
+from functools import partial
+
+from boe.applications.task_domain_apps import TASK_MANAGER_APP_EVENT_MAP, TaskManagerApp
+from boe.env import BLOB_STORE_BACKEND
+from boe.lib.blob_store import LocalFileBlobStore, register_blob_store_backend
+from boe.lib.lambda_runtime import handle_batch_event
+from boe.lib.worker_runtime import Worker
+from boe.workers.env_setup import prepare_eventsourcing_postgres_env
+
+LAMBDA_BLOB_STORE_PATH = "/tmp/blobs"
+
+if "INFRASTRUCTURE_FACTORY" not in os.environ:
+    prepare_eventsourcing_postgres_env()
+
+if BLOB_STORE_BACKEND == "local" and "BLOB_STORE_PATH" not in os.environ:
+    register_blob_store_backend("local", partial(LocalFileBlobStore, root_path=LAMBDA_BLOB_STORE_PATH))
+
+app = TaskManagerApp()
+
+worker = Worker(
+    name="TaskManagerLambda",
+    app=app,
+    event_map=TASK_MANAGER_APP_EVENT_MAP,
+    ordering_key_fields=("task_id",)
+)
+
+
 def handler(event, context):
-    print(event, context)
+    return handle_batch_event(worker=worker, event=event)
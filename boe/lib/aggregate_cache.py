@@ -0,0 +1,285 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from boe.env import AGGREGATE_CACHE_SIZE, ASYNC_PROJECTIONS
+from cbaxter1988_utils.log_utils import get_logger
+from eventsourcing.application import Application, Repository, mutate_aggregate
+from eventsourcing.domain import Aggregate
+from eventsourcing.persistence import EventStore
+
+logger = get_logger("CachedApplication")
+
+
+class AggregateCache:
+    """
+    Bounded LRU cache of hydrated aggregates.
+
+    Aggregates are checked out of the cache by the handlers changing them and returned to it once saved, so an
+    aggregate whose handler failed half way through never comes back out of the cache. Reads leave them cached.
+    """
+
+    def __init__(self, max_size: int = AGGREGATE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+        self._aggregates: "OrderedDict[UUID, Aggregate]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._aggregates)
+
+    def checkout(self, aggregate_id: UUID) -> Optional[Aggregate]:
+        with self._lock:
+            aggregate = self._aggregates.pop(aggregate_id, None)
+
+        if aggregate is None or aggregate.pending_events:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return aggregate
+
+    def get(self, aggregate_id: UUID) -> Optional[Aggregate]:
+        """
+        Returns a cached aggregate to read, leaving it in the cache.
+        """
+        with self._lock:
+            aggregate = self._aggregates.get(aggregate_id)
+            if aggregate is not None and aggregate.pending_events:
+                del self._aggregates[aggregate_id]
+                aggregate = None
+
+        if aggregate is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return aggregate
+
+    def put(self, aggregate: Aggregate):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._aggregates[aggregate.id] = aggregate
+            self._aggregates.move_to_end(aggregate.id)
+
+            while len(self._aggregates) > self.max_size:
+                self._aggregates.popitem(last=False)
+                self.evictions += 1
+
+    def evict(self, aggregate_id: UUID):
+        with self._lock:
+            self._aggregates.pop(aggregate_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._aggregates.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions
+        }
+
+
+class CachedRepository(Repository):
+    """
+    Repository serving the latest version of an aggregate from an AggregateCache.
+
+    A cached aggregate is brought up to date with any events recorded after its version, falling back
+    to the event store (snapshot plus tail) when it is missing or can not be brought up to date.
+    """
+
+    def __init__(
+            self,
+            event_store: EventStore,
+            cache: AggregateCache,
+            snapshot_store: Optional[EventStore] = None,
+    ):
+        super().__init__(event_store=event_store, snapshot_store=snapshot_store)
+        self.cache = cache
+
+        self._local = local()
+
+    @property
+    def unit_of_work(self) -> Optional[Dict[UUID, Aggregate]]:
+        """Aggregates changed in the unit of work open on this thread, by id"""
+        return getattr(self._local, "unit_of_work", None)
+
+    @unit_of_work.setter
+    def unit_of_work(self, aggregates: Optional[Dict[UUID, Aggregate]]):
+        self._local.unit_of_work = aggregates
+
+    @property
+    def commit_callbacks(self) -> List[Callable[[], Any]]:
+        """Callbacks run once the unit of work open on this thread is saved"""
+        if getattr(self._local, "commit_callbacks", None) is None:
+            self._local.commit_callbacks = []
+        return self._local.commit_callbacks
+
+    @commit_callbacks.setter
+    def commit_callbacks(self, callbacks: List[Callable[[], Any]]):
+        self._local.commit_callbacks = callbacks
+
+    def get(
+            self,
+            aggregate_id: UUID,
+            version: Optional[int] = None,
+            projector_func=mutate_aggregate,
+            checkout: bool = True
+    ) -> Any:
+        """
+        :param aggregate_id:
+        :param version:
+        :param projector_func:
+        :param checkout: whether the caller changes the aggregate, it is then taken out of the cache until saved.
+            An aggregate read with checkout False is shared with other readers and must not be changed.
+        :return:
+        """
+        if version is not None:
+            return super().get(aggregate_id=aggregate_id, version=version, projector_func=projector_func)
+
+        unit_of_work = self.unit_of_work
+        if unit_of_work is not None and aggregate_id in unit_of_work:
+            return unit_of_work[aggregate_id]
+
+        if checkout:
+            aggregate = self.cache.checkout(aggregate_id=aggregate_id)
+        else:
+            aggregate = self.cache.get(aggregate_id=aggregate_id)
+
+        if aggregate is None:
+            aggregate = super().get(aggregate_id=aggregate_id, projector_func=projector_func)
+            if not checkout:
+                self.cache.put(aggregate=aggregate)
+            return aggregate
+
+        new_events = list(self.event_store.get(originator_id=aggregate_id, gt=aggregate.version))
+        if new_events:
+            self.cache.stale += 1
+            try:
+                aggregate = projector_func(aggregate, new_events)
+            except Exception:
+                self.cache.evict(aggregate_id=aggregate_id)
+                return super().get(aggregate_id=aggregate_id, projector_func=projector_func)
+
+        return aggregate
+
+
+class CachedApplication(Application):
+    aggregate_cache_size = AGGREGATE_CACHE_SIZE
+    async_projections = ASYNC_PROJECTIONS
+
+    def construct_repository(self) -> CachedRepository:
+        return CachedRepository(
+            event_store=self.events,
+            snapshot_store=self.snapshots,
+            cache=AggregateCache(max_size=self.aggregate_cache_size)
+        )
+
+    def save(self, *aggregates, **kwargs) -> None:
+        super().save(*aggregates, **kwargs)
+
+        for aggregate in aggregates:
+            if isinstance(aggregate, Aggregate):
+                self.repository.cache.put(aggregate=aggregate)
+
+    def save_projection(self, aggregate: Aggregate, domain_events: List[Aggregate.Event]):
+        raise NotImplementedError
+
+    def _save_projections(self, aggregates: List[Aggregate], domain_events: List[List[Aggregate.Event]]):
+        """
+        Projects the aggregates once their events are in the event store.
+
+        A failed projection is logged and not raised, the events are already stored and handling them again would
+        apply them twice. The projection is repaired by the next save of the aggregate or by
+        bin/rebuild_projections.py.
+        """
+        if self.async_projections:
+            return
+
+        for aggregate, aggregate_events in zip(aggregates, domain_events):
+            try:
+                self.save_projection(aggregate=aggregate, domain_events=aggregate_events)
+            except Exception as err:
+                logger.error(f"Could not project {aggregate.id} at version {aggregate.version}: {err!r}")
+
+    def after_commit(self, callback: Callable[[], Any]):
+        """
+        Runs callback once the aggregates saved so far are in the event store, e.g. to publish notifications.
+
+        Outside a unit of work the saves already happened and callback runs now, within one it runs after the
+        unit of work is saved and is dropped when the unit of work fails. A failed callback is logged and not
+        raised, for the same reason as a failed projection.
+        """
+        if self.repository.unit_of_work is not None:
+            self.repository.commit_callbacks.append(callback)
+            return
+
+        try:
+            callback()
+        except Exception as err:
+            logger.error(f"After commit callback {callback!r} failed: {err!r}")
+
+    def _save_aggregate(self, aggregate: Aggregate):
+        unit_of_work = self.repository.unit_of_work
+        if unit_of_work is not None:
+            unit_of_work[aggregate.id] = aggregate
+            return
+
+        # The save collects the pending events, the write model builds the projection delta from them afterwards
+        domain_events = list(aggregate.pending_events)
+        self.save(aggregate)
+        self._save_projections(aggregates=[aggregate], domain_events=[domain_events])
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Defers the saves of the handlers run in the block, each aggregate they change is saved once when it exits.
+
+        Within the block repository.get returns the aggregates changed so far, so consecutive events of one
+        aggregate are applied to the same instance. The aggregates are saved with one call to save, when the
+        block or the save raises none of them is saved and they are dropped from the cache, along with the
+        callbacks passed to after_commit.
+        """
+        if self.repository.unit_of_work is not None:
+            raise RuntimeError("A unit of work is already open on this thread")
+
+        aggregates: Dict[UUID, Aggregate] = {}
+        self.repository.unit_of_work = aggregates
+        self.repository.commit_callbacks = []
+        try:
+            yield aggregates
+        except BaseException:
+            self.repository.unit_of_work = None
+            self.repository.commit_callbacks = []
+            for aggregate_id in aggregates:
+                self.repository.cache.evict(aggregate_id=aggregate_id)
+            raise
+
+        self.repository.unit_of_work = None
+        commit_callbacks, self.repository.commit_callbacks = self.repository.commit_callbacks, []
+
+        if aggregates:
+            domain_events = [list(aggregate.pending_events) for aggregate in aggregates.values()]
+            try:
+                self.save(*aggregates.values())
+            except Exception:
+                for aggregate_id in aggregates:
+                    self.repository.cache.evict(aggregate_id=aggregate_id)
+                raise
+
+            self._save_projections(aggregates=list(aggregates.values()), domain_events=domain_events)
+
+        for callback in commit_callbacks:
+            self.after_commit(callback=callback)
@@ -0,0 +1,218 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+from uuid import UUID
+
+import pika
+from cbaxter1988_utils.log_utils import get_logger
+from pika.adapters.asyncio_connection import AsyncioConnection
+from pika.channel import Channel
+from pika.spec import Basic, BasicProperties
+
+logger = get_logger("AsyncConsumer")
+
+OrderingKeyGetter = Callable[[BasicProperties, bytes], Optional[str]]
+
+
+class AsyncLoopChannel:
+    """
+    Stands in for the channel in handlers running on an executor thread.
+
+    An AsyncioConnection is driven by the event loop, acks and nacks are scheduled on the loop with
+    call_soon_threadsafe and sent from there.
+    """
+
+    def __init__(self, channel: Channel, loop: asyncio.AbstractEventLoop):
+        self.channel = channel
+        self.loop = loop
+
+    def basic_ack(self, delivery_tag: int = 0, multiple: bool = False):
+        self.loop.call_soon_threadsafe(partial(self.channel.basic_ack, delivery_tag=delivery_tag, multiple=multiple))
+
+    def basic_nack(self, delivery_tag: int = 0, multiple: bool = False, requeue: bool = True):
+        self.loop.call_soon_threadsafe(
+            partial(self.channel.basic_nack, delivery_tag=delivery_tag, multiple=multiple, requeue=requeue)
+        )
+
+    def basic_reject(self, delivery_tag: int = 0, requeue: bool = True):
+        self.loop.call_soon_threadsafe(partial(self.channel.basic_reject, delivery_tag=delivery_tag, requeue=requeue))
+
+
+class ApplicationExecutor:
+    """
+    Bridges the event loop to the synchronous eventsourcing Applications and their Mongo and Postgres clients.
+
+    Calls run on a thread pool of max_workers threads. Calls with the same key run one at a time in the order
+    they were made, so the events of one aggregate are never handled concurrently.
+    """
+
+    def __init__(self, max_workers: int, name: str = "ApplicationExecutor"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+        # key -> [lock, number of calls holding or waiting for it]
+        self._key_locks: Dict[Union[str, UUID], List] = {}
+
+    async def run(self, key: Optional[Union[str, UUID]], func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        if key is None:
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+
+        key_lock = self._key_locks.setdefault(key, [asyncio.Lock(), 0])
+        key_lock[1] += 1
+        try:
+            async with key_lock[0]:
+                return await loop.run_in_executor(self._executor, partial(func, *args))
+        finally:
+            key_lock[1] -= 1
+            if not key_lock[1]:
+                del self._key_locks[key]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncQueueConsumer:
+    """
+    Consumes a queue on an asyncio event loop with pika's AsyncioConnection.
+
+    Up to the prefetch count of messages are in flight at once, each handled by the on_message_callback of a
+    blocking worker on an ApplicationExecutor. The callback gets an AsyncLoopChannel, so the worker modules run
+    unchanged. Messages are keyed by get_ordering_key, so the messages of one aggregate are handled in order.
+    """
+
+    def __init__(
+            self,
+            amqp_host: str,
+            amqp_username: str,
+            amqp_password: str,
+            queue_name: str,
+            callback: Callable,
+            get_ordering_key: OrderingKeyGetter,
+            concurrency: int,
+            heartbeat: int = 60,
+    ):
+        self._callback = callback
+        self._queue_name = queue_name
+        self.get_ordering_key = get_ordering_key
+        self.concurrency = concurrency
+
+        self.amqp_host = amqp_host
+        self.amqp_username = amqp_username
+        self.amqp_password = amqp_password
+        self.heartbeat = heartbeat
+
+        self.executor: Optional[ApplicationExecutor] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_requested: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    def stop(self):
+        """
+        Stops consuming, consume returns once the messages in flight are handled and acked.
+
+        Safe to call from a signal handler or another thread.
+        """
+        self._stopped = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_requested.set)
+
+    async def handle_delivery(self, channel, method: Basic.Deliver, properties: BasicProperties, body: bytes):
+        try:
+            ordering_key = self.get_ordering_key(properties, body)
+        except Exception as err:
+            # The callback rejects a message it can not decode, it does not need to be ordered
+            logger.warning(f"Could not read the ordering key of delivery_tag={method.delivery_tag}: {err}")
+            ordering_key = None
+
+        loop_channel = AsyncLoopChannel(channel=channel, loop=asyncio.get_running_loop())
+        try:
+            await self.executor.run(ordering_key, self._callback, loop_channel, method, properties, body)
+        except Exception as err:
+            logger.error(f"Unhandled Exception in {self._callback}: {err}")
+
+    def on_message(self, channel, method: Basic.Deliver, properties: BasicProperties, body: bytes):
+        task = asyncio.ensure_future(self.handle_delivery(channel, method, properties, body))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def drain(self):
+        """
+        Waits for the messages in flight to be handled.
+        """
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight)
+
+    async def _open_channel(self, loop: asyncio.AbstractEventLoop):
+        connected = loop.create_future()
+        closed = loop.create_future()
+
+        def on_open_error(connection, err):
+            if not connected.done():
+                connected.set_exception(err if isinstance(err, BaseException) else ConnectionError(err))
+
+        def on_close(connection, reason):
+            on_open_error(connection=connection, err=reason)
+            if not closed.done():
+                closed.set_result(reason)
+
+        connection = AsyncioConnection(
+            parameters=pika.ConnectionParameters(
+                host=self.amqp_host,
+                credentials=pika.PlainCredentials(self.amqp_username, self.amqp_password),
+                heartbeat=self.heartbeat
+            ),
+            on_open_callback=lambda _connection: connected.set_result(_connection),
+            on_open_error_callback=on_open_error,
+            on_close_callback=on_close,
+            custom_ioloop=loop
+        )
+        await connected
+
+        channel_opened = loop.create_future()
+        connection.channel(on_open_callback=channel_opened.set_result)
+        return connection, await channel_opened, closed
+
+    async def consume_async(self, prefetch_count: int = None):
+        loop = asyncio.get_running_loop()
+        self.executor = ApplicationExecutor(max_workers=self.concurrency, name=self._queue_name)
+        self._stop_requested = asyncio.Event()
+
+        connection, channel, closed = await self._open_channel(loop=loop)
+        logger.info(f"Consuming {self._queue_name} on the asyncio runtime, channel={channel.channel_number}")
+
+        qos_ok = loop.create_future()
+        channel.basic_qos(
+            prefetch_count=prefetch_count or self.concurrency,
+            callback=qos_ok.set_result
+        )
+        await qos_ok
+
+        consumer_tag = channel.basic_consume(queue=self._queue_name, on_message_callback=self.on_message)
+
+        self._loop = loop
+        if self._stopped:
+            self._stop_requested.set()
+
+        stop_requested = asyncio.ensure_future(self._stop_requested.wait())
+        try:
+            await asyncio.wait([closed, stop_requested], return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                logger.error(f"Connection closed: {closed.result()}")
+            else:
+                channel.basic_cancel(consumer_tag=consumer_tag)
+        finally:
+            self._loop = None
+            stop_requested.cancel()
+            await self.drain()
+            # Lets the acks scheduled by the last handlers run before the connection closes
+            await asyncio.sleep(0)
+            self.executor.shutdown(wait=True)
+            if connection.is_open:
+                connection.close()
+
+    def consume(self, prefetch_count: int = None):
+        asyncio.run(self.consume_async(prefetch_count=prefetch_count))
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from typing import Callable, ContextManager, List, Optional, Tuple
+
+from boe.env import WORKER_BATCH_TIMEOUT_MS
+from boe.lib.concurrent_consumer import OrderingKeyGetter
+from cbaxter1988_utils.log_utils import get_logger
+from cbaxter1988_utils.pika_utils import RabbitConnection
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.spec import Basic, BasicProperties
+
+logger = get_logger("BatchConsumer")
+
+Message = Tuple[Basic.Deliver, BasicProperties, bytes]
+
+MessageHandler = Callable[[BasicProperties, bytes], None]
+FailureHandler = Callable[[Basic.Deliver, BasicProperties, bytes, Exception], None]
+
+
+def group_messages(messages: List[Message], get_ordering_key: OrderingKeyGetter) -> List[List[Message]]:
+    """
+    Groups messages by ordering key, keeping the order of the messages within a group.
+
+    Messages without an ordering key, or whose key can not be read, are put in a group of their own.
+
+    :param messages:
+    :param get_ordering_key:
+    :return: the groups, in order of their first message
+    """
+    groups: "OrderedDict[object, List[Message]]" = OrderedDict()
+    for message in messages:
+        method, properties, body = message
+        try:
+            ordering_key = get_ordering_key(properties, body)
+        except Exception as err:
+            logger.warning(f"Could not read the ordering key of delivery_tag={method.delivery_tag}: {err}")
+            ordering_key = None
+
+        groups.setdefault(ordering_key if ordering_key is not None else method.delivery_tag, []).append(message)
+
+    return list(groups.values())
+
+
+class BatchQueueConsumer:
+    """
+    Consumes a queue in micro batches of up to batch_size messages, or the messages received within batch_timeout_ms.
+
+    The messages of a batch are grouped by get_ordering_key and each group is handled in a unit_of_work, so an
+    aggregate changed by several messages of the batch is loaded and saved once. When a group fails it is handled
+    again one message at a time, each message that fails on its own is nacked without requeue so it is dead
+    lettered, as with an unbatched worker. The rest of the batch is acked with a single ack with multiple set.
+
+    handle_message decodes a message and runs its handlers, raising when it can not be handled.
+    """
+
+    def __init__(
+            self,
+            amqp_host: str,
+            amqp_username: str,
+            amqp_password: str,
+            queue_name: str,
+            handle_message: MessageHandler,
+            unit_of_work: Callable[[], ContextManager],
+            get_ordering_key: OrderingKeyGetter,
+            batch_size: int,
+            batch_timeout_ms: int = WORKER_BATCH_TIMEOUT_MS,
+            on_failure: Optional[FailureHandler] = None,
+            heartbeat: int = 60,
+    ):
+        self._queue_name = queue_name
+        self.handle_message = handle_message
+        self.unit_of_work = unit_of_work
+        self.get_ordering_key = get_ordering_key
+        self.batch_size = batch_size
+        self.batch_timeout_ms = batch_timeout_ms
+        self.on_failure = on_failure
+
+        self.amqp_host = amqp_host
+        self.amqp_username = amqp_username
+        self.amqp_password = amqp_password
+        self.heartbeat = heartbeat
+
+        self._batch: List[Message] = []
+        self._flush_timer = None
+
+        self._channel: Optional[BlockingChannel] = None
+        self._stopped = False
+
+    def stop(self):
+        """
+        Stops consuming, consume returns once the messages received are handled and acked.
+
+        Safe to call from a signal handler or another thread.
+        """
+        self._stopped = True
+        if self._channel is not None:
+            self._channel.connection.add_callback_threadsafe(self._channel.stop_consuming)
+
+    def _on_message(self, channel: BlockingChannel, method: Basic.Deliver, properties: BasicProperties, body: bytes):
+        self._batch.append((method, properties, body))
+
+        if len(self._batch) >= self.batch_size:
+            self.flush(channel=channel)
+        elif self._flush_timer is None:
+            self._flush_timer = channel.connection.call_later(
+                self.batch_timeout_ms / 1000,
+                lambda: self.flush(channel=channel)
+            )
+
+    def _handle_alone(self, channel: BlockingChannel, message: Message) -> bool:
+        method, properties, body = message
+        try:
+            self.handle_message(properties, body)
+            return True
+        except Exception as err:
+            logger.error(f"Could not handle delivery_tag={method.delivery_tag}: {err}")
+            channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            if self.on_failure is not None:
+                self.on_failure(method, properties, body, err)
+            return False
+
+    def _handle_group(self, channel: BlockingChannel, group: List[Message]) -> List[int]:
+        """
+        Handles a group of messages, returning the delivery tags of the messages handled.
+        """
+        try:
+            with self.unit_of_work():
+                for method, properties, body in group:
+                    self.handle_message(properties, body)
+
+            return [method.delivery_tag for method, _, _ in group]
+        except Exception as err:
+            if len(group) > 1:
+                logger.warning(f"Batch of {len(group)} messages failed, handling them one at a time: {err}")
+
+        return [message[0].delivery_tag for message in group if self._handle_alone(channel=channel, message=message)]
+
+    def flush(self, channel: BlockingChannel):
+        if self._flush_timer is not None:
+            channel.connection.remove_timeout(self._flush_timer)
+            self._flush_timer = None
+
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        handled_tags = []
+        for group in group_messages(messages=batch, get_ordering_key=self.get_ordering_key):
+            handled_tags.extend(self._handle_group(channel=channel, group=group))
+
+        # Acks every message up to the last one handled, the failed ones are already nacked
+        if handled_tags:
+            channel.basic_ack(delivery_tag=max(handled_tags), multiple=True)
+
+        logger.info(f"Processed batch of {len(batch)} messages, {len(batch) - len(handled_tags)} failed")
+
+    def consume(self, prefetch_count: int = None):
+        with RabbitConnection(
+                host=self.amqp_host,
+                user=self.amqp_username,
+                password=self.amqp_password,
+                heartbeat=self.heartbeat
+        ) as channel:
+            # A prefetch count below the batch size would never fill a batch
+            channel.basic_qos(prefetch_count=max(prefetch_count or 0, self.batch_size))
+
+            channel.basic_consume(queue=self._queue_name, on_message_callback=self._on_message)
+
+            self._channel = channel
+            try:
+                if not self._stopped:
+                    channel.start_consuming()
+            except Exception:
+                logger.error(f"Unknown Exception Caught, Closing active channel: {channel.channel_number}")
+                raise
+            finally:
+                self._channel = None
+                if channel.is_open:
+                    self.flush(channel=channel)
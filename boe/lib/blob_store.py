@@ -0,0 +1,202 @@
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from boe.env import BLOB_STORE_BACKEND, BLOB_STORE_CHUNK_SIZE, BLOB_STORE_PATH
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+
+_BLOB_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Leading bytes of the evidence formats a browser or phone uploads
+_MIME_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+)
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    """Reference to a blob, the hash is the hex SHA-256 of its content"""
+    hash: str
+    size: int
+    mime_type: str
+
+
+def guess_mime_type(head: bytes) -> str:
+    """
+    Guesses the MIME type of a blob from its leading bytes.
+
+    :param head:
+    :return: DEFAULT_MIME_TYPE when the format is not recognised
+    """
+    for signature, mime_type in _MIME_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+
+    return DEFAULT_MIME_TYPE
+
+
+def validate_blob_hash(blob_hash: str) -> str:
+    if not isinstance(blob_hash, str) or not _BLOB_HASH_PATTERN.fullmatch(blob_hash):
+        raise ValueError(f"Invalid blob hash '{blob_hash}', must be a hex SHA-256 digest")
+
+    return blob_hash
+
+
+def iter_bytes_chunks(data: bytes, chunk_size: int = BLOB_STORE_CHUNK_SIZE) -> Iterator[bytes]:
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+class BlobStore:
+    """
+    Stores immutable blobs keyed by the SHA-256 of their content, storing the same content twice keeps one copy.
+
+    Backends implement put_stream, iter_chunks and exists.
+    """
+
+    def put_stream(self, chunks: Iterable[bytes], mime_type: Optional[str] = None) -> BlobRef:
+        """
+        Stores the blob read from chunks, without holding the whole blob in memory.
+
+        :param chunks:
+        :param mime_type: guessed from the leading bytes when None
+        :return:
+        """
+        raise NotImplementedError
+
+    def iter_chunks(self, blob_hash: str) -> Iterator[bytes]:
+        """
+        Streams the content of a blob.
+
+        :param blob_hash:
+        :return:
+        :raises BlobNotFound:
+        """
+        raise NotImplementedError
+
+    def exists(self, blob_hash: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, data: bytes, mime_type: Optional[str] = None) -> BlobRef:
+        return self.put_stream(chunks=iter_bytes_chunks(data=data), mime_type=mime_type)
+
+    def get(self, blob_hash: str) -> bytes:
+        return b"".join(self.iter_chunks(blob_hash=blob_hash))
+
+
+class LocalFileBlobStore(BlobStore):
+    """
+    Stores blobs as files under root_path, fanned out by the first two characters of the hash.
+
+    Uploads are written to a temporary file next to the blobs while they are hashed and then renamed into place,
+    so a blob file is never partially written and a concurrent upload of the same content is harmless.
+
+    root_path must be absolute, a relative path would resolve against the working directory of each process.
+    """
+
+    def __init__(self, root_path: str = BLOB_STORE_PATH, chunk_size: int = BLOB_STORE_CHUNK_SIZE):
+        if not os.path.isabs(root_path):
+            raise ValueError(f"Invalid blob store path '{root_path}', must be absolute")
+
+        self.root_path = root_path
+        self.chunk_size = chunk_size
+
+    def _get_blob_path(self, blob_hash: str) -> str:
+        validate_blob_hash(blob_hash=blob_hash)
+        return os.path.join(self.root_path, blob_hash[:2], blob_hash)
+
+    def put_stream(self, chunks: Iterable[bytes], mime_type: Optional[str] = None) -> BlobRef:
+        os.makedirs(self.root_path, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+
+        upload_fd, upload_path = tempfile.mkstemp(dir=self.root_path, prefix=".upload-")
+        try:
+            with os.fdopen(upload_fd, "wb") as upload_file:
+                for chunk in chunks:
+                    if len(head) < 16:
+                        head += chunk[:16 - len(head)]
+
+                    digest.update(chunk)
+                    size += len(chunk)
+                    upload_file.write(chunk)
+
+            blob_hash = digest.hexdigest()
+            blob_path = self._get_blob_path(blob_hash=blob_hash)
+
+            if os.path.exists(blob_path):
+                os.remove(upload_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(upload_path, blob_path)
+
+        except BaseException:
+            if os.path.exists(upload_path):
+                os.remove(upload_path)
+            raise
+
+        return BlobRef(hash=blob_hash, size=size, mime_type=mime_type or guess_mime_type(head=head))
+
+    def iter_chunks(self, blob_hash: str) -> Iterator[bytes]:
+        try:
+            blob_file = open(self._get_blob_path(blob_hash=blob_hash), "rb")
+        except FileNotFoundError:
+            raise BlobNotFound(f"Blob '{blob_hash}' not found")
+
+        with blob_file:
+            for chunk in iter(lambda: blob_file.read(self.chunk_size), b""):
+                yield chunk
+
+    def exists(self, blob_hash: str) -> bool:
+        return os.path.exists(self._get_blob_path(blob_hash=blob_hash))
+
+
+BLOB_STORE_BACKENDS: Dict[str, Callable[[], BlobStore]] = {
+    "local": LocalFileBlobStore,
+}
+
+_blob_stores: Dict[str, BlobStore] = {}
+_blob_stores_lock = Lock()
+
+
+def register_blob_store_backend(name: str, factory: Callable[[], BlobStore]):
+    BLOB_STORE_BACKENDS[name] = factory
+
+
+def get_blob_store(backend: str = BLOB_STORE_BACKEND) -> BlobStore:
+    """
+    Returns the process wide BlobStore of backend.
+
+    :param backend: name of a backend in BLOB_STORE_BACKENDS
+    :return:
+    """
+    blob_store = _blob_stores.get(backend)
+    if blob_store is not None:
+        return blob_store
+
+    if backend not in BLOB_STORE_BACKENDS:
+        raise ValueError(f"Unknown blob store backend '{backend}', must be one of {sorted(BLOB_STORE_BACKENDS)}")
+
+    with _blob_stores_lock:
+        if backend not in _blob_stores:
+            _blob_stores[backend] = BLOB_STORE_BACKENDS[backend]()
+
+        return _blob_stores[backend]
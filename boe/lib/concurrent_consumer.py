@@ -0,0 +1,287 @@
+import queue
+import zlib
+from functools import partial
+from itertools import count
+from threading import Thread
+from typing import Callable, List, Optional, Union
+from uuid import UUID
+
+from boe.env import WORKER_PREFETCH_MULTIPLIER, WORKER_RUNTIME
+from boe.lib.async_consumer import AsyncQueueConsumer
+from boe.utils.serialization_utils import deserialize_envelope
+from boe.utils.sharding_utils import get_shard_for_aggregate_id, jump_consistent_hash
+from cbaxter1988_utils.log_utils import get_logger
+from cbaxter1988_utils.pika_utils import PikaQueueConsumerV2, RabbitConnection
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.spec import Basic, BasicProperties
+
+logger = get_logger("ConcurrentConsumer")
+
+OrderingKeyGetter = Callable[[BasicProperties, bytes], Optional[str]]
+
+BLOCKING_RUNTIME = "blocking"
+ASYNCIO_RUNTIME = "asyncio"
+WORKER_RUNTIMES = (BLOCKING_RUNTIME, ASYNCIO_RUNTIME)
+
+_STOP = object()
+
+
+def get_prefetch_count(concurrency: int) -> int:
+    return 1 if concurrency <= 1 else concurrency * WORKER_PREFETCH_MULTIPLIER
+
+
+def make_ordering_key_getter(*field_names: str) -> OrderingKeyGetter:
+    """
+    Makes a function returning the ordering key of a message, the first of field_names set in its payload.
+
+    :param field_names: payload fields holding the id of the aggregate the event changes, in order of preference
+    :return:
+    """
+
+    def get_ordering_key(properties: BasicProperties, body: bytes) -> Optional[str]:
+        envelope = deserialize_envelope(body=body, content_type=properties.content_type)
+        for payload in envelope.values():
+            for field_name in field_names:
+                if payload.get(field_name):
+                    return str(payload[field_name])
+
+        return None
+
+    return get_ordering_key
+
+
+class ThreadSafeChannel:
+    """
+    Stands in for the BlockingChannel in handlers running on a worker thread.
+
+    A BlockingChannel may only be used from its connection's thread, acks and nacks are scheduled on that thread
+    with add_callback_threadsafe and sent by its ioloop.
+    """
+
+    def __init__(self, channel: BlockingChannel):
+        self.channel = channel
+        self.connection = channel.connection
+
+    def basic_ack(self, delivery_tag: int = 0, multiple: bool = False):
+        self.connection.add_callback_threadsafe(
+            partial(self.channel.basic_ack, delivery_tag=delivery_tag, multiple=multiple)
+        )
+
+    def basic_nack(self, delivery_tag: int = 0, multiple: bool = False, requeue: bool = True):
+        self.connection.add_callback_threadsafe(
+            partial(self.channel.basic_nack, delivery_tag=delivery_tag, multiple=multiple, requeue=requeue)
+        )
+
+    def basic_reject(self, delivery_tag: int = 0, requeue: bool = True):
+        self.connection.add_callback_threadsafe(
+            partial(self.channel.basic_reject, delivery_tag=delivery_tag, requeue=requeue)
+        )
+
+
+class OrderedDispatcher:
+    """
+    Runs tasks on a fixed number of lanes, each a thread consuming its own queue.
+
+    Tasks submitted with the same key always run on the same lane, so they run one at a time in submission order.
+    Tasks without a key are spread round robin.
+    """
+
+    def __init__(self, concurrency: int, name: str = "OrderedDispatcher"):
+        self.concurrency = concurrency
+        self._lanes: List[queue.Queue] = [queue.Queue() for _ in range(concurrency)]
+        self._round_robin = count()
+        self._threads = [
+            Thread(target=self._run_lane, args=(lane,), name=f"{name}-{n}", daemon=True)
+            for n, lane in enumerate(self._lanes)
+        ]
+
+        for thread in self._threads:
+            thread.start()
+
+    def get_lane(self, key: Optional[Union[str, UUID]]) -> int:
+        if key is None:
+            return next(self._round_robin) % self.concurrency
+
+        try:
+            return get_shard_for_aggregate_id(aggregate_id=key, shard_count=self.concurrency)
+        except ValueError:
+            return jump_consistent_hash(key=zlib.crc32(str(key).encode()), shard_count=self.concurrency)
+
+    def submit(self, key: Optional[Union[str, UUID]], func: Callable, *args):
+        self._lanes[self.get_lane(key=key)].put((func, args))
+
+    @staticmethod
+    def _run_lane(lane: queue.Queue):
+        while True:
+            task = lane.get()
+            if task is _STOP:
+                return
+
+            func, args = task
+            try:
+                func(*args)
+            except Exception as err:
+                logger.error(f"Unhandled Exception in {func}: {err}")
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the lanes once the tasks already submitted have run.
+        """
+        for lane in self._lanes:
+            lane.put(_STOP)
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class ConcurrentQueueConsumer:
+    """
+    Consumes a queue with a prefetch count > 1 and handles the messages on an OrderedDispatcher.
+
+    The on_message_callback has the signature of a PikaQueueConsumerV2 callback and gets a ThreadSafeChannel.
+    Messages are keyed by get_ordering_key, so the messages of one aggregate are handled in order.
+    """
+
+    def __init__(
+            self,
+            amqp_host: str,
+            amqp_username: str,
+            amqp_password: str,
+            queue_name: str,
+            callback: Callable,
+            get_ordering_key: OrderingKeyGetter,
+            concurrency: int,
+            heartbeat: int = 60,
+    ):
+        self._callback = callback
+        self._queue_name = queue_name
+        self.get_ordering_key = get_ordering_key
+        self.concurrency = concurrency
+
+        self.amqp_host = amqp_host
+        self.amqp_username = amqp_username
+        self.amqp_password = amqp_password
+        self.heartbeat = heartbeat
+
+        self._channel: Optional[BlockingChannel] = None
+        self._stopped = False
+
+    def stop(self):
+        """
+        Stops consuming, consume returns once the messages in flight are handled and acked.
+
+        Safe to call from a signal handler or another thread.
+        """
+        self._stopped = True
+        if self._channel is not None:
+            self._channel.connection.add_callback_threadsafe(self._channel.stop_consuming)
+
+    def _dispatch(
+            self,
+            dispatcher: OrderedDispatcher,
+            channel: ThreadSafeChannel,
+            method: Basic.Deliver,
+            properties: BasicProperties,
+            body: bytes
+    ):
+        try:
+            ordering_key = self.get_ordering_key(properties, body)
+        except Exception as err:
+            # The callback rejects a message it can not decode, it only needs a lane
+            logger.warning(f"Could not read the ordering key of delivery_tag={method.delivery_tag}: {err}")
+            ordering_key = None
+
+        dispatcher.submit(ordering_key, self._callback, channel, method, properties, body)
+
+    def consume(self, prefetch_count: int = None):
+        with RabbitConnection(
+                host=self.amqp_host,
+                user=self.amqp_username,
+                password=self.amqp_password,
+                heartbeat=self.heartbeat
+        ) as channel:
+            # The prefetch count applies to the consumers started after basic_qos
+            channel.basic_qos(prefetch_count=prefetch_count or get_prefetch_count(concurrency=self.concurrency))
+
+            dispatcher = OrderedDispatcher(concurrency=self.concurrency, name=self._queue_name)
+            thread_safe_channel = ThreadSafeChannel(channel=channel)
+
+            channel.basic_consume(
+                queue=self._queue_name,
+                on_message_callback=lambda ch, method, properties, body: self._dispatch(
+                    dispatcher, thread_safe_channel, method, properties, body
+                )
+            )
+
+            self._channel = channel
+            try:
+                if not self._stopped:
+                    channel.start_consuming()
+            except Exception:
+                logger.error(f"Unknown Exception Caught, Closing active channel: {channel.channel_number}")
+                raise
+            finally:
+                self._channel = None
+                dispatcher.shutdown(wait=True)
+                if channel.is_open:
+                    # Sends the acks scheduled by the last handlers
+                    channel.connection.process_data_events(time_limit=0)
+
+
+def make_queue_consumer(
+        amqp_host: str,
+        amqp_username: str,
+        amqp_password: str,
+        queue: str,
+        on_message_callback: Callable,
+        concurrency: int = 1,
+        get_ordering_key: OrderingKeyGetter = None,
+        runtime: str = WORKER_RUNTIME
+) -> Union[PikaQueueConsumerV2, ConcurrentQueueConsumer, AsyncQueueConsumer]:
+    """
+    Makes an AsyncQueueConsumer on the asyncio runtime. On the blocking runtime makes a ConcurrentQueueConsumer
+    when concurrency > 1, else a PikaQueueConsumerV2 handling messages inline.
+
+    :param amqp_host:
+    :param amqp_username:
+    :param amqp_password:
+    :param queue:
+    :param on_message_callback:
+    :param concurrency: number of handler threads
+    :param get_ordering_key: see make_ordering_key_getter, messages without a key are handled in any order
+    :param runtime: one of WORKER_RUNTIMES
+    :return:
+    """
+    if runtime not in WORKER_RUNTIMES:
+        raise ValueError(f"Unknown worker runtime '{runtime}', must be one of {WORKER_RUNTIMES}")
+
+    if runtime == ASYNCIO_RUNTIME:
+        return AsyncQueueConsumer(
+            amqp_host=amqp_host,
+            amqp_username=amqp_username,
+            amqp_password=amqp_password,
+            queue_name=queue,
+            callback=on_message_callback,
+            get_ordering_key=get_ordering_key or (lambda properties, body: None),
+            concurrency=concurrency
+        )
+
+    if concurrency <= 1:
+        return PikaQueueConsumerV2(
+            amqp_host=amqp_host,
+            amqp_username=amqp_username,
+            amqp_password=amqp_password,
+            queue_name=queue,
+            callback=on_message_callback
+        )
+
+    return ConcurrentQueueConsumer(
+        amqp_host=amqp_host,
+        amqp_username=amqp_username,
+        amqp_password=amqp_password,
+        queue_name=queue,
+        callback=on_message_callback,
+        get_ordering_key=get_ordering_key or (lambda properties, body: None),
+        concurrency=concurrency
+    )
@@ -1,31 +1,35 @@
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import List
-from uuid import UUID, uuid4
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4, uuid5
 
 from boe.env import (
-    MONGO_HOST,
-    MONGO_PORT,
     APP_DB,
-    BANK_ACCOUNT_TABLE
+    BANK_ACCOUNT_TABLE,
+    BANK_TRANSACTION_TABLE,
+    BANK_BALANCE_INTEGRITY_CHECK
 )
 from boe.lib.common_models import Entity
-from boe.secrets import MONGO_DB_PASSWORD, MONGO_DB_USERNAME
-from boe.utils.serialization_utils import serialize_object_to_dict
+from boe.lib.mongo_client_registry import get_mongo_client
+from boe.lib.mongo_indexes import QueryDeclaration, ensure_indexes, make_index
+from boe.lib.projection_writer import ProjectionDelta, ProjectionWriter
+from boe.utils.bson_utils import decode_uuid, encode_value, match_uuid
 from cbaxter1988_utils.pymongo_utils import (
-    get_client,
-    get_mongo_client_w_auth,
     get_collection,
     get_database,
-    add_item,
     get_item,
-    update_item
+    query_items
 )
 from eventsourcing.domain import Aggregate, event
-from pymongo.errors import DuplicateKeyError
+from pymongo import ASCENDING, ReplaceOne
 from bson.binary import Binary, UuidRepresentation
 
+
+class BankDomainIntegrityError(ValueError):
+    pass
+
+
 class BankAccountStateEnum(Enum):
     enabled = 0
     disabled = 1
@@ -42,7 +46,6 @@ class BankAccountTableModel:
     owner_id: UUID
     is_overdraft_protected: bool
     state: BankAccountStateEnum
-    transactions: List['BankTransactionEntity']
     balance: float
     version: int
 
@@ -91,7 +94,35 @@ class BankDomainAggregate(Aggregate):
             bank_transactions=[]
         )
 
+    # Re-walks every transaction on each apply when enabled, see verify_account_balance
+    integrity_check_enabled = BANK_BALANCE_INTEGRITY_CHECK
+
+    def __post_init__(self):
+        self._running_balance = 0
+        self._method_subtotals: Dict[str, float] = {method.name: 0 for method in BankTransactionMethodEnum}
+
+        for transaction in self.bank_transactions:
+            self._update_running_balance(transaction=transaction)
+
+        # Positions into bank_transactions, built on first lookup. Keys are strings so snapshots stay encodable
+        self._transaction_id_index: Optional[Dict[str, int]] = None
+        self._item_id_index: Optional[Dict[str, List[int]]] = None
+        self._day_index: Optional[Dict[str, List[int]]] = None
+
+    @property
+    def method_subtotals(self) -> Dict[BankTransactionMethodEnum, float]:
+        return {
+            BankTransactionMethodEnum[method_name]: subtotal
+            for method_name, subtotal in self._method_subtotals.items()
+        }
+
     def calculate_account_balance(self):
+        """
+        Recomputes the balance from the full transaction history, O(n).
+
+        The running balance is maintained incrementally by _apply_transaction_to_account,
+        this is only used to verify it.
+        """
         _balance = 0
         for transaction in self.bank_transactions:
             if transaction.method == BankTransactionMethodEnum.add:
@@ -102,32 +133,145 @@ class BankDomainAggregate(Aggregate):
 
         return _balance
 
+    def verify_account_balance(self):
+        expected_balance = self.calculate_account_balance()
+        if expected_balance != self._running_balance:
+            raise BankDomainIntegrityError(
+                f"Balance Mismatch for AccountID='{self.bank_account.id}', "
+                f"Expected='{expected_balance}' Got='{self._running_balance}'"
+            )
+
+    def _update_running_balance(self, transaction: BankTransactionEntity):
+        if transaction.method == BankTransactionMethodEnum.add:
+            self._running_balance += transaction.value
+
+        if transaction.method == BankTransactionMethodEnum.subtract:
+            self._running_balance -= transaction.value
+
+        self._method_subtotals[transaction.method.name] += transaction.value
+
     def _apply_transaction_to_account(self, transaction: BankTransactionEntity):
 
         if transaction.account_id != self.bank_account.id:
             raise ValueError(f"Invalid AccountID='{transaction.account_id}' for Transaction='{transaction.id}'")
 
         self.bank_transactions.append(transaction)
+        self._update_running_balance(transaction=transaction)
+
+        if self._has_transaction_indexes():
+            self._index_transaction(position=len(self.bank_transactions) - 1, transaction=transaction)
+
+        if self.integrity_check_enabled:
+            self.verify_account_balance()
+
+        self.bank_account.balance = self._running_balance
+
+    def _has_transaction_indexes(self) -> bool:
+        return getattr(self, "_transaction_id_index", None) is not None
+
+    def _build_transaction_indexes(self):
+        self._transaction_id_index = {}
+        self._item_id_index = {}
+        self._day_index = {}
+
+        for position, transaction in enumerate(self.bank_transactions):
+            self._index_transaction(position=position, transaction=transaction)
+
+    def _index_transaction(self, position: int, transaction: BankTransactionEntity):
+        self._transaction_id_index[str(transaction.id)] = position
+        self._item_id_index.setdefault(str(transaction.item_id), []).append(position)
+        self._day_index.setdefault(transaction.created.date().isoformat(), []).append(position)
+
+    def _get_transaction_indexes(self):
+        if not self._has_transaction_indexes():
+            self._build_transaction_indexes()
+
+        return self._transaction_id_index, self._item_id_index, self._day_index
+
+    def get_unsaved_transactions(self, domain_events: List[Aggregate.Event] = None) -> List[BankTransactionEntity]:
+        """
+        Returns the transactions applied by pending events, i.e. those not yet saved.
+
+        :param domain_events: the latest events applied to the aggregate, defaults to the pending events
+        :return:
+        """
+        return [transaction for _, transaction in self.get_unsaved_transaction_records(domain_events=domain_events)]
+
+    def get_unsaved_transaction_records(
+            self,
+            domain_events: List[Aggregate.Event] = None
+    ) -> List[Tuple[UUID, BankTransactionEntity]]:
+        """
+        Returns the transactions applied by pending events with the id of their transaction table record.
+
+        The record id is derived from the event that applied the transaction, so saving the same events again
+        writes the same records.
+
+        :param domain_events: the latest events applied to the aggregate, defaults to the pending events
+        :return: (record id, transaction) pairs
+        """
+        record_ids = []
+        for pending_event in self.pending_events if domain_events is None else domain_events:
+            if isinstance(pending_event, (self.ApplyTransactionToAccount, self.NewTransaction)):
+                transaction_count = 1
+            elif isinstance(pending_event, self.ApplyTransactionsToAccount):
+                transaction_count = len(pending_event.transactions)
+            else:
+                continue
+
+            record_ids.extend(
+                uuid5(self.id, f"{pending_event.originator_version}:{index}") for index in range(transaction_count)
+            )
 
-        self.bank_account.balance = self.calculate_account_balance()
+        if not record_ids:
+            return []
+
+        return list(zip(record_ids, self.bank_transactions[len(self.bank_transactions) - len(record_ids):]))
+
+    @staticmethod
+    def _build_transaction_value_object(transaction: BankTransactionEntity) -> BankTransactionValueObject:
+        return BankTransactionValueObject(
+            method=transaction.method,
+            account_id=transaction.account_id,
+            created=transaction.created,
+            item_id=transaction.item_id,
+            value=transaction.value
+        )
 
     def get_transaction_by_id(self, transaction_id: UUID) -> BankTransactionValueObject:
-        for transaction in self.bank_transactions:
-            if transaction_id == transaction.id:
-                return BankTransactionValueObject(
-                    method=transaction.method,
-                    account_id=transaction.account_id,
-                    created=transaction.created,
-                    item_id=transaction.item_id,
-                    value=transaction.value
-                )
+        transaction_id_index, _, _ = self._get_transaction_indexes()
+
+        position = transaction_id_index.get(str(transaction_id))
+        if position is None:
+            raise ValueError(f'Invalid TransactionID="{transaction_id}"')
+
+        return self._build_transaction_value_object(transaction=self.bank_transactions[position])
+
+    def get_transactions_by_item_id(self, item_id: UUID) -> List[BankTransactionValueObject]:
+        _, item_id_index, _ = self._get_transaction_indexes()
+
+        return [
+            self._build_transaction_value_object(transaction=self.bank_transactions[position])
+            for position in item_id_index.get(str(item_id), [])
+        ]
+
+    def get_transactions_by_day(self, day: date) -> List[BankTransactionValueObject]:
+        _, _, day_index = self._get_transaction_indexes()
 
-        raise ValueError(f'Invalid TransactionID="{transaction_id}"')
+        return [
+            self._build_transaction_value_object(transaction=self.bank_transactions[position])
+            for position in day_index.get(day.isoformat(), [])
+        ]
 
     @event
     def apply_transaction_to_account(self, transaction: BankTransactionEntity):
         self._apply_transaction_to_account(transaction=transaction)
 
+    @event
+    def apply_transactions_to_account(self, transactions: List[BankTransactionEntity]):
+        for transaction in transactions:
+            self._apply_transaction_to_account(transaction=transaction)
+
     @event
     def new_transaction(
             self,
@@ -185,10 +329,10 @@ class BankDomainFactory:
         """
         return BankAccountEntity(
             is_overdraft_protected=is_overdraft_protected,
-            owner_id=UUID(owner_id),
+            owner_id=decode_uuid(owner_id),
             state=BankAccountStateEnum(state),
             balance=balance,
-            id=UUID(owner_id)
+            id=decode_uuid(owner_id)
         )
 
     @staticmethod
@@ -260,53 +404,126 @@ class BankDomainFactory:
 
 
 class BankDomainWriteModel:
-    def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_username=MONGO_DB_USERNAME,
-            db_password=MONGO_DB_PASSWORD
-        )
+    def __init__(self, buffer_size: int = 0):
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
+        self.account_writer = ProjectionWriter(
+            collection=get_collection(database=self.db, collection=BANK_ACCOUNT_TABLE),
+            buffer_size=buffer_size
+        )
+        self.delta_builders = {
+            BankDomainAggregate.ApplyTransactionToAccount: self._build_balance_delta,
+            BankDomainAggregate.ApplyTransactionsToAccount: self._build_balance_delta,
+            BankDomainAggregate.NewTransaction: self._build_balance_delta,
+            BankDomainAggregate.DisableAccount: self._build_state_delta,
+            BankDomainAggregate.EnableAccount: self._build_state_delta,
+        }
+        self._transaction_indexes_created = False
+
+    def _create_transaction_indexes(self):
+        ensure_indexes(database=self.db, indexes=BankDomainQueryModel.indexes)
+        self._transaction_indexes_created = True
+
+    def save_bank_transactions(self, records: List[Tuple[UUID, BankTransactionEntity]]):
+        """
+        Writes transactions to the transaction table, a record saved again is replaced.
 
-    def save_bank_aggregate(self, aggregate: BankDomainAggregate) -> UUID:
-        collection = get_collection(database=self.db, collection=BANK_ACCOUNT_TABLE)
+        :param records: (record id, transaction) pairs, see BankDomainAggregate.get_unsaved_transaction_records
+        :return:
+        """
+        if not records:
+            return
 
-        item_data = serialize_object_to_dict(o=aggregate)
+        collection = get_collection(database=self.db, collection=BANK_TRANSACTION_TABLE)
+        if not self._transaction_indexes_created:
+            self._create_transaction_indexes()
 
-        _record_id = Binary.from_uuid(aggregate.id, uuid_representation=UuidRepresentation.STANDARD)
-        item_data['_id'] = _record_id
+        requests = []
+        for record_id, transaction in records:
+            _record_id = Binary.from_uuid(record_id, uuid_representation=UuidRepresentation.STANDARD)
+            item_data = encode_value(transaction)
+            item_data['_id'] = _record_id
+            requests.append(ReplaceOne({"_id": _record_id}, item_data, upsert=True))
 
-        try:
+        collection.bulk_write(requests=requests, ordered=False)
 
-            add_item(collection=collection, item=item_data)
-            return aggregate.id
+    def save_bank_aggregate(self, aggregate: BankDomainAggregate, domain_events: List[Aggregate.Event] = None) -> UUID:
+        """
+        Saves the account document and appends the aggregate's unsaved transactions to the transaction table.
 
-        except DuplicateKeyError:
-            update_item(
-                collection=collection,
-                item_id=_record_id,
-                new_values=item_data
+        The account document only holds the account state, balance and version, so its size does not grow
+        with the transaction history.
+
+        :param aggregate:
+        :param domain_events: events not yet projected, defaults to the pending events of the aggregate
+        :return:
+        """
+        self.save_bank_transactions(records=aggregate.get_unsaved_transaction_records(domain_events=domain_events))
+
+        self.account_writer.save_aggregate(
+            record_id=Binary.from_uuid(aggregate.id, uuid_representation=UuidRepresentation.STANDARD),
+            aggregate=aggregate,
+            build_document=lambda: self._build_bank_account_document(aggregate=aggregate),
+            delta_builders=self.delta_builders,
+            # Drops the transaction history from documents written before it moved to BANK_TRANSACTION_TABLE
+            unset=["bank_account", "bank_transactions"],
+            domain_events=domain_events
+        )
+
+        return aggregate.id
+
+    @staticmethod
+    def _build_bank_account_document(aggregate: BankDomainAggregate) -> dict:
+        return encode_value(
+            BankAccountTableModel(
+                id=aggregate.id,
+                owner_id=aggregate.bank_account.owner_id,
+                is_overdraft_protected=aggregate.bank_account.is_overdraft_protected,
+                state=aggregate.bank_account.state,
+                balance=aggregate.bank_account.balance,
+                version=aggregate.version
             )
+        )
 
-            return aggregate.id
+    @staticmethod
+    def _build_balance_delta(
+            aggregate: BankDomainAggregate,
+            domain_event: BankDomainAggregate.Event
+    ) -> ProjectionDelta:
+        return ProjectionDelta(set={"balance": aggregate.bank_account.balance})
+
+    @staticmethod
+    def _build_state_delta(aggregate: BankDomainAggregate, domain_event: BankDomainAggregate.Event) -> ProjectionDelta:
+        return ProjectionDelta(set={"state": encode_value(aggregate.bank_account.state)})
+
+    def flush(self):
+        self.account_writer.flush()
 
 
 class BankDomainQueryModel:
+    indexes = [
+        make_index(BANK_TRANSACTION_TABLE, "account_id", "created")
+    ]
+    queries = [
+        QueryDeclaration(collection=BANK_ACCOUNT_TABLE, query={"_id": None}),
+        QueryDeclaration(
+            collection=BANK_TRANSACTION_TABLE,
+            query={"account_id": match_uuid(UUID(int=0))},
+            sort=(("created", ASCENDING),)
+        ),
+    ]
 
     def __init__(self):
-        self.client = get_client(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT
-        )
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
 
     def get_bank_account_by_id(self, account_id: UUID) -> dict:
         collection = get_collection(database=self.db, collection=BANK_ACCOUNT_TABLE)
 
-        cursor = list(get_item(collection=collection, item_id=account_id, item_key="id"))
+        _record_id = Binary.from_uuid(account_id, uuid_representation=UuidRepresentation.STANDARD)
+        cursor = list(get_item(collection=collection, item_id=_record_id))
 
         if len(cursor) != 1:
             # TODO: Add Exception
@@ -314,6 +531,16 @@ class BankDomainQueryModel:
 
         return cursor[0]
 
+    def get_bank_transactions_by_account_id(self, account_id: UUID) -> List[dict]:
+        collection = get_collection(database=self.db, collection=BANK_TRANSACTION_TABLE)
+
+        return list(
+            query_items(
+                collection=collection,
+                query={"account_id": match_uuid(account_id)}
+            ).sort("created", ASCENDING)
+        )
+
 
 class BankDomainRepository:
 
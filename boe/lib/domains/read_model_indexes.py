@@ -0,0 +1,32 @@
+from typing import List
+
+from boe.env import APP_DB
+from boe.lib.domains.bank_domain import BankDomainQueryModel
+from boe.lib.domains.store_domain import StoreDomainQueryModel
+from boe.lib.domains.task_domain import TaskDomainQueryModel
+from boe.lib.domains.user_domain import UserDomainQueryModel
+from boe.lib.mongo_client_registry import get_mongo_client
+from boe.lib.mongo_indexes import IndexDeclaration, QueryDeclaration, ensure_indexes
+from cbaxter1988_utils.pymongo_utils import get_database
+
+QUERY_MODELS = [
+    BankDomainQueryModel,
+    StoreDomainQueryModel,
+    TaskDomainQueryModel,
+    UserDomainQueryModel
+]
+
+
+def get_read_model_indexes() -> List[IndexDeclaration]:
+    return [index for query_model in QUERY_MODELS for index in query_model.indexes]
+
+
+def get_read_model_queries() -> List[QueryDeclaration]:
+    return [query for query_model in QUERY_MODELS for query in query_model.queries]
+
+
+def set_up_read_model_indexes() -> List[str]:
+    return ensure_indexes(
+        database=get_database(client=get_mongo_client(), db_name=APP_DB),
+        indexes=get_read_model_indexes()
+    )
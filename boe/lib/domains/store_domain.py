@@ -2,21 +2,19 @@ from dataclasses import dataclass
 from typing import Dict, List
 from uuid import UUID, uuid4
 
-from boe.env import MONGO_HOST, MONGO_PORT, APP_DB, STORE_TABLE
+from boe.env import APP_DB, STORE_TABLE
 from boe.lib.common_models import Entity
-from boe.secrets import MONGO_DB_USERNAME, MONGO_DB_PASSWORD
-from boe.utils.serialization_utils import serialize_object_to_dict
+from boe.lib.mongo_client_registry import get_mongo_client
+from boe.lib.mongo_indexes import QueryDeclaration
+from boe.lib.projection_writer import ProjectionDelta, ProjectionWriter
+from boe.utils.bson_utils import decode_uuid, encode_value
 from bson.binary import Binary, UuidRepresentation
 from cbaxter1988_utils.pymongo_utils import (
-    add_item,
-    update_item,
-    get_mongo_client_w_auth,
     get_database,
     get_collection,
     get_item
 )
 from eventsourcing.domain import Aggregate, event
-from pymongo.errors import DuplicateKeyError
 
 
 @dataclass(frozen=True)
@@ -77,28 +75,51 @@ class StoreAggregate(Aggregate):
 
 class StoreDomainWriteModel:
 
-    def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_username=MONGO_DB_USERNAME,
-            db_password=MONGO_DB_PASSWORD
-        )
+    def __init__(self, buffer_size: int = 0):
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
+        self.store_writer = ProjectionWriter(
+            collection=get_collection(database=self.db, collection=STORE_TABLE),
+            buffer_size=buffer_size
+        )
+        self.delta_builders = {
+            StoreAggregate.NewStoreItem: self._build_new_store_item_delta,
+            StoreAggregate.RemoveStoreItem: self._build_remove_store_item_delta,
+        }
+
+    @staticmethod
+    def _build_new_store_item_delta(aggregate: StoreAggregate, domain_event: StoreAggregate.Event) -> ProjectionDelta:
+        item_id = str(domain_event.store_item.id)
+        return ProjectionDelta(
+            set={f"store_item_map.{item_id}": encode_value(aggregate.store_item_map[item_id])}
+        )
 
-    def save_store_aggregate(self, aggregate: StoreAggregate):
-        collection = get_collection(database=self.db, collection=STORE_TABLE)
+    @staticmethod
+    def _build_remove_store_item_delta(
+            aggregate: StoreAggregate,
+            domain_event: StoreAggregate.Event
+    ) -> ProjectionDelta:
+        return ProjectionDelta(unset=[f"store_item_map.{domain_event.item_id}"])
 
-        serialized_data = serialize_object_to_dict(o=aggregate)
+    def save_store_aggregate(self, aggregate: StoreAggregate, domain_events: List[StoreAggregate.Event] = None):
         _record_id = Binary.from_uuid(aggregate.id, uuid_representation=UuidRepresentation.STANDARD)
 
-        serialized_data['_id'] = _record_id
+        def build_document():
+            serialized_data = encode_value(aggregate)
+            serialized_data['_id'] = _record_id
+            return serialized_data
+
+        self.store_writer.save_aggregate(
+            record_id=_record_id,
+            aggregate=aggregate,
+            build_document=build_document,
+            delta_builders=self.delta_builders,
+            domain_events=domain_events
+        )
 
-        try:
-            add_item(collection=collection, item=serialized_data)
-        except DuplicateKeyError:
-            update_item(collection=collection, item_id=_record_id, new_values=serialized_data)
+    def flush(self):
+        self.store_writer.flush()
 
 
 class StoreDomainFactory:
@@ -133,6 +154,11 @@ class StoreDomainFactory:
 
 
 class StoreDomainQueryModel:
+    indexes = []
+    queries = [
+        QueryDeclaration(collection=STORE_TABLE, query={"_id": None}),
+    ]
+
     @dataclass(frozen=True)
     class StoreItemModel:
         item_id: UUID
@@ -146,12 +172,7 @@ class StoreDomainQueryModel:
         store_items: List
 
     def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_username=MONGO_DB_USERNAME,
-            db_password=MONGO_DB_PASSWORD
-        )
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
 
@@ -162,7 +183,7 @@ class StoreDomainQueryModel:
                 store_id=record['_id'],
                 store_items=[
                     self.StoreItemModel(
-                        item_id=UUID(item['id']),
+                        item_id=decode_uuid(item['id']),
                         description=item['description'],
                         name=item['name'],
                         value=item['value'],
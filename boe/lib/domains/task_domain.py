@@ -2,28 +2,25 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from functools import singledispatchmethod
+from typing import List, Optional
 from uuid import UUID, uuid4
 
 from boe.env import (
-    MONGO_HOST,
-    MONGO_PORT,
 
     APP_DB,
     TASK_TABLE
 )
+from boe.lib.blob_store import BlobRef
 from boe.lib.common_models import Entity
-from boe.secrets import MONGO_DB_PASSWORD, MONGO_DB_USERNAME
-from boe.utils.serialization_utils import serialize_object_to_dict
+from boe.lib.mongo_client_registry import get_mongo_client
+from boe.lib.mongo_indexes import QueryDeclaration, make_index
+from boe.lib.projection_writer import ProjectionDelta, ProjectionWriter
+from boe.utils.bson_utils import decode_document, encode_value, match_uuid
 from cbaxter1988_utils.pymongo_utils import (
-    get_mongo_client_w_auth,
     get_database,
-    add_item,
-    query_items,
-    update_item,
     get_collection
 )
 from eventsourcing.domain import Aggregate, event
-from pymongo.errors import DuplicateKeyError
 from cbaxter1988_utils.log_utils import get_logger
 
 logger = get_logger("TaskDomain")
@@ -47,6 +44,7 @@ class TaskEntity(Entity):
     is_validated: bool = False
     evidence_data: bytes = None
     created: datetime = datetime.now()
+    evidence: Optional[BlobRef] = None
 
 
 @dataclass
@@ -75,8 +73,14 @@ class TaskAggregate(Aggregate):
 
     @event
     def add_task_evidence(self, data: bytes):
+        # Evidence used to be stored inside the event, kept so the events already stored can be replayed
         self.task.evidence_data = data
 
+    @event
+    def attach_task_evidence(self, blob_hash: str, size: int, mime_type: str):
+        self.task.evidence = BlobRef(hash=blob_hash, size=size, mime_type=mime_type)
+        self.task.evidence_data = None
+
     @event
     def change_value(self, value: float):
         self.task.value = value
@@ -130,36 +134,68 @@ class TaskDomainFactory:
 
 
 class TaskDomainWriteModel:
-    def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_password=MONGO_DB_PASSWORD,
-            db_username=MONGO_DB_USERNAME
-        )
+    def __init__(self, buffer_size: int = 0):
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
+        self.task_writer = ProjectionWriter(
+            collection=get_collection(database=self.db, collection=TASK_TABLE),
+            buffer_size=buffer_size
+        )
+        self.delta_builders = {
+            TaskAggregate.MarkTaskComplete: self._make_task_field_delta_builder(field_name="status"),
+            TaskAggregate.AddTaskEvidence: self._make_task_field_delta_builder(field_name="evidence_data"),
+            TaskAggregate.AttachTaskEvidence: self._build_evidence_delta,
+            TaskAggregate.ChangeValue: self._make_task_field_delta_builder(field_name="value"),
+        }
+
+    @staticmethod
+    def _make_task_field_delta_builder(field_name: str):
+        def build_delta(aggregate: TaskAggregate, domain_event: TaskAggregate.Event) -> ProjectionDelta:
+            return ProjectionDelta(
+                set={f"task.{field_name}": encode_value(getattr(aggregate.task, field_name))}
+            )
+
+        return build_delta
+
+    @staticmethod
+    def _build_evidence_delta(aggregate: TaskAggregate, domain_event: TaskAggregate.Event) -> ProjectionDelta:
+        return ProjectionDelta(
+            set={"task.evidence": encode_value(aggregate.task.evidence)},
+            unset=["task.evidence_data"]
+        )
 
     @singledispatchmethod
-    def save_aggregate(self, aggregate):
+    def save_aggregate(self, aggregate, domain_events: List[Aggregate.Event] = None):
         raise TypeError(f"Invalid Type {type(aggregate)}")
 
     @save_aggregate.register(TaskAggregate)
-    def _(self, aggregate: TaskAggregate):
-        serialized_aggregate = serialize_object_to_dict(aggregate)
-
-        collection = get_collection(database=self.db, collection=TASK_TABLE)
-
-        serialized_aggregate['_id'] = aggregate.id
-        serialized_aggregate['version'] = aggregate.version
+    def _(self, aggregate: TaskAggregate, domain_events: List[TaskAggregate.Event] = None):
+        def build_document():
+            serialized_aggregate = encode_value(aggregate)
+            serialized_aggregate['_id'] = aggregate.id
+            return serialized_aggregate
+
+        self.task_writer.save_aggregate(
+            record_id=aggregate.id,
+            aggregate=aggregate,
+            build_document=build_document,
+            delta_builders=self.delta_builders,
+            domain_events=domain_events
+        )
 
-        try:
-            add_item(item=serialized_aggregate, collection=collection, key_id='_id')
-        except DuplicateKeyError:
-            update_item(new_values=serialized_aggregate, item_id=aggregate.id, collection=collection)
+    def flush(self):
+        self.task_writer.flush()
 
 
 class TaskDomainQueryModel:
+    indexes = [
+        make_index(TASK_TABLE, "task.owner_id")
+    ]
+    queries = [
+        QueryDeclaration(collection=TASK_TABLE, query={"task.owner_id": match_uuid(UUID(int=0))}),
+    ]
+
     @dataclass(frozen=True)
     class TaskModel:
         task_id: UUID
@@ -172,38 +208,39 @@ class TaskDomainQueryModel:
         name: str
         description: str
         evidence_required: bool
+        evidence: Optional[BlobRef] = None
 
     def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_password=MONGO_DB_PASSWORD,
-            db_username=MONGO_DB_USERNAME
-        )
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
 
     def get_tasks_by_owner_id(self, owner_id: UUID):
         collection = get_collection(database=self.db, collection=TASK_TABLE)
-        results = list(query_items(collection=collection, query={"task.owner_id": str(owner_id)}))
+        # Evidence stored inline by older events is never returned, the blob reference is
+        results = list(
+            collection.find(
+                {"task.owner_id": match_uuid(owner_id)},
+                {"task.evidence_data": False}
+            )
+        )
+
+        tasks = [(task_data['_id'], decode_document(TaskEntity, task_data['task'])) for task_data in results]
 
         return [
             self.TaskModel(
-                owner_id=task_data['task']["owner_id"],
-                created=datetime.fromisoformat(task_data['task']["created"]) if isinstance(task_data['task']["created"],
-                                                                                           str) else task_data['task'][
-                    "created"],
-                due_date=datetime.fromisoformat(task_data['task']["due_date"]) if isinstance(
-                    task_data['task']["due_date"],
-                    str) else task_data['task']["due_date"],
-                is_validated=task_data['task']["is_validated"],
-                status=TaskStatusEnum(task_data['task']["status"]),
-                task_id=task_data['_id'],
-                value=task_data['task']["value"],
-                name=task_data['task']["name"],
-                description=task_data['task']["description"],
-                evidence_required=task_data['task']["evidence_required"],
+                owner_id=task.owner_id,
+                created=task.created,
+                due_date=task.due_date,
+                is_validated=task.is_validated,
+                status=task.status,
+                task_id=task_id,
+                value=task.value,
+                name=task.name,
+                description=task.description,
+                evidence_required=task.evidence_required,
+                evidence=task.evidence,
             )
 
-            for task_data in results
+            for task_id, task in tasks
         ]
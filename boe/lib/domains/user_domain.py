@@ -6,24 +6,21 @@ from typing import List, Union
 from uuid import UUID, uuid4
 
 from boe.env import (
-    MONGO_HOST,
-    MONGO_PORT,
     APP_DB,
     FAMILY_TABLE,
     USER_ACCOUNT_TABLE,
     CREDENTIAL_STORE_TABLE
 )
 from boe.lib.common_models import Entity
-from boe.secrets import MONGO_DB_PASSWORD, MONGO_DB_USERNAME
-from boe.utils.serialization_utils import serialize_object_to_dict
+from boe.lib.mongo_client_registry import get_mongo_client
+from boe.lib.mongo_indexes import QueryDeclaration
+from boe.lib.projection_writer import ProjectionDelta, ProjectionWriter
+from boe.utils.bson_utils import decode_bytes, decode_uuid, encode_value
 from bson.binary import Binary, UuidRepresentation
 from cbaxter1988_utils.pymongo_utils import (
-    get_mongo_client_w_auth,
     get_database,
-    add_item,
     get_item,
     scan_items,
-    update_item,
     get_collection
 )
 from eventsourcing.domain import Aggregate, event
@@ -184,63 +181,124 @@ class FamilyAggregate(Aggregate):
 
 
 class UserDomainWriteModel:
-    def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_username=MONGO_DB_USERNAME,
-            db_password=MONGO_DB_PASSWORD
-        )
+    def __init__(self, buffer_size: int = 0):
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
+        self.family_writer = ProjectionWriter(
+            collection=get_collection(database=self.db, collection=FAMILY_TABLE),
+            buffer_size=buffer_size
+        )
+        self.user_account_writer = ProjectionWriter(
+            collection=get_collection(database=self.db, collection=USER_ACCOUNT_TABLE),
+            buffer_size=buffer_size
+        )
+        self.credential_writer = ProjectionWriter(
+            collection=get_collection(database=self.db, collection=CREDENTIAL_STORE_TABLE),
+            buffer_size=buffer_size
+        )
+        self.delta_builders = {
+            FamilyAggregate.AddFamilyMember: self._build_add_family_member_delta,
+            FamilyAggregate.ChangeFamilySubscription: self._build_family_subscription_delta,
+            UserAccountAggregate.UpdateLocalCredentialPassword: self._build_password_hash_delta,
+            UserAccountAggregate.UpdateLocalCredentialAccessToken: self._build_access_token_delta,
+        }
 
-    @singledispatchmethod
-    def save_aggregate(self, aggregate):
-        raise NotImplementedError
+    @staticmethod
+    def _build_add_family_member_delta(
+            aggregate: FamilyAggregate,
+            domain_event: FamilyAggregate.Event
+    ) -> ProjectionDelta:
+        return ProjectionDelta(push={"members": [encode_value(domain_event.user_aggregate_id)]})
 
-    @save_aggregate.register(FamilyAggregate)
-    def _(self, aggregate: FamilyAggregate):
-        serialized_aggregate = serialize_object_to_dict(aggregate)
+    @staticmethod
+    def _build_family_subscription_delta(
+            aggregate: FamilyAggregate,
+            domain_event: FamilyAggregate.Event
+    ) -> ProjectionDelta:
+        return ProjectionDelta(
+            set={"family.subscription_type": encode_value(aggregate.family.subscription_type)}
+        )
+
+    @staticmethod
+    def _build_password_hash_delta(
+            aggregate: UserAccountAggregate,
+            domain_event: UserAccountAggregate.Event
+    ) -> ProjectionDelta:
+        return ProjectionDelta(
+            set={"credential.password_hash": encode_value(aggregate.credential.password_hash)}
+        )
+
+    @staticmethod
+    def _build_access_token_delta(
+            aggregate: UserAccountAggregate,
+            domain_event: UserAccountAggregate.Event
+    ) -> ProjectionDelta:
+        return ProjectionDelta(
+            set={"credential.access_token": encode_value(aggregate.credential.access_token)}
+        )
 
-        family_collection = get_collection(database=self.db, collection=FAMILY_TABLE)
+    def _save_aggregate_projection(
+            self,
+            writer: ProjectionWriter,
+            aggregate: Aggregate,
+            domain_events: List[Aggregate.Event] = None
+    ):
         _record_id = Binary.from_uuid(aggregate.id, uuid_representation=UuidRepresentation.STANDARD)
-        serialized_aggregate['_id'] = _record_id
-        serialized_aggregate['version'] = aggregate.version
 
-        try:
-            add_item(item=serialized_aggregate, collection=family_collection, key_id='_id')
-        except DuplicateKeyError:
-            update_item(new_values=serialized_aggregate, item_id=_record_id, collection=family_collection)
+        def build_document():
+            serialized_aggregate = encode_value(aggregate)
+            serialized_aggregate['_id'] = _record_id
+            return serialized_aggregate
+
+        writer.save_aggregate(
+            record_id=_record_id,
+            aggregate=aggregate,
+            build_document=build_document,
+            delta_builders=self.delta_builders,
+            domain_events=domain_events
+        )
 
-    @save_aggregate.register(UserAccountAggregate)
-    def _(self, aggregate: FamilyAggregate):
-        serialized_aggregate = serialize_object_to_dict(aggregate)
+    @singledispatchmethod
+    def save_aggregate(self, aggregate, domain_events: List[Aggregate.Event] = None):
+        raise NotImplementedError
 
-        collection = get_collection(database=self.db, collection=USER_ACCOUNT_TABLE)
-        _record_id = Binary.from_uuid(aggregate.id, uuid_representation=UuidRepresentation.STANDARD)
-        serialized_aggregate['_id'] = _record_id
-        serialized_aggregate['version'] = aggregate.version
+    @save_aggregate.register(FamilyAggregate)
+    def _(self, aggregate: FamilyAggregate, domain_events: List[FamilyAggregate.Event] = None):
+        self._save_aggregate_projection(writer=self.family_writer, aggregate=aggregate, domain_events=domain_events)
 
-        try:
-            add_item(item=serialized_aggregate, collection=collection, key_id='_id')
-        except DuplicateKeyError:
-            update_item(new_values=serialized_aggregate, item_id=_record_id, collection=collection)
+    @save_aggregate.register(UserAccountAggregate)
+    def _(self, aggregate: FamilyAggregate, domain_events: List[UserAccountAggregate.Event] = None):
+        self._save_aggregate_projection(
+            writer=self.user_account_writer,
+            aggregate=aggregate,
+            domain_events=domain_events
+        )
 
     def save_local_credential(self, username: str, password_hash: bytes, user_id: UUID):
-        serialized_cred = serialize_object_to_dict({
+        serialized_cred = encode_value({
             "_id": username,
             "password_hash": password_hash,
             "user_id": user_id
         })
 
-        collection = get_collection(database=self.db, collection=CREDENTIAL_STORE_TABLE)
-        try:
-            add_item(item=serialized_cred, collection=collection, key_id='_id')
-        except DuplicateKeyError:
-            update_item(new_values=serialized_cred, item_id=username, collection=collection)
+        self.credential_writer.upsert(record_id=username, document=serialized_cred)
+
+    def flush(self):
+        self.family_writer.flush()
+        self.user_account_writer.flush()
+        self.credential_writer.flush()
 
 
 class UserDomainQueryModel:
+    # The credential store is keyed by username, every query here is served by the _id index
+    indexes = []
+    queries = [
+        QueryDeclaration(collection=FAMILY_TABLE, query={"_id": None}),
+        QueryDeclaration(collection=USER_ACCOUNT_TABLE, query={"_id": None}),
+        QueryDeclaration(collection=CREDENTIAL_STORE_TABLE, query={"_id": None}),
+    ]
+
     @dataclass(frozen=True)
     class LocalCredentialModel:
         username: str
@@ -275,12 +333,7 @@ class UserDomainQueryModel:
         version: int
 
     def __init__(self):
-        self.client = get_mongo_client_w_auth(
-            db_host=MONGO_HOST,
-            db_port=MONGO_PORT,
-            db_username=MONGO_DB_USERNAME,
-            db_password=MONGO_DB_PASSWORD
-        )
+        self.client = get_mongo_client()
 
         self.db = get_database(client=self.client, db_name=APP_DB)
 
@@ -300,7 +353,7 @@ class UserDomainQueryModel:
                 _id=record['_id'],
                 family_name=record['family']['name'],
                 subscription_type=SubscriptionTypeEnum(record['family']['subscription_type']),
-                members=[UUID(member) for member in record['members']],
+                members=[decode_uuid(member) for member in record['members']],
                 version=record['version']
             )
 
@@ -311,7 +364,6 @@ class UserDomainQueryModel:
         if len(cursor) > 1:
             # TODO: Add Exception
             raise DuplicateKeyError(f"To Many Results Returned for {user_aggregate_id}")
-        cursor = list(get_item(collection=collection, item_id=user_aggregate_id, item_key="_id"))
 
         if len(cursor) == 1:
             record = cursor[0]
@@ -322,7 +374,7 @@ class UserDomainQueryModel:
                 last_name=record['user_entity']['last_name'],
                 first_name=record['user_entity']['first_name'],
                 email=record['user_entity']['email'],
-                family_id=UUID(record['user_entity']['family_id']),
+                family_id=decode_uuid(record['user_entity']['family_id']),
                 version=record['version'],
                 username=record['credential']['username']
             )
@@ -345,8 +397,8 @@ class UserDomainQueryModel:
 
             return self.LocalCredentialModel(
                 username=record['credential']['username'],
-                password_hash=record['credential'].get("password_hash", '').encode(),
-                user_id=UUID(record['credential'].get("user_id", ''))
+                password_hash=decode_bytes(record['credential'].get("password_hash", '')),
+                user_id=decode_uuid(record['credential'].get("user_id", ''))
             )
 
     def get_local_credential_by_username(self, username: str):
@@ -358,7 +410,7 @@ class UserDomainQueryModel:
             return self.LocalCredentialModel(
                 username=cursor[0].get("_id"),
                 password_hash=bytes.fromhex(cursor[0].get("password_hash")),
-                user_id=UUID(cursor[0].get("user_id")),
+                user_id=decode_uuid(cursor[0].get("user_id")),
             )
 
 
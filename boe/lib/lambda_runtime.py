@@ -0,0 +1,86 @@
+"""
+Runs a Worker as an AWS Lambda function consuming batches of an SQS queue.
+
+Each record carries an event envelope, as published to the worker queues, and is handled by Worker.handle_message
+like a message consumed from RabbitMQ. The function is configured with ReportBatchItemFailures, the records
+returned in batchItemFailures are retried, or dead lettered by the redrive policy of the queue, and the others are
+deleted.
+"""
+import base64
+from typing import List, Optional, Set, Tuple
+
+from boe.lib.worker_runtime import Worker
+from boe.utils.serialization_utils import JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE
+from cbaxter1988_utils.log_utils import get_logger
+from pika.spec import BasicProperties
+
+logger = get_logger("LambdaRuntime")
+
+# Message attribute holding the content type of the envelope, JSON when missing
+CONTENT_TYPE_ATTRIBUTE = "content_type"
+
+
+def get_record_message(record: dict) -> Tuple[BasicProperties, bytes]:
+    """
+    Returns the properties and body of an SQS record, as the worker reads them from an AMQP message.
+
+    SQS bodies are text, msgpack envelopes are sent base64 encoded.
+
+    :param record:
+    :return:
+    """
+    attribute = record.get("messageAttributes", {}).get(CONTENT_TYPE_ATTRIBUTE)
+    content_type = attribute["stringValue"] if attribute else JSON_CONTENT_TYPE
+
+    if content_type == MSGPACK_CONTENT_TYPE:
+        return BasicProperties(content_type=content_type), base64.b64decode(record["body"])
+
+    return BasicProperties(content_type=content_type), record["body"].encode()
+
+
+def is_fifo_record(record: dict) -> bool:
+    return record.get("eventSourceARN", "").endswith(".fifo")
+
+
+def handle_batch_event(worker: Worker, event: dict) -> dict:
+    """
+    Handles the records of an SQS batch event, returning the partial batch response.
+
+    A record failing to be handled fails the records after it with the same ordering key, without handling them,
+    so the events of an aggregate are retried in order. From a FIFO queue every record after a failure is failed,
+    as Lambda expects.
+
+    :param worker:
+    :param event:
+    :return: {"batchItemFailures": [{"itemIdentifier": message_id}, ...]}
+    """
+    records = event.get("Records", [])
+    failed_ids: List[str] = []
+    failed_keys: Set[str] = set()
+
+    for index, record in enumerate(records):
+        message_id = record["messageId"]
+        ordering_key: Optional[str] = None
+        try:
+            properties, body = get_record_message(record=record)
+            ordering_key = worker.get_ordering_key(properties, body)
+            if ordering_key is not None and ordering_key in failed_keys:
+                logger.warning(f"Retrying messageId={message_id} after a failed event of {ordering_key}")
+                failed_ids.append(message_id)
+                continue
+
+            worker.handle_message(properties=properties, body=body)
+        except Exception as err:
+            logger.error(f"DLQ: messageId={message_id} -- Exception={err!r}")
+            failed_ids.append(message_id)
+            worker.handle_failure(error=err)
+            if ordering_key is not None:
+                failed_keys.add(ordering_key)
+
+            if is_fifo_record(record=record):
+                failed_ids.extend(later_record["messageId"] for later_record in records[index + 1:])
+                break
+
+    logger.info(f"Processed batch of {len(records)} records, {len(failed_ids)} failed")
+
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_ids]}
@@ -0,0 +1,172 @@
+from threading import Lock, local
+from time import perf_counter
+from typing import Dict, Tuple
+
+from boe.env import (
+    MONGO_HOST,
+    MONGO_PORT,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE
+)
+from boe.secrets import get_mongo_db_credentials
+from pymongo import MongoClient
+from pymongo.monitoring import (
+    ConnectionPoolListener,
+    ConnectionCheckOutStartedEvent,
+    ConnectionCheckedOutEvent,
+    ConnectionCheckOutFailedEvent,
+    ConnectionCreatedEvent
+)
+
+
+class MongoPoolMonitor(ConnectionPoolListener):
+    """
+    Counts connection pool checkouts and the time spent waiting on them.
+
+    A checkout is started and finished on the same thread, so the start time is kept thread local.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.connections_created = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+        self._lock = Lock()
+        self._local = local()
+
+    def get_stats(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "connections_created": self.connections_created,
+            "avg_wait_ms": self.total_wait_seconds / self.checkouts * 1000 if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000
+        }
+
+    def _finish_checkout(self) -> float:
+        started = getattr(self._local, "checkout_started", None)
+        self._local.checkout_started = None
+        return perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event: ConnectionCheckOutStartedEvent):
+        self._local.checkout_started = perf_counter()
+
+    def connection_checked_out(self, event: ConnectionCheckedOutEvent):
+        wait_seconds = self._finish_checkout()
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def connection_check_out_failed(self, event: ConnectionCheckOutFailedEvent):
+        self._finish_checkout()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_created(self, event: ConnectionCreatedEvent):
+        with self._lock:
+            self.connections_created += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+pool_monitor = MongoPoolMonitor()
+
+_clients: Dict[Tuple[str, int, str], MongoClient] = {}
+_clients_lock = Lock()
+
+
+def _make_mongo_client(db_host: str, db_port: int, db_username: str, db_password: str) -> MongoClient:
+    timeouts = {
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    }
+
+    return MongoClient(
+        host=db_host,
+        port=db_port,
+        username=db_username,
+        password=db_password,
+        uuidRepresentation='standard',
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        readPreference=MONGO_READ_PREFERENCE,
+        event_listeners=[pool_monitor],
+        **{option: value for option, value in timeouts.items() if value > 0}
+    )
+
+
+def get_mongo_client(
+        db_host: str = MONGO_HOST,
+        db_port: int = MONGO_PORT,
+        db_username: str = None,
+        db_password: str = None
+) -> MongoClient:
+    """
+    Returns the process-wide MongoClient for the host and user, creating it on first use.
+
+    MongoClient is thread safe and owns a connection pool, so the write and query models share one client
+    instead of opening a pool each.
+
+    :param db_host:
+    :param db_port:
+    :param db_username: defaults to the MongoDB credentials of boe.secrets, with db_password
+    :param db_password:
+    :return:
+    """
+    if db_username is None:
+        db_username, db_password = get_mongo_db_credentials()
+
+    key = (db_host, int(db_port), db_username)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = _make_mongo_client(
+                db_host=db_host,
+                db_port=int(db_port),
+                db_username=db_username,
+                db_password=db_password
+            )
+
+        return _clients[key]
+
+
+def close_mongo_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+
+        _clients.clear()
+
+
+def get_mongo_pool_stats() -> dict:
+    return dict(pool_monitor.get_stats(), clients=len(_clients))
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING
+from pymongo.database import Database
+
+
+@dataclass(frozen=True)
+class IndexDeclaration:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+
+@dataclass(frozen=True)
+class QueryDeclaration:
+    """Shape of a query a query model runs, used to check it is served by an index"""
+    collection: str
+    query: dict
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+
+
+def make_index(collection: str, *keys: str, unique: bool = False) -> IndexDeclaration:
+    return IndexDeclaration(collection=collection, keys=tuple((key, ASCENDING) for key in keys), unique=unique)
+
+
+def ensure_indexes(database: Database, indexes: Iterable[IndexDeclaration]) -> List[str]:
+    """
+    Creates the declared indexes, create_index is a no-op for an index which already exists.
+
+    :param database:
+    :param indexes:
+    :return: names of the indexes
+    """
+    return [
+        database[index.collection].create_index(list(index.keys), name=index.name, unique=index.unique)
+        for index in indexes
+    ]
+
+
+def is_query_indexed(query: QueryDeclaration, indexes: Iterable[IndexDeclaration]) -> bool:
+    """
+    Checks the query filters on _id or on a prefix of a declared index of its collection.
+
+    :param query:
+    :param indexes:
+    :return:
+    """
+    fields = list(query.query)
+    if fields and fields[0] == "_id":
+        return True
+
+    for index in indexes:
+        if index.collection != query.collection:
+            continue
+
+        index_fields = [key for key, _ in index.keys]
+        if fields and set(fields) == set(index_fields[:len(fields)]):
+            return True
+
+    return False
+
+
+def get_plan_stages(plan: dict) -> List[str]:
+    stages = [plan["stage"]] if "stage" in plan else []
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages.extend(get_plan_stages(plan[child_key]))
+
+    for child_plan in plan.get("inputStages", []):
+        stages.extend(get_plan_stages(child_plan))
+
+    return stages
+
+
+def find_collection_scans(database: Database, queries: Iterable[QueryDeclaration]) -> List[QueryDeclaration]:
+    """
+    Explains each query and returns those whose winning plan scans the collection.
+
+    :param database:
+    :param queries:
+    :return:
+    """
+    collection_scans = []
+    for query in queries:
+        cursor = database[query.collection].find(query.query)
+        if query.sort:
+            cursor = cursor.sort(list(query.sort))
+
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in get_plan_stages(plan=winning_plan):
+            collection_scans.append(query)
+
+    return collection_scans
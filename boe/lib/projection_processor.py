@@ -0,0 +1,91 @@
+from typing import Dict, List
+from uuid import UUID
+
+from boe.env import APP_DB, PROJECTION_BATCH_SIZE, PROJECTION_TRACKING_TABLE
+from boe.lib.mongo_client_registry import get_mongo_client
+from cbaxter1988_utils.log_utils import get_logger
+from cbaxter1988_utils.pymongo_utils import get_collection, get_database
+from eventsourcing.application import Application
+from eventsourcing.domain import DomainEvent
+from pymongo.collection import Collection
+
+logger = get_logger("ProjectionProcessor")
+
+
+def get_projection_tracking_collection() -> Collection:
+    return get_collection(
+        database=get_database(client=get_mongo_client(), db_name=APP_DB),
+        collection=PROJECTION_TRACKING_TABLE
+    )
+
+
+class ProjectionProcessor:
+    """
+    Follows the notification log of an application and saves the projections of the aggregates it touches.
+
+    The application must implement save_projection(aggregate, domain_events) and have a write_model with a
+    flush method. Notifications are read in batches, events are grouped by aggregate so each aggregate is
+    projected once per batch at the version of its last event, and the tracking position is persisted once the
+    write model has been flushed. A batch that fails is retried from the last persisted position, which is safe
+    because projection writes are version guarded.
+    """
+
+    def __init__(
+            self,
+            app: Application,
+            tracking_collection: Collection,
+            batch_size: int = PROJECTION_BATCH_SIZE
+    ):
+        self.app = app
+        self.tracking_collection = tracking_collection
+        self.batch_size = batch_size
+        self.name = type(app).__name__
+
+        self._position = None
+
+    @property
+    def position(self) -> int:
+        if self._position is None:
+            tracking = self.tracking_collection.find_one({"_id": self.name})
+            self._position = tracking["position"] if tracking else 0
+
+        return self._position
+
+    def _save_position(self, position: int):
+        self.tracking_collection.update_one({"_id": self.name}, {"$set": {"position": position}}, upsert=True)
+        self._position = position
+
+    def get_lag(self) -> int:
+        return self.app.recorder.max_notification_id() - self.position
+
+    def _group_events_by_aggregate(self, domain_events: List[DomainEvent]) -> Dict[UUID, List[DomainEvent]]:
+        grouped_events: Dict[UUID, List[DomainEvent]] = {}
+        for domain_event in domain_events:
+            grouped_events.setdefault(domain_event.originator_id, []).append(domain_event)
+
+        return grouped_events
+
+    def process_batch(self) -> int:
+        """
+        Projects the next batch of notifications.
+
+        :return: count of notifications processed
+        """
+        notifications = self.app.recorder.select_notifications(start=self.position + 1, limit=self.batch_size)
+        if not notifications:
+            return 0
+
+        domain_events = [self.app.mapper.to_domain_event(notification) for notification in notifications]
+
+        for aggregate_id, aggregate_events in self._group_events_by_aggregate(domain_events=domain_events).items():
+            aggregate = self.app.repository.get(
+                aggregate_id=aggregate_id,
+                version=aggregate_events[-1].originator_version
+            )
+            self.app.save_projection(aggregate=aggregate, domain_events=aggregate_events)
+
+        self.app.write_model.flush()
+        self._save_position(position=notifications[-1].id)
+
+        logger.debug(f'Projected {len(notifications)} Notifications for {self.name}, Position={self.position}')
+        return len(notifications)
@@ -0,0 +1,239 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from eventsourcing.domain import Aggregate
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+@dataclass
+class ProjectionDelta:
+    """Targeted update of a projection document, built from the pending events of an aggregate"""
+    set: Dict[str, Any] = field(default_factory=dict)
+    push: Dict[str, List[Any]] = field(default_factory=dict)
+    unset: List[str] = field(default_factory=list)
+
+    def merge(self, other: "ProjectionDelta"):
+        for path, value in other.set.items():
+            self._pop_path(path=path)
+            self.set[path] = value
+
+        for path, values in other.push.items():
+            if path in self.set:
+                self.set[path] = self.set[path] + values
+            else:
+                self.push.setdefault(path, []).extend(values)
+
+        for path in other.unset:
+            self._pop_path(path=path)
+            self.unset.append(path)
+
+    def _pop_path(self, path: str):
+        self.set.pop(path, None)
+        self.push.pop(path, None)
+        if path in self.unset:
+            self.unset.remove(path)
+
+    def to_update(self, version: int) -> dict:
+        update = {"$set": dict(self.set, version=version)}
+        if self.push:
+            update["$push"] = {path: {"$each": values} for path, values in self.push.items()}
+        if self.unset:
+            update["$unset"] = {path: "" for path in self.unset}
+
+        return update
+
+
+DeltaBuilder = Callable[[Aggregate, Aggregate.Event], ProjectionDelta]
+
+
+def build_projection_delta(
+        aggregate: Aggregate,
+        delta_builders: Dict[Type[Aggregate.Event], DeltaBuilder],
+        domain_events: Optional[List[Aggregate.Event]] = None
+) -> Optional[ProjectionDelta]:
+    """
+    Translates the latest events of the aggregate into one ProjectionDelta.
+
+    :param aggregate:
+    :param delta_builders: builds the delta of an event type from the aggregate state after all the events
+    :param domain_events: the latest events applied to the aggregate, defaults to its pending events
+    :return: None when there are no events or an event has no delta builder
+    """
+    domain_events = aggregate.pending_events if domain_events is None else domain_events
+    if not domain_events:
+        return None
+
+    delta = ProjectionDelta()
+    for domain_event in domain_events:
+        delta_builder = delta_builders.get(type(domain_event))
+        if delta_builder is None:
+            return None
+
+        delta.merge(delta_builder(aggregate, domain_event))
+
+    return delta
+
+
+class ProjectionWriter:
+    """
+    Writes projection documents to a collection with a single upsert per document.
+
+    When a version is given the upsert only matches a document holding the same or an older version (or none),
+    so a projection is never overwritten with an older version of the aggregate. The upsert of a stale version
+    fails on the unique _id index and is skipped. Writing the same version again overwrites the document, so a
+    projection written from a version that did not end up in the event store is repaired by the next write.
+
+    With a buffer_size > 0 writes are buffered and sent as one unordered bulk_write once the buffer is full
+    or flush is called, only the latest write per record is kept in the buffer.
+    """
+
+    def __init__(self, collection: Collection, buffer_size: int = 0):
+        self.collection = collection
+        self.buffer_size = buffer_size
+
+        self._buffer: Dict[Any, dict] = {}
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @staticmethod
+    def _make_filter(record_id: Any, version: Optional[int]) -> dict:
+        if version is None:
+            return {"_id": record_id}
+
+        return {
+            "_id": record_id,
+            "$or": [
+                {"version": {"$lte": version}},
+                {"version": {"$exists": False}}
+            ]
+        }
+
+    @staticmethod
+    def _make_update(document: dict, unset: Optional[List[str]]) -> dict:
+        update = {"$set": {key: value for key, value in document.items() if key != '_id'}}
+        if unset:
+            update["$unset"] = {field: "" for field in unset}
+
+        return update
+
+    def upsert(self, record_id: Any, document: dict, version: Optional[int] = None, unset: List[str] = None) -> bool:
+        """
+        Upserts document under record_id, buffering the write when buffer_size > 0.
+
+        :param record_id: _id of the projection document
+        :param document: fields to set on the projection document
+        :param version: version of the aggregate the document was built from
+        :param unset: fields to remove from the projection document
+        :return: False when the document was skipped because a newer version is already stored
+        """
+        if version is not None:
+            document = dict(document, version=version)
+
+        if self.buffer_size > 0:
+            buffered = self._buffer.get(record_id)
+            if buffered is None or version is None or buffered["version"] is None or buffered["version"] <= version:
+                self._buffer[record_id] = {"document": document, "version": version, "unset": unset}
+
+            if len(self._buffer) >= self.buffer_size:
+                self.flush()
+
+            return True
+
+        try:
+            self.collection.update_one(
+                self._make_filter(record_id=record_id, version=version),
+                self._make_update(document=document, unset=unset),
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The record exists with a newer version
+            return False
+
+        return True
+
+    def apply_delta(self, record_id: Any, delta: ProjectionDelta, from_version: int, version: int) -> bool:
+        """
+        Applies delta to the projection document, when it is stored at from_version.
+
+        Deltas are not buffered, a buffering writer always returns False.
+
+        :param record_id: _id of the projection document
+        :param delta:
+        :param from_version: version the projection document must be stored at
+        :param version: version of the aggregate after the delta
+        :return: False when the document is missing or not at from_version
+        """
+        if self.buffer_size > 0:
+            return False
+
+        result = self.collection.update_one(
+            {"_id": record_id, "version": from_version},
+            delta.to_update(version=version)
+        )
+
+        return result.matched_count == 1
+
+    def save_aggregate(
+            self,
+            record_id: Any,
+            aggregate: Aggregate,
+            build_document: Callable[[], dict],
+            delta_builders: Dict[Type[Aggregate.Event], DeltaBuilder],
+            unset: List[str] = None,
+            domain_events: Optional[List[Aggregate.Event]] = None
+    ) -> bool:
+        """
+        Writes the latest events of the aggregate as a delta, falling back to upserting the full document when
+        the events have no delta or the stored document is not at the version before them.
+
+        :param record_id: _id of the projection document
+        :param aggregate: aggregate at the version after domain_events
+        :param build_document: builds the full projection document
+        :param delta_builders: see build_projection_delta
+        :param unset: fields removed from the projection document on a full upsert
+        :param domain_events: the latest events applied to the aggregate, defaults to its pending events
+        :return: see upsert
+        """
+        domain_events = aggregate.pending_events if domain_events is None else domain_events
+        delta = build_projection_delta(aggregate=aggregate, delta_builders=delta_builders, domain_events=domain_events)
+        if delta is not None:
+            from_version = domain_events[0].originator_version - 1
+            if self.apply_delta(record_id=record_id, delta=delta, from_version=from_version, version=aggregate.version):
+                return True
+
+        return self.upsert(record_id=record_id, document=build_document(), version=aggregate.version, unset=unset)
+
+    def flush(self) -> int:
+        """
+        Sends the buffered writes as one bulk_write.
+
+        :return: count of documents written, stale versions are not counted
+        """
+        if not self._buffer:
+            return 0
+
+        requests = [
+            UpdateOne(
+                self._make_filter(record_id=record_id, version=write["version"]),
+                self._make_update(document=write["document"], unset=write["unset"]),
+                upsert=True
+            )
+            for record_id, write in self._buffer.items()
+        ]
+        self._buffer = {}
+
+        try:
+            result = self.collection.bulk_write(requests=requests, ordered=False)
+            return result.upserted_count + result.modified_count
+
+        except BulkWriteError as err:
+            write_errors = err.details.get('writeErrors', [])
+            if any(write_error.get('code') != DUPLICATE_KEY_ERROR_CODE for write_error in write_errors):
+                raise
+
+            return err.details.get('nUpserted', 0) + err.details.get('nModified', 0)
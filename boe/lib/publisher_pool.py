@@ -0,0 +1,214 @@
+import os
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from boe.env import (
+    AMQP_HOST,
+    AMQP_PORT,
+    PUBLISHER_POOL_SIZE,
+    PUBLISHER_HEARTBEAT_SECONDS,
+    PUBLISHER_MAX_IDLE_SECONDS
+)
+from boe.secrets import get_rabbitmq_credentials
+from cbaxter1988_utils.log_utils import get_logger
+from pika import BasicProperties, BlockingConnection, ConnectionParameters, PlainCredentials
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
+
+logger = get_logger("PublisherPool")
+
+# Errors of a pooled connection the broker dropped, the message is published again on a new connection
+PUBLISH_RETRY_ERRORS = (AMQPConnectionError, AMQPChannelError)
+
+
+class PublisherConnection:
+    """
+    A connection and its channel, used by one thread at a time.
+    """
+
+    def __init__(self, parameters: ConnectionParameters):
+        self.connection = BlockingConnection(parameters)
+        self.channel = self.connection.channel()
+        self.pid = os.getpid()
+        self.last_used = time.monotonic()
+
+    def is_usable(self, max_idle_seconds: float) -> bool:
+        return (
+                self.pid == os.getpid()
+                and self.channel.is_open
+                and time.monotonic() - self.last_used < max_idle_seconds
+        )
+
+    def close(self):
+        # The socket of a connection opened before a fork belongs to the parent, it is left for the parent to close
+        if self.pid != os.getpid() or not self.connection.is_open:
+            return
+
+        try:
+            self.connection.close()
+        except PUBLISH_RETRY_ERRORS as err:
+            logger.debug(f"Could not close publisher connection: {err!r}")
+
+
+class PublisherPool:
+    """
+    Publishes over long lived connections shared by the threads of the process.
+
+    BlockingConnection is not thread safe, so a thread borrows a connection and its channel for each publish and
+    returns it, up to max_idle_connections are kept open for the next publish. A publish on a connection the broker
+    dropped is retried once on a new connection.
+
+    Stands in for the cbaxter1988_utils PikaPublisher, which opens a connection per message.
+    """
+
+    def __init__(
+            self,
+            amqp_host: str,
+            amqp_username: str,
+            amqp_password: str,
+            amqp_port: int = AMQP_PORT,
+            heartbeat: int = PUBLISHER_HEARTBEAT_SECONDS,
+            max_idle_connections: int = PUBLISHER_POOL_SIZE,
+            max_idle_seconds: float = PUBLISHER_MAX_IDLE_SECONDS
+    ):
+        self.parameters = ConnectionParameters(
+            host=amqp_host,
+            port=int(amqp_port),
+            credentials=PlainCredentials(amqp_username, amqp_password),
+            heartbeat=heartbeat
+        )
+        self.max_idle_connections = max_idle_connections
+        self.max_idle_seconds = max_idle_seconds
+
+        self.connections_opened = 0
+        self.publishes = 0
+        self.reconnects = 0
+
+        self._idle: List[PublisherConnection] = []
+        self._lock = Lock()
+
+    def get_stats(self) -> dict:
+        return {
+            "connections_opened": self.connections_opened,
+            "idle_connections": len(self._idle),
+            "publishes": self.publishes,
+            "reconnects": self.reconnects
+        }
+
+    def acquire(self) -> PublisherConnection:
+        """
+        Borrows an idle connection, opening one when none is usable.
+        """
+        connection = None
+        stale = []
+        with self._lock:
+            while self._idle and connection is None:
+                idle_connection = self._idle.pop()
+                if idle_connection.is_usable(max_idle_seconds=self.max_idle_seconds):
+                    connection = idle_connection
+                else:
+                    stale.append(idle_connection)
+
+            if connection is None:
+                self.connections_opened += 1
+
+        for stale_connection in stale:
+            stale_connection.close()
+
+        return connection or PublisherConnection(parameters=self.parameters)
+
+    def release(self, connection: PublisherConnection):
+        connection.last_used = time.monotonic()
+
+        with self._lock:
+            if len(self._idle) < self.max_idle_connections:
+                self._idle.append(connection)
+                return
+
+        connection.close()
+
+    def publish_message(self, exchange: str, routing_key: str, body: bytes, properties: BasicProperties = None):
+        for attempt in range(2):
+            connection = self.acquire()
+            try:
+                # Reads the frames received while idle, raising when the broker closed the connection
+                connection.connection.process_data_events(time_limit=0)
+                connection.channel.basic_publish(
+                    exchange=exchange,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=properties
+                )
+            except PUBLISH_RETRY_ERRORS as err:
+                connection.close()
+                if attempt:
+                    raise
+
+                logger.warning(f"Publisher connection lost, reconnecting: {err!r}")
+                with self._lock:
+                    self.reconnects += 1
+                continue
+            except BaseException:
+                connection.close()
+                raise
+
+            with self._lock:
+                self.publishes += 1
+
+            self.release(connection)
+            return
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for connection in idle:
+            connection.close()
+
+
+_pools: Dict[Tuple[str, int, str], PublisherPool] = {}
+_pools_lock = Lock()
+
+
+def get_publisher_pool(
+        amqp_host: str = AMQP_HOST,
+        amqp_port: int = AMQP_PORT,
+        amqp_username: Optional[str] = None,
+        amqp_password: Optional[str] = None
+) -> PublisherPool:
+    """
+    Returns the process-wide PublisherPool for the host and user, creating it on first use.
+
+    :param amqp_host:
+    :param amqp_port:
+    :param amqp_username: defaults to the RabbitMQ credentials of boe.secrets, with amqp_password
+    :param amqp_password:
+    :return:
+    """
+    if amqp_username is None:
+        amqp_username, amqp_password = get_rabbitmq_credentials()
+
+    key = (amqp_host, int(amqp_port), amqp_username)
+
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = PublisherPool(
+                amqp_host=amqp_host,
+                amqp_port=amqp_port,
+                amqp_username=amqp_username,
+                amqp_password=amqp_password
+            )
+
+        return _pools[key]
+
+
+def close_publisher_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+        _pools.clear()
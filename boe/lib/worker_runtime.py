@@ -0,0 +1,327 @@
+import signal
+import threading
+import time
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from boe.env import (
+    AMQP_HOST,
+    WORKER_RECONNECT_DELAY_SECONDS,
+    WORKER_RUNTIME,
+    WORKER_TIMING_LOG_EVERY
+)
+from boe.lib.batch_consumer import BatchQueueConsumer
+from boe.lib.concurrent_consumer import (
+    ASYNCIO_RUNTIME,
+    WORKER_RUNTIMES,
+    get_prefetch_count,
+    make_ordering_key_getter,
+    make_queue_consumer
+)
+from boe.secrets import get_rabbitmq_credentials
+from boe.utils.serialization_utils import deserialize_envelope
+from cbaxter1988_utils.log_utils import get_logger
+from cbaxter1988_utils.pika_utils import PikaUtilsError
+from pika.exceptions import AMQPHeartbeatTimeout, ChannelClosedByBroker, StreamLostError
+from pika.spec import Basic, BasicProperties
+
+# Errors of the broker connection, the worker reconnects and consumes again
+RECONNECT_ERRORS = (ChannelClosedByBroker, StreamLostError, AMQPHeartbeatTimeout, PikaUtilsError)
+
+TimingHook = Callable[[str, float, Optional[Exception]], None]
+FailureHook = Callable[[Exception], None]
+
+
+class UnknownEventError(Exception):
+    pass
+
+
+class WorkerStopped(Exception):
+    """Stops a consumer without a stop method, raised once it has no message in flight"""
+
+
+class DispatchEntry(NamedTuple):
+    factory: Callable
+    handler: Callable
+    event_class: type
+
+
+DispatchTable = Dict[str, DispatchEntry]
+
+
+def compile_dispatch_table(event_map: dict, default_handler: Callable = None) -> DispatchTable:
+    """
+    Resolves an event map into the table the worker dispatches from, one lookup per event.
+
+    :param event_map: event name -> {"event_factory": ..., "event_class": ..., "event_handler": ...}
+    :param default_handler: handler of the events without an event_handler, usually app.handle_event
+    :return:
+    """
+    dispatch_table = {}
+    for event_name, event_options in event_map.items():
+        handler = event_options.get("event_handler", default_handler)
+        if handler is None:
+            raise ValueError(f"No event_handler for '{event_name}' and no default_handler")
+
+        dispatch_table[event_name] = DispatchEntry(
+            factory=event_options["event_factory"],
+            handler=handler,
+            event_class=event_options["event_class"]
+        )
+
+    return dispatch_table
+
+
+class EventTimings:
+    """
+    Timing hook collecting the count, failures and handling time of each event type.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, List] = {}
+        self._lock = Lock()
+
+    def __call__(self, event_name: str, elapsed: float, error: Optional[Exception]):
+        with self._lock:
+            stats = self._stats.setdefault(event_name, [0, 0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += error is not None
+            stats[2] += elapsed
+            stats[3] = max(stats[3], elapsed)
+
+    @property
+    def count(self) -> int:
+        return sum(stats[0] for stats in self._stats.values())
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                event_name: {
+                    "count": count,
+                    "failed": failed,
+                    "mean_ms": total / count * 1000,
+                    "max_ms": max_elapsed * 1000
+                }
+                for event_name, (count, failed, total, max_elapsed) in self._stats.items()
+            }
+
+
+class Worker:
+    """
+    Consumes a queue and dispatches each event of a message to its handler, configured by an app and an event map.
+
+    Messages are decoded with deserialize_envelope, each event is built by its factory, checked against its
+    event class and handled. A message whose events are all handled is acked, any other is nacked without requeue
+    so it is dead lettered.
+
+    The consumer strategy is picked from CONSUMER_STRATEGIES by name, by default from batch_size, concurrency and
+    runtime. Every event handled is reported to the timing hooks, the built in EventTimings is logged every
+    WORKER_TIMING_LOG_EVERY events.
+
+    The broker credentials default to those of boe.secrets, resolved when the worker first connects.
+
+    On SIGTERM the worker drains, it stops consuming and returns from run once the messages in flight are acked.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            app,
+            event_map: dict,
+            ordering_key_fields: Tuple[str, ...] = (),
+            concurrency: int = 1,
+            batch_size: int = 1,
+            runtime: str = WORKER_RUNTIME,
+            strategy: str = None,
+            hooks: Iterable[TimingHook] = (),
+            on_failure: Optional[FailureHook] = None,
+            amqp_host: str = AMQP_HOST,
+            amqp_username: str = None,
+            amqp_password: str = None
+    ):
+        if runtime not in WORKER_RUNTIMES:
+            raise ValueError(f"Unknown worker runtime '{runtime}', must be one of {WORKER_RUNTIMES}")
+
+        self.name = name
+        self.app = app
+        self.dispatch_table = compile_dispatch_table(event_map=event_map, default_handler=app.handle_event)
+        self.get_ordering_key = make_ordering_key_getter(*ordering_key_fields)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.runtime = runtime
+        self.strategy = strategy or self._get_default_strategy()
+        if self.strategy not in CONSUMER_STRATEGIES:
+            raise ValueError(
+                f"Unknown consumer strategy '{self.strategy}', must be one of {sorted(CONSUMER_STRATEGIES)}"
+            )
+
+        self.timings = EventTimings()
+        self.hooks: List[TimingHook] = [self.timings, *hooks]
+        self.on_failure = on_failure
+
+        self.amqp_host = amqp_host
+        self.amqp_username = amqp_username
+        self.amqp_password = amqp_password
+
+        self.draining = False
+        self._consumer = None
+        self._handling = False
+
+        self.logger = get_logger(name)
+
+    def _get_default_strategy(self) -> str:
+        if self.batch_size > 1:
+            return "batch"
+        if self.runtime == ASYNCIO_RUNTIME:
+            return "asyncio"
+
+        return "threaded" if self.concurrency > 1 else "inline"
+
+    def _report(self, event_name: str, elapsed: float, error: Optional[Exception]):
+        for hook in self.hooks:
+            hook(event_name, elapsed, error)
+
+        if WORKER_TIMING_LOG_EVERY and error is None and not self.timings.count % WORKER_TIMING_LOG_EVERY:
+            self.logger.info(f"Event timings: {self.timings.get_stats()}")
+
+    def handle_message(self, properties: BasicProperties, body: bytes):
+        """
+        Handles the events of a message, raising when one of them can not be handled.
+        """
+        envelope = deserialize_envelope(body=body, content_type=properties.content_type)
+
+        for event_name, payload in envelope.items():
+            entry = self.dispatch_table.get(event_name)
+            if entry is None:
+                raise UnknownEventError(f"No handler registered for '{event_name}'")
+
+            started = time.perf_counter()
+            try:
+                event = entry.factory(**payload)
+                if not isinstance(event, entry.event_class):
+                    raise TypeError(f"Invalid Event type, must be of type {entry.event_class}")
+
+                entry.handler(event)
+            except Exception as err:
+                self._report(event_name=event_name, elapsed=time.perf_counter() - started, error=err)
+                raise
+
+            self._report(event_name=event_name, elapsed=time.perf_counter() - started, error=None)
+            self.logger.debug(f"Processed ApplicationEvent={event}")
+
+    def handle_failure(self, error: Exception):
+        if self.on_failure is not None:
+            self.on_failure(error)
+
+    def on_message_callback(self, ch, method: Basic.Deliver, properties: BasicProperties, body: bytes):
+        self._handling = True
+        try:
+            self.handle_message(properties=properties, body=body)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+        except Exception as err:
+            self.logger.error(f"DLQ: delivery_tag={method.delivery_tag} -- Exception={err!r}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            self.handle_failure(error=err)
+        finally:
+            self._handling = False
+
+        if self.draining and not hasattr(self._consumer, "stop"):
+            raise WorkerStopped()
+
+    def stop(self):
+        """
+        Drains the worker, run returns once the messages in flight are acked. Safe to call from a signal handler.
+        """
+        self.draining = True
+        self.logger.info("Draining")
+
+        stop_consumer = getattr(self._consumer, "stop", None)
+        if stop_consumer is not None:
+            stop_consumer()
+        elif not self._handling:
+            # An inline consumer waiting for a message, the unacked prefetched messages are requeued on close
+            raise WorkerStopped()
+
+    def make_consumer(self, queue: str):
+        if self.amqp_username is None:
+            self.amqp_username, self.amqp_password = get_rabbitmq_credentials()
+
+        return CONSUMER_STRATEGIES[self.strategy](self, queue)
+
+    def get_prefetch_count(self) -> int:
+        return max(self.batch_size, get_prefetch_count(concurrency=self.concurrency))
+
+    def run(self, queue: str):
+        """
+        Consumes queue until interrupted, reconnecting after the broker connection is lost.
+        """
+        self.logger.info(f"Consuming Queue={queue} Strategy={self.strategy} Events={sorted(self.dispatch_table)}")
+
+        previous_handler = None
+        if threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+
+        try:
+            while not self.draining:
+                try:
+                    self._consumer = self.make_consumer(queue=queue)
+                    self._consumer.consume(prefetch_count=self.get_prefetch_count())
+                    return
+                except WorkerStopped:
+                    return
+                except RECONNECT_ERRORS as err:
+                    if self.draining:
+                        return
+                    self.logger.warning(f"Lost the broker connection, reconnecting: {err!r}")
+                    time.sleep(WORKER_RECONNECT_DELAY_SECONDS)
+        except WorkerStopped:
+            return
+        finally:
+            if previous_handler is not None:
+                signal.signal(signal.SIGTERM, previous_handler)
+            self.logger.info(f"Event timings: {self.timings.get_stats()}")
+
+
+def _make_queue_consumer(worker: Worker, queue: str, concurrency: int, runtime: str):
+    return make_queue_consumer(
+        amqp_host=worker.amqp_host,
+        amqp_username=worker.amqp_username,
+        amqp_password=worker.amqp_password,
+        queue=queue,
+        on_message_callback=worker.on_message_callback,
+        concurrency=concurrency,
+        get_ordering_key=worker.get_ordering_key,
+        runtime=runtime
+    )
+
+
+def _make_batch_consumer(worker: Worker, queue: str) -> BatchQueueConsumer:
+    return BatchQueueConsumer(
+        amqp_host=worker.amqp_host,
+        amqp_username=worker.amqp_username,
+        amqp_password=worker.amqp_password,
+        queue_name=queue,
+        handle_message=worker.handle_message,
+        unit_of_work=worker.app.unit_of_work,
+        get_ordering_key=worker.get_ordering_key,
+        batch_size=worker.batch_size,
+        on_failure=lambda method, properties, body, error: worker.handle_failure(error=error)
+    )
+
+
+ConsumerStrategy = Callable[[Worker, str], object]
+
+CONSUMER_STRATEGIES: Dict[str, ConsumerStrategy] = {
+    "inline": lambda worker, queue: _make_queue_consumer(worker, queue, concurrency=1, runtime="blocking"),
+    "threaded": lambda worker, queue: _make_queue_consumer(
+        worker, queue, concurrency=worker.concurrency, runtime="blocking"
+    ),
+    "asyncio": lambda worker, queue: _make_queue_consumer(
+        worker, queue, concurrency=worker.concurrency, runtime=ASYNCIO_RUNTIME
+    ),
+    "batch": _make_batch_consumer,
+}
+
+
+def register_consumer_strategy(name: str, strategy: ConsumerStrategy):
+    CONSUMER_STRATEGIES[name] = strategy
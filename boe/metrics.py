@@ -30,6 +30,22 @@ class ServiceMetricPublisher:
             service_name=service_name
         )
 
+    def incr_transaction_batch_processed_success_metric(self, service_name: str, transaction_count: int):
+        self.metric_writer.publish_service_metric(
+            metric_name='TransActionProcessed',
+            field_name='success',
+            field_value=float(transaction_count),
+            service_name=service_name
+        )
+
+    def publish_projection_lag_metric(self, service_name: str, lag: int):
+        self.metric_writer.publish_service_metric(
+            metric_name='ProjectionLag',
+            field_name='notifications',
+            field_value=float(lag),
+            service_name=service_name
+        )
+
     def incr_transaction_processed_failed_metric(self, service_name: str):
         self.metric_writer.publish_service_metric(
             metric_name='TransActionProcessed',
@@ -1,13 +1,250 @@
-from cbaxter1988_utils.aws_secrets_manager_utils import get_credentials
+"""
+Credentials of the backing services, resolved on first use.
+
+A secret is a dict with a username and a password. It is looked up by a chain of SecretProviders, the first one
+holding the secret wins, and kept for the life of the process. Importing this module does no I/O, so processes
+that never use a secret never fetch it.
+
+MONGO_DB_USERNAME, MONGO_DB_PASSWORD, RABBITMQ_USERNAME and RABBITMQ_PASSWORD are still importable, they are
+resolved when imported.
+"""
+import importlib
+import json
+import os
+import tempfile
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from boe.env import (
+    SECRET_PROVIDERS,
+    SECRETS_FILE,
+    SECRETS_CACHE_FILE,
+    SECRETS_CACHE_TTL_SECONDS
+)
 
 MONGO_DB_CRED_SECRET = 'dev/boe/mongodb_creds'
 RABBITMQ_CRED_SECRET = 'dev/boe/rabbitmq_creds'
 
-_MONGO_DB_CREDS_SECRET = get_credentials(MONGO_DB_CRED_SECRET)
-_RABBIT_MQ_CREDS = get_credentials(RABBITMQ_CRED_SECRET)
+# Prefix of the env vars holding each secret, read by EnvSecretProvider
+SECRET_ENV_PREFIXES = {
+    MONGO_DB_CRED_SECRET: "MONGO_DB",
+    RABBITMQ_CRED_SECRET: "RABBITMQ",
+}
+
+
+class SecretNotFound(Exception):
+    pass
+
+
+class SecretProvider:
+    def get_secret(self, secret_name: str) -> Optional[dict]:
+        """
+        :param secret_name:
+        :return: None when the provider does not hold the secret
+        """
+        raise NotImplementedError
+
+
+class EnvSecretProvider(SecretProvider):
+    def __init__(self, prefixes: Dict[str, str] = None):
+        self.prefixes = SECRET_ENV_PREFIXES if prefixes is None else prefixes
+
+    def get_secret(self, secret_name: str) -> Optional[dict]:
+        prefix = self.prefixes.get(secret_name)
+        if prefix is None:
+            return None
+
+        username = os.getenv(f"{prefix}_USERNAME")
+        password = os.getenv(f"{prefix}_PASSWORD")
+        if username is None or password is None:
+            return None
+
+        return {"username": username, "password": password}
+
+
+class FileSecretProvider(SecretProvider):
+    """
+    Reads secrets from a JSON file of {secret_name: secret}, such as a mounted docker secret.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get_secret(self, secret_name: str) -> Optional[dict]:
+        try:
+            with open(self.path) as secrets_file:
+                return json.load(secrets_file).get(secret_name)
+        except FileNotFoundError:
+            return None
+
+
+class SecretsManagerProvider(SecretProvider):
+    def get_secret(self, secret_name: str) -> Optional[dict]:
+        # Imported on first use, boto3 is the most expensive import of a cold start
+        aws_secrets_manager_utils = importlib.import_module("cbaxter1988_utils.aws_secrets_manager_utils")
+        return aws_secrets_manager_utils.get_credentials(secret_name)
+
+
+class CachedFileSecretProvider(SecretProvider):
+    """
+    Keeps the secrets of another provider in a JSON file for ttl seconds, so restarts and short lived processes
+    skip the round trip to the provider.
+
+    The file is written with owner only permissions and replaced atomically.
+    """
+
+    def __init__(self, provider: SecretProvider, path: str, ttl: int = SECRETS_CACHE_TTL_SECONDS):
+        self.provider = provider
+        self.path = path
+        self.ttl = ttl
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_cache(self, cache: dict):
+        cache_dir = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(cache_dir, exist_ok=True)
+
+        cache_fd, cache_path = tempfile.mkstemp(dir=cache_dir, prefix=".secrets-")
+        try:
+            with os.fdopen(cache_fd, "w") as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(cache_path, self.path)
+        except BaseException:
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            raise
+
+    def get_secret(self, secret_name: str) -> Optional[dict]:
+        cache = self._read_cache()
+        entry = cache.get(secret_name)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            return entry["secret"]
+
+        secret = self.provider.get_secret(secret_name)
+        if secret is not None:
+            cache[secret_name] = {"secret": secret, "fetched_at": time.time()}
+            self._write_cache(cache)
+
+        return secret
+
+
+class SecretProviderChain(SecretProvider):
+    def __init__(self, providers: List[SecretProvider]):
+        self.providers = providers
+
+    def get_secret(self, secret_name: str) -> Optional[dict]:
+        for provider in self.providers:
+            secret = provider.get_secret(secret_name)
+            if secret is not None:
+                return secret
+
+        return None
+
+
+def _make_secrets_manager_provider() -> SecretProvider:
+    if SECRETS_CACHE_FILE:
+        return CachedFileSecretProvider(provider=SecretsManagerProvider(), path=SECRETS_CACHE_FILE)
+
+    return SecretsManagerProvider()
+
+
+SECRET_PROVIDER_FACTORIES: Dict[str, Callable[[], Optional[SecretProvider]]] = {
+    "env": EnvSecretProvider,
+    "file": lambda: FileSecretProvider(path=SECRETS_FILE) if SECRETS_FILE else None,
+    "secrets_manager": _make_secrets_manager_provider,
+}
+
+
+def make_secret_provider_chain(provider_names: str = SECRET_PROVIDERS) -> SecretProviderChain:
+    """
+    :param provider_names: comma separated names of SECRET_PROVIDER_FACTORIES, in lookup order
+    :return:
+    """
+    providers = []
+    for provider_name in filter(None, (name.strip() for name in provider_names.split(","))):
+        if provider_name not in SECRET_PROVIDER_FACTORIES:
+            raise ValueError(
+                f"Unknown secret provider '{provider_name}', must be one of {sorted(SECRET_PROVIDER_FACTORIES)}"
+            )
+
+        provider = SECRET_PROVIDER_FACTORIES[provider_name]()
+        if provider is not None:
+            providers.append(provider)
+
+    return SecretProviderChain(providers=providers)
+
+
+_secret_provider: Optional[SecretProvider] = None
+_secrets: Dict[str, dict] = {}
+_secrets_lock = Lock()
+
+
+def set_secret_provider(provider: Optional[SecretProvider]):
+    """
+    Replaces the provider chain and forgets the secrets resolved so far, None restores the default chain.
+    """
+    global _secret_provider
+
+    with _secrets_lock:
+        _secret_provider = provider
+        _secrets.clear()
+
+
+def get_secret(secret_name: str) -> dict:
+    """
+    Returns a secret, resolving it on first use.
+
+    :param secret_name:
+    :return:
+    :raises SecretNotFound: when no provider holds the secret
+    """
+    secret = _secrets.get(secret_name)
+    if secret is not None:
+        return secret
+
+    global _secret_provider
+
+    with _secrets_lock:
+        if secret_name not in _secrets:
+            if _secret_provider is None:
+                _secret_provider = make_secret_provider_chain()
+
+            secret = _secret_provider.get_secret(secret_name)
+            if secret is None:
+                raise SecretNotFound(f"Secret '{secret_name}' not found by {SECRET_PROVIDERS}")
+
+            _secrets[secret_name] = secret
+
+        return _secrets[secret_name]
+
+
+def get_mongo_db_credentials() -> Tuple[str, str]:
+    secret = get_secret(MONGO_DB_CRED_SECRET)
+    return secret['username'], secret['password']
+
+
+def get_rabbitmq_credentials() -> Tuple[str, str]:
+    secret = get_secret(RABBITMQ_CRED_SECRET)
+    return secret['username'], secret['password']
+
+
+_LAZY_CREDENTIALS = {
+    "MONGO_DB_USERNAME": (get_mongo_db_credentials, 0),
+    "MONGO_DB_PASSWORD": (get_mongo_db_credentials, 1),
+    "RABBITMQ_USERNAME": (get_rabbitmq_credentials, 0),
+    "RABBITMQ_PASSWORD": (get_rabbitmq_credentials, 1),
+}
+
 
-MONGO_DB_USERNAME = _MONGO_DB_CREDS_SECRET['username']
-MONGO_DB_PASSWORD = _MONGO_DB_CREDS_SECRET['password']
+def __getattr__(name: str):
+    if name in _LAZY_CREDENTIALS:
+        get_credentials, index = _LAZY_CREDENTIALS[name]
+        return get_credentials()[index]
 
-RABBITMQ_USERNAME = _RABBIT_MQ_CREDS['username']
-RABBITMQ_PASSWORD = _RABBIT_MQ_CREDS['password']
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -0,0 +1,190 @@
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+from uuid import UUID
+
+from bson.binary import UUID_SUBTYPE, Binary, UuidRepresentation
+
+T = TypeVar("T")
+
+_encoders: Dict[type, Callable[[Any], Any]] = {}
+_decoders: Dict[type, Callable[[Any], Any]] = {}
+
+_MISSING = object()
+
+
+def _encode_identity(value: Any) -> Any:
+    return value
+
+
+def _encode_uuid(value: UUID) -> Binary:
+    return Binary.from_uuid(value, uuid_representation=UuidRepresentation.STANDARD)
+
+
+def _encode_enum(value: Enum) -> Any:
+    return encode_value(value.value)
+
+
+def _encode_dict(value: dict) -> dict:
+    return {str(key) if isinstance(key, UUID) else key: encode_value(item) for key, item in value.items()}
+
+
+def _encode_sequence(value) -> list:
+    return [encode_value(item) for item in value]
+
+
+def _compile_dataclass_encoder(value_type: type) -> Callable[[Any], dict]:
+    field_names = tuple(field.name for field in fields(value_type))
+
+    def encode_dataclass(value) -> dict:
+        return {name: encode_value(getattr(value, name)) for name in field_names}
+
+    return encode_dataclass
+
+
+def _compile_encoder(value_type: type) -> Callable[[Any], Any]:
+    if is_dataclass(value_type):
+        return _compile_dataclass_encoder(value_type=value_type)
+
+    if issubclass(value_type, Enum):
+        return _encode_enum
+
+    if issubclass(value_type, UUID):
+        return _encode_uuid
+
+    if issubclass(value_type, dict):
+        return _encode_dict
+
+    if issubclass(value_type, (list, tuple, set)):
+        return _encode_sequence
+
+    return _encode_identity
+
+
+def encode_value(value: Any) -> Any:
+    """
+    Encodes a value to BSON-native types, UUIDs become standard Binary UUIDs and datetimes and bytes are kept.
+
+    Dataclasses encode to a dict of their fields, the encoder of each type is compiled on first use.
+
+    :param value:
+    :return:
+    """
+    value_type = type(value)
+
+    encoder = _encoders.get(value_type)
+    if encoder is None:
+        encoder = _encoders[value_type] = _compile_encoder(value_type=value_type)
+
+    return encoder(value)
+
+
+def match_uuid(value: UUID) -> dict:
+    """Query operator matching value stored either as a standard Binary or, by older documents, as a string"""
+    return {"$in": [encode_value(value), str(value)]}
+
+
+def decode_uuid(value: Union[Binary, UUID, str]) -> UUID:
+    if isinstance(value, UUID):
+        return value
+
+    if isinstance(value, Binary):
+        if value.subtype == UUID_SUBTYPE:
+            return UUID(bytes=bytes(value))
+
+        return value.as_uuid(uuid_representation=UuidRepresentation.STANDARD)
+
+    return UUID(value)
+
+
+def decode_datetime(value: Union[datetime, str]) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def decode_bytes(value: Union[bytes, str]) -> bytes:
+    return value if isinstance(value, bytes) else value.encode()
+
+
+def _compile_decoder(value_type: Any) -> Callable[[Any], Any]:
+    origin = get_origin(value_type)
+
+    if origin is Union:
+        value_types = [arg for arg in get_args(value_type) if arg is not type(None)]
+        if len(value_types) == 1:
+            decode_optional = _get_decoder(value_types[0])
+            return lambda value: None if value is None else decode_optional(value)
+
+        return _encode_identity
+
+    if origin in (list, tuple, set):
+        args = get_args(value_type)
+        decode_item = _get_decoder(args[0]) if args else _encode_identity
+        return lambda value: [decode_item(item) for item in value]
+
+    if origin is dict:
+        args = get_args(value_type)
+        decode_item = _get_decoder(args[1]) if args else _encode_identity
+        return lambda value: {key: decode_item(item) for key, item in value.items()}
+
+    if not isinstance(value_type, type):
+        return _encode_identity
+
+    if is_dataclass(value_type):
+        return _compile_dataclass_decoder(value_type=value_type)
+
+    if issubclass(value_type, Enum):
+        return value_type
+
+    if issubclass(value_type, UUID):
+        return decode_uuid
+
+    if issubclass(value_type, datetime):
+        return decode_datetime
+
+    if issubclass(value_type, bytes):
+        return decode_bytes
+
+    return _encode_identity
+
+
+def _get_decoder(value_type: Any) -> Callable[[Any], Any]:
+    decoder = _decoders.get(value_type)
+    if decoder is None:
+        decoder = _decoders[value_type] = _compile_decoder(value_type=value_type)
+
+    return decoder
+
+
+def _compile_dataclass_decoder(value_type: type) -> Callable[[dict], Any]:
+    type_hints = get_type_hints(value_type)
+    field_decoders = tuple(
+        (field.name, _get_decoder(type_hints[field.name]))
+        for field in fields(value_type)
+        if field.init
+    )
+
+    def decode_dataclass(document: dict):
+        kwargs = {}
+        for name, decode_field in field_decoders:
+            value = document.get(name, _MISSING)
+            if value is not _MISSING:
+                kwargs[name] = None if value is None else decode_field(value)
+
+        return value_type(**kwargs)
+
+    return decode_dataclass
+
+
+def decode_document(value_type: Type[T], document: dict) -> T:
+    """
+    Decodes a document written by encode_value back to the dataclass value_type.
+
+    Fields are decoded by their annotation and the string UUIDs and ISO datetimes of documents written by
+    serialize_object_to_dict are accepted too.
+
+    :param value_type:
+    :param document:
+    :return:
+    """
+    return _get_decoder(value_type)(document)
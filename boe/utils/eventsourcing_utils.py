@@ -1,6 +1,29 @@
-from eventsourcing.domain import Snapshot
+from typing import Dict, Optional, Type
+
+from eventsourcing.domain import Aggregate, Snapshot
 
 
 def make_snapshot(aggregate):
     snapshot = Snapshot.take(aggregate=aggregate)
     return snapshot.mutate(None)
+
+
+def build_snapshotting_intervals(
+        intervals: Dict[Type[Aggregate], int]
+) -> Optional[Dict[Type[Aggregate], int]]:
+    """
+    Builds the snapshotting_intervals for an Application from the configured interval of each aggregate type.
+
+    Aggregate types with an interval of 0 are not snapshotted, None is returned when no type is snapshotted
+    so the Application does not construct a snapshot store.
+
+    :param intervals:
+    :return:
+    """
+    _intervals = {
+        aggregate_type: interval
+        for aggregate_type, interval in intervals.items()
+        if interval > 0
+    }
+
+    return _intervals if _intervals else None
@@ -1,7 +1,18 @@
 import json
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from uuid import UUID
 
+import msgpack
 from cbaxter1988_utils.serialization_utils import serialize_object as _serialize_object
 
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+CONTENT_TYPES = (JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE)
+
 
 def serialize_object(o: object, b64_encode: bool = False):
     return _serialize_object(o=o, b64_encode=b64_encode)
@@ -9,3 +20,146 @@ def serialize_object(o: object, b64_encode: bool = False):
 
 def serialize_object_to_dict(o: object, b64_encode: bool = False):
     return json.loads(_serialize_object(o=o, b64_encode=b64_encode))
+
+
+def _encode_identity(value: Any) -> Any:
+    return value
+
+
+class _ValueEncoder:
+    """
+    Encodes values to the primitive types of a wire format, compiling the encoder of each type on first use.
+
+    Dataclasses encode to a dict of their fields, enums to their value, UUIDs and datetimes to strings. Bytes are
+    decoded to a string unless the wire format has a native binary type.
+    """
+
+    def __init__(self, native_bytes: bool):
+        self.native_bytes = native_bytes
+        self._encoders: Dict[type, Callable[[Any], Any]] = {}
+
+    def encode(self, value: Any) -> Any:
+        value_type = type(value)
+
+        encoder = self._encoders.get(value_type)
+        if encoder is None:
+            encoder = self._encoders[value_type] = self.compile(value_type=value_type)
+
+        return encoder(value)
+
+    def _compile_dataclass(self, value_type: type) -> Callable[[Any], dict]:
+        field_names = tuple(field.name for field in fields(value_type))
+        encode = self.encode
+
+        def encode_dataclass(value) -> dict:
+            return {name: encode(getattr(value, name)) for name in field_names}
+
+        return encode_dataclass
+
+    def compile(self, value_type: type) -> Callable[[Any], Any]:
+        if is_dataclass(value_type):
+            return self._compile_dataclass(value_type=value_type)
+
+        if issubclass(value_type, Enum):
+            return lambda value: self.encode(value.value)
+
+        if issubclass(value_type, UUID):
+            return str
+
+        if issubclass(value_type, bytes):
+            return _encode_identity if self.native_bytes else bytes.decode
+
+        if issubclass(value_type, datetime):
+            return datetime.isoformat
+
+        if issubclass(value_type, dict):
+            return lambda value: {key: self.encode(item) for key, item in value.items()}
+
+        if issubclass(value_type, (list, tuple)):
+            return lambda value: [self.encode(item) for item in value]
+
+        return _encode_identity
+
+
+_json_value_encoder = _ValueEncoder(native_bytes=False)
+_msgpack_value_encoder = _ValueEncoder(native_bytes=True)
+
+_envelope_encoders: Dict[Tuple[type, str], Tuple[str, Callable[[Any], Any]]] = {}
+
+
+def encode_json_value(value: Any) -> Any:
+    """
+    Encodes a value to the types json.dumps accepts, the same way the CustomJSONEncoder of serialize_object does.
+
+    :param value:
+    :return:
+    """
+    return _json_value_encoder.encode(value)
+
+
+def encode_msgpack_value(value: Any) -> Any:
+    """
+    Encodes a value to the types msgpack.packb accepts, like encode_json_value but bytes are kept.
+
+    :param value:
+    :return:
+    """
+    return _msgpack_value_encoder.encode(value)
+
+
+def get_envelope_encoder(
+        event_class: type,
+        content_type: str = JSON_CONTENT_TYPE
+) -> Tuple[str, Callable[[Any], Any]]:
+    """
+    Returns the event name and payload encoder of event_class, both are cached per class and content type.
+
+    :param event_class:
+    :param content_type:
+    :return:
+    """
+    envelope_encoder = _envelope_encoders.get((event_class, content_type))
+    if envelope_encoder is None:
+        value_encoder = _msgpack_value_encoder if content_type == MSGPACK_CONTENT_TYPE else _json_value_encoder
+        envelope_encoder = _envelope_encoders[(event_class, content_type)] = (
+            event_class.__name__,
+            value_encoder.compile(value_type=event_class)
+        )
+
+    return envelope_encoder
+
+
+def serialize_envelope(event: object, content_type: str = JSON_CONTENT_TYPE) -> Union[str, bytes]:
+    """
+    Serializes event to the {EventName: payload} envelope the workers consume, in a single pass.
+
+    :param event:
+    :param content_type: JSON_CONTENT_TYPE or MSGPACK_CONTENT_TYPE
+    :return: str for JSON, bytes for MessagePack
+    """
+    if content_type not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported content_type '{content_type}', must be one of {CONTENT_TYPES}")
+
+    event_name, encode_payload = get_envelope_encoder(event_class=type(event), content_type=content_type)
+
+    if content_type == MSGPACK_CONTENT_TYPE:
+        return msgpack.packb({event_name: encode_payload(event)}, use_bin_type=True)
+
+    return json.dumps({event_name: encode_payload(event)})
+
+
+def deserialize_envelope(body: Union[str, bytes], content_type: Optional[str] = None) -> dict:
+    """
+    Deserializes a message body by its AMQP content_type, a message without one is JSON.
+
+    :param body:
+    :param content_type:
+    :return:
+    """
+    if content_type == MSGPACK_CONTENT_TYPE:
+        return msgpack.unpackb(body, raw=False)
+
+    if content_type is None or content_type == JSON_CONTENT_TYPE:
+        return json.loads(body)
+
+    raise ValueError(f"Unsupported content_type '{content_type}', must be one of {CONTENT_TYPES}")
@@ -0,0 +1,40 @@
+from uuid import UUID
+
+_JUMP_HASH_MULTIPLIER = 2862933555777941757
+_UINT64_MASK = (1 << 64) - 1
+
+
+def jump_consistent_hash(key: int, shard_count: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach), maps key onto one of shard_count shards.
+
+    Growing shard_count from K to K+1 only moves ~1/(K+1) of the keys, all of them onto the new shard.
+
+    :param key: unsigned 64 bit int
+    :param shard_count:
+    :return:
+    """
+    if shard_count < 1:
+        raise ValueError(f"Invalid shard_count='{shard_count}'")
+
+    key &= _UINT64_MASK
+    bucket, jump = -1, 0
+    while jump < shard_count:
+        bucket = jump
+        key = (key * _JUMP_HASH_MULTIPLIER + 1) & _UINT64_MASK
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+
+    return bucket
+
+
+def get_shard_for_aggregate_id(aggregate_id: UUID, shard_count: int) -> int:
+    _aggregate_id = aggregate_id if isinstance(aggregate_id, UUID) else UUID(str(aggregate_id))
+    return jump_consistent_hash(key=_aggregate_id.int ^ (_aggregate_id.int >> 64), shard_count=shard_count)
+
+
+def make_shard_queue_name(queue: str, shard: int) -> str:
+    return f'{queue}_SHARD_{shard}'
+
+
+def make_shard_routing_key(routing_key: str, shard: int) -> str:
+    return f'{routing_key}.shard_{shard}'
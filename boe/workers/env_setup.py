@@ -1,9 +1,8 @@
 import os
+from functools import lru_cache
 
 from boe.env import (
     AMQP_HOST,
-    RABBITMQ_PASSWORD,
-    RABBITMQ_USERNAME,
     BANK_MANAGER_WORKER_QUEUE,
     USER_MANAGER_WORKER_QUEUE,
     STORE_MANAGER_WORKER_QUEUE,
@@ -19,26 +18,29 @@ from boe.env import (
     POSTGRES_DB_HOST,
     POSTGRES_DB_PORT,
     POSTGRES_DB_PASSWORD,
-    POSTGRES_DB_USER
+    POSTGRES_DB_USER,
+    BANK_MANAGER_WORKER_SHARD_COUNT
 
 )
+from boe.lib.domains.read_model_indexes import set_up_read_model_indexes
+from boe.secrets import get_rabbitmq_credentials
+from boe.utils.sharding_utils import make_shard_queue_name, make_shard_routing_key
 from cbaxter1988_utils.pika_utils import make_pika_service_wrapper
 from pika.spec import ExchangeType
 
 
+@lru_cache(maxsize=None)
 def get_pika_service_wrapper():
+    amqp_username, amqp_password = get_rabbitmq_credentials()
     return make_pika_service_wrapper(
         amqp_host=AMQP_HOST,
-        amqp_username=RABBITMQ_USERNAME,
-        amqp_password=RABBITMQ_PASSWORD
+        amqp_username=amqp_username,
+        amqp_password=amqp_password
     )
 
 
-service_wrapper = get_pika_service_wrapper()
-
-
 def _set_app_exchange():
-    service_wrapper.create_exchange(
+    get_pika_service_wrapper().create_exchange(
         exchange=BOE_APP_EXCHANGE,
         exchange_type=ExchangeType.direct,
         auto_delete=True
@@ -60,7 +62,7 @@ def prepare_eventsourcing_postgres_env():
 
 
 def set_up_task_manager_worker_env():
-    service_wrapper.create_queue(
+    get_pika_service_wrapper().create_queue(
         queue=TASK_MANAGER_WORKER_QUEUE,
         dlq_support=True,
         dlq_queue=BOE_DLQ_QUEUE,
@@ -68,7 +70,7 @@ def set_up_task_manager_worker_env():
         dlq_routing_key=BOE_DLQ_DEFAULT_ROUTING_KEY
     )
 
-    service_wrapper.bind_queue(
+    get_pika_service_wrapper().bind_queue(
         queue=TASK_MANAGER_WORKER_QUEUE,
         exchange=BOE_APP_EXCHANGE,
         routing_key=TASK_MANAGER_QUEUE_ROUTING_KEY
@@ -76,7 +78,7 @@ def set_up_task_manager_worker_env():
 
 
 def set_up_bank_manager_worker_env():
-    service_wrapper.create_queue(
+    get_pika_service_wrapper().create_queue(
         queue=BANK_MANAGER_WORKER_QUEUE,
         dlq_support=True,
         dlq_queue=BOE_DLQ_QUEUE,
@@ -84,15 +86,44 @@ def set_up_bank_manager_worker_env():
         dlq_routing_key=BOE_DLQ_DEFAULT_ROUTING_KEY
     )
 
-    service_wrapper.bind_queue(
+    get_pika_service_wrapper().bind_queue(
         queue=BANK_MANAGER_WORKER_QUEUE,
         exchange=BOE_APP_EXCHANGE,
         routing_key=BANK_MANAGER_QUEUE_ROUTING_KEY
     )
 
 
+def get_bank_manager_worker_queue(shard: int) -> str:
+    if BANK_MANAGER_WORKER_SHARD_COUNT <= 1:
+        return BANK_MANAGER_WORKER_QUEUE
+
+    if not 0 <= shard < BANK_MANAGER_WORKER_SHARD_COUNT:
+        raise ValueError(f"Invalid Shard='{shard}' for ShardCount='{BANK_MANAGER_WORKER_SHARD_COUNT}'")
+
+    return make_shard_queue_name(queue=BANK_MANAGER_WORKER_QUEUE, shard=shard)
+
+
+def set_up_bank_manager_worker_shard_envs():
+    for shard in range(BANK_MANAGER_WORKER_SHARD_COUNT):
+        queue = make_shard_queue_name(queue=BANK_MANAGER_WORKER_QUEUE, shard=shard)
+
+        get_pika_service_wrapper().create_queue(
+            queue=queue,
+            dlq_support=True,
+            dlq_queue=BOE_DLQ_QUEUE,
+            dlq_exchange=BOE_APP_EXCHANGE,
+            dlq_routing_key=BOE_DLQ_DEFAULT_ROUTING_KEY
+        )
+
+        get_pika_service_wrapper().bind_queue(
+            queue=queue,
+            exchange=BOE_APP_EXCHANGE,
+            routing_key=make_shard_routing_key(routing_key=BANK_MANAGER_QUEUE_ROUTING_KEY, shard=shard)
+        )
+
+
 def set_up_user_manager_worker_env():
-    service_wrapper.create_queue(
+    get_pika_service_wrapper().create_queue(
         queue=USER_MANAGER_WORKER_QUEUE,
         dlq_support=True,
         dlq_queue=BOE_DLQ_QUEUE,
@@ -100,7 +131,7 @@ def set_up_user_manager_worker_env():
         dlq_routing_key=BOE_DLQ_DEFAULT_ROUTING_KEY
     )
 
-    service_wrapper.bind_queue(
+    get_pika_service_wrapper().bind_queue(
         queue=USER_MANAGER_WORKER_QUEUE,
         exchange=BOE_APP_EXCHANGE,
         routing_key=USER_MANAGER_QUEUE_ROUTING_KEY
@@ -108,7 +139,7 @@ def set_up_user_manager_worker_env():
 
 
 def set_up_store_manager_worker_env():
-    service_wrapper.create_queue(
+    get_pika_service_wrapper().create_queue(
         queue=STORE_MANAGER_WORKER_QUEUE,
         dlq_support=True,
         dlq_queue=BOE_DLQ_QUEUE,
@@ -116,7 +147,7 @@ def set_up_store_manager_worker_env():
         dlq_routing_key=BOE_DLQ_DEFAULT_ROUTING_KEY
     )
 
-    service_wrapper.bind_queue(
+    get_pika_service_wrapper().bind_queue(
         queue=STORE_MANAGER_WORKER_QUEUE,
         exchange=BOE_APP_EXCHANGE,
         routing_key=STORE_MANAGER_QUEUE_ROUTING_KEY
@@ -124,11 +155,11 @@ def set_up_store_manager_worker_env():
 
 
 def set_up_exception_queues():
-    service_wrapper.create_queue(
+    get_pika_service_wrapper().create_queue(
         queue=BOE_DLQ_QUEUE,
     )
 
-    service_wrapper.bind_queue(
+    get_pika_service_wrapper().bind_queue(
         queue=BOE_DLQ_QUEUE,
         exchange=BOE_APP_EXCHANGE,
         routing_key=BOE_DLQ_DEFAULT_ROUTING_KEY
@@ -139,5 +170,8 @@ if __name__ == "__main__":
     _set_app_exchange()
     set_up_user_manager_worker_env()
     set_up_bank_manager_worker_env()
+    if BANK_MANAGER_WORKER_SHARD_COUNT > 1:
+        set_up_bank_manager_worker_shard_envs()
     set_up_store_manager_worker_env()
     set_up_task_manager_worker_env()
+    set_up_read_model_indexes()
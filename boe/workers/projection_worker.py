@@ -0,0 +1,64 @@
+import time
+
+from boe.applications.bank_domain_apps import BankManagerApp
+from boe.applications.store_domain_apps import StoreManagerApp
+from boe.applications.task_domain_apps import TaskManagerApp
+from boe.applications.user_domain_apps import UserManagerApp
+from boe.env import PROJECTION_BATCH_SIZE, PROJECTION_POLL_INTERVAL_SECONDS
+from boe.lib.domains.bank_domain import BankDomainWriteModel
+from boe.lib.domains.store_domain import StoreDomainWriteModel
+from boe.lib.domains.task_domain import TaskDomainWriteModel
+from boe.lib.domains.user_domain import UserDomainWriteModel
+from boe.lib.domains.read_model_indexes import set_up_read_model_indexes
+from boe.lib.projection_processor import ProjectionProcessor, get_projection_tracking_collection
+from boe.metrics import ServiceMetricPublisher
+from boe.workers.env_setup import prepare_eventsourcing_postgres_env
+from cbaxter1988_utils.log_utils import get_logger
+
+logger = get_logger("ProjectionWorker")
+
+prepare_eventsourcing_postgres_env()
+
+metric_publisher = ServiceMetricPublisher()
+
+
+def build_projection_processors():
+    tracking_collection = get_projection_tracking_collection()
+
+    apps = [
+        (BankManagerApp(), BankDomainWriteModel),
+        (StoreManagerApp(), StoreDomainWriteModel),
+        (TaskManagerApp(), TaskDomainWriteModel),
+        (UserManagerApp(), UserDomainWriteModel),
+    ]
+
+    processors = []
+    for app, write_model_class in apps:
+        # Projection writes are buffered and sent as one bulk_write per batch
+        app.write_model = write_model_class(buffer_size=PROJECTION_BATCH_SIZE)
+        processors.append(ProjectionProcessor(app=app, tracking_collection=tracking_collection))
+
+    return processors
+
+
+def run_projection_processors(processors):
+    while True:
+        processed_count = 0
+        for processor in processors:
+            processed_count += processor.process_batch()
+            metric_publisher.publish_projection_lag_metric(service_name=processor.name, lag=processor.get_lag())
+
+        if not processed_count:
+            time.sleep(PROJECTION_POLL_INTERVAL_SECONDS)
+
+
+def main():
+    set_up_read_model_indexes()
+    processors = build_projection_processors()
+
+    logger.info(f'Following Notification Logs of {[processor.name for processor in processors]}')
+    run_projection_processors(processors=processors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Runs a worker module in several processes, restarting the ones that crash.
+
+With --max-processes above --min-processes the number of processes follows the number of messages ready in the
+worker queue, one process per --messages-per-process, polled every WORKER_SCALE_INTERVAL_SECONDS. A process
+scaled down, or every process on SIGTERM, drains: it stops consuming and exits once its messages in flight are
+acked, or is killed after WORKER_DRAIN_TIMEOUT_SECONDS.
+
+Processes consuming one queue would handle the messages of an aggregate concurrently, so a worker which needs
+them in order runs one process per shard instead. Each process consumes the queue of its shard, passed to the
+main of the worker, and a crashed process is restarted on the same shard. Sharded workers do not autoscale.
+The store, task and user manager workers write aggregates but their queues are not sharded yet, they run a single
+process.
+
+Usage:
+    BANK_MANAGER_WORKER_SHARD_COUNT=4 python -m boe.workers.supervisor bank_manager_worker
+    python -m boe.workers.supervisor task_manager_worker
+    python -m boe.workers.supervisor my_package.my_worker --queue MY_QUEUE --min-processes 1 --max-processes 8
+"""
+import argparse
+import importlib
+import math
+import multiprocessing
+import signal
+import time
+from multiprocessing.context import BaseContext
+from typing import Callable, Dict, List, Optional
+
+from boe.env import (
+    AMQP_HOST,
+    BANK_MANAGER_WORKER_SHARD_COUNT,
+    WORKER_MIN_PROCESSES,
+    WORKER_MAX_PROCESSES,
+    WORKER_MESSAGES_PER_PROCESS,
+    WORKER_SCALE_INTERVAL_SECONDS,
+    WORKER_DRAIN_TIMEOUT_SECONDS
+)
+from boe.secrets import get_rabbitmq_credentials
+from cbaxter1988_utils.log_utils import get_logger
+from cbaxter1988_utils.pika_utils import RabbitConnection
+
+logger = get_logger("WorkerSupervisor")
+
+# Workers writing aggregates from one unsharded queue, a second process would handle the messages of an aggregate
+# concurrently and lose one of them to a version conflict
+SINGLE_PROCESS_WORKERS = frozenset({
+    "store_manager_worker",
+    "task_manager_worker",
+    "user_manager_worker",
+})
+
+# Shard count of the workers handling the messages of an aggregate in order, one process runs per shard
+SHARDED_WORKERS: Dict[str, int] = {
+    "bank_manager_worker": BANK_MANAGER_WORKER_SHARD_COUNT,
+}
+
+# A process exiting sooner than this after its start counts as crash looping, its restarts are backed off
+MIN_HEALTHY_UPTIME_SECONDS = 30
+MAX_RESTART_DELAY_SECONDS = 60
+
+
+def run_worker(module_name: str, **kwargs):
+    importlib.import_module(module_name).main(**kwargs)
+
+
+def _bootstrap_process(target: Callable[..., None], module_name: str, kwargs: dict):
+    # Forked processes inherit the supervisor's handlers. The supervisor handles SIGINT for the process group,
+    # the worker runtime installs its own SIGTERM handler.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    target(module_name, **kwargs)
+
+
+def get_queue_depth(queue: str) -> int:
+    amqp_username, amqp_password = get_rabbitmq_credentials()
+    with RabbitConnection(host=AMQP_HOST, user=amqp_username, password=amqp_password) as channel:
+        return channel.queue_declare(queue=queue, passive=True).method.message_count
+
+
+def get_desired_process_count(
+        queue_depth: int,
+        min_processes: int,
+        max_processes: int,
+        messages_per_process: int = WORKER_MESSAGES_PER_PROCESS
+) -> int:
+    return min(max_processes, max(min_processes, math.ceil(queue_depth / messages_per_process)))
+
+
+class WorkerSupervisor:
+    """
+    Keeps between min_processes and max_processes processes running the main of a worker module.
+
+    With a shard_count it keeps one process per shard instead, the main of each process is called with its shard.
+    A single_process worker refuses a max_processes above one.
+    """
+
+    def __init__(
+            self,
+            module_name: str,
+            min_processes: int = WORKER_MIN_PROCESSES,
+            max_processes: int = WORKER_MAX_PROCESSES,
+            queue: Optional[str] = None,
+            messages_per_process: int = WORKER_MESSAGES_PER_PROCESS,
+            scale_interval: float = WORKER_SCALE_INTERVAL_SECONDS,
+            drain_timeout: float = WORKER_DRAIN_TIMEOUT_SECONDS,
+            get_queue_depth: Callable[[str], int] = get_queue_depth,
+            context: BaseContext = None,
+            target: Callable[..., None] = run_worker,
+            shard_count: Optional[int] = None,
+            single_process: bool = False
+    ):
+        if shard_count is not None:
+            min_processes = max_processes = shard_count
+
+        if not 0 < min_processes <= max_processes:
+            raise ValueError(f"Invalid process range {min_processes}..{max_processes}")
+
+        if single_process and max_processes > 1:
+            raise ValueError(f"{module_name} runs a single process, got max_processes={max_processes}")
+
+        self.module_name = module_name
+        self.min_processes = min_processes
+        self.max_processes = max_processes
+        self.queue = queue
+        self.messages_per_process = messages_per_process
+        self.scale_interval = scale_interval
+        self.drain_timeout = drain_timeout
+        self.get_queue_depth = get_queue_depth
+        self.context = context or multiprocessing.get_context("fork")
+        self.target = target
+        self.shard_count = shard_count
+
+        self.processes: List[multiprocessing.Process] = []
+        self.shards: Dict[int, int] = {}
+        self.started_at: Dict[int, float] = {}
+        self.retiring: Dict[int, float] = {}
+        self.restarts = 0
+        self.stopping = False
+
+        self._restart_delay = 1.0
+        self._restart_at: List[float] = []
+        self._scaled_at = 0.0
+
+    @property
+    def autoscaling(self) -> bool:
+        return self.queue is not None and self.max_processes > self.min_processes
+
+    @property
+    def active_processes(self) -> List[multiprocessing.Process]:
+        return [process for process in self.processes if process.pid not in self.retiring]
+
+    def start_process(self) -> multiprocessing.Process:
+        """
+        Starts a process, on the lowest shard without one when sharded.
+        """
+        kwargs = {}
+        name = f"{self.module_name}-{len(self.processes)}"
+        if self.shard_count is not None:
+            free_shards = sorted(set(range(self.shard_count)) - set(self.shards.values()))
+            if not free_shards:
+                raise RuntimeError(f"Every shard of {self.module_name} already has a process")
+
+            kwargs["shard"] = free_shards[0]
+            name = f"{self.module_name}-shard-{free_shards[0]}"
+
+        process = self.context.Process(
+            target=_bootstrap_process,
+            args=(self.target, self.module_name, kwargs),
+            name=name,
+            daemon=False
+        )
+        process.start()
+
+        self.processes.append(process)
+        self.started_at[process.pid] = time.monotonic()
+        if "shard" in kwargs:
+            self.shards[process.pid] = kwargs["shard"]
+        logger.info(f"Started {name} pid={process.pid}")
+        return process
+
+    def retire_process(self, process: multiprocessing.Process):
+        """
+        Tells a process to drain, it is killed when it has not exited after drain_timeout.
+        """
+        self.retiring[process.pid] = time.monotonic() + self.drain_timeout
+        if process.is_alive():
+            process.terminate()
+
+    def reap(self):
+        """
+        Removes the processes that exited and schedules the restart of those that were not retiring.
+        """
+        now = time.monotonic()
+        for process in list(self.processes):
+            if process.is_alive():
+                if process.pid in self.retiring and now > self.retiring[process.pid]:
+                    logger.warning(f"pid={process.pid} did not drain in {self.drain_timeout}s, killing it")
+                    process.kill()
+                continue
+
+            process.join()
+            self.processes.remove(process)
+            self.shards.pop(process.pid, None)
+            uptime = now - self.started_at.pop(process.pid)
+            if self.retiring.pop(process.pid, None) is not None or self.stopping:
+                logger.info(f"pid={process.pid} exited with exitcode={process.exitcode}")
+                continue
+
+            logger.error(f"pid={process.pid} crashed with exitcode={process.exitcode} after {uptime:.0f}s")
+            self.restarts += 1
+            if uptime < MIN_HEALTHY_UPTIME_SECONDS:
+                self._restart_delay = min(self._restart_delay * 2, MAX_RESTART_DELAY_SECONDS)
+            else:
+                self._restart_delay = 1.0
+            self._restart_at.append(now + self._restart_delay)
+
+        for restart_at in list(self._restart_at):
+            if restart_at <= now and not self.stopping:
+                self._restart_at.remove(restart_at)
+                self.start_process()
+
+    def scale(self):
+        """
+        Starts or retires a process to move towards the process count the queue depth calls for.
+        """
+        try:
+            queue_depth = self.get_queue_depth(self.queue)
+        except Exception as err:
+            logger.warning(f"Could not read the depth of {self.queue}: {err!r}")
+            return
+
+        current = len(self.active_processes) + len(self._restart_at)
+        desired = get_desired_process_count(
+            queue_depth=queue_depth,
+            min_processes=self.min_processes,
+            max_processes=self.max_processes,
+            messages_per_process=self.messages_per_process
+        )
+
+        if desired > current:
+            logger.info(f"Scaling up to {desired} processes, {queue_depth} messages ready in {self.queue}")
+            for _ in range(desired - current):
+                self.start_process()
+        elif desired < current and self.active_processes:
+            # Scales down one process per interval, so a short lull does not drain the whole pool
+            logger.info(f"Scaling down to {current - 1} processes, {queue_depth} messages ready in {self.queue}")
+            self.retire_process(process=self.active_processes[-1])
+
+    def tick(self):
+        self.reap()
+
+        if self.autoscaling and time.monotonic() - self._scaled_at >= self.scale_interval:
+            self._scaled_at = time.monotonic()
+            self.scale()
+
+    def stop(self):
+        """
+        Drains every process, killing those still running after drain_timeout.
+        """
+        self.stopping = True
+        for process in self.processes:
+            self.retire_process(process=process)
+
+        deadline = time.monotonic() + self.drain_timeout
+        for process in self.processes:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"pid={process.pid} did not drain in {self.drain_timeout}s, killing it")
+                process.kill()
+                process.join()
+
+        self.reap()
+
+    def _on_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, draining {len(self.processes)} processes")
+        self.stopping = True
+
+    def run(self, poll_interval: float = 1.0):
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+
+        for _ in range(self.min_processes):
+            self.start_process()
+
+        try:
+            while not self.stopping:
+                self.tick()
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+
+        logger.info(f"Stopped {self.module_name}, {self.restarts} restarts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a worker module in several processes")
+    parser.add_argument(
+        "worker",
+        help=f"one of {sorted([*SINGLE_PROCESS_WORKERS, *SHARDED_WORKERS])} or the path of a module with a main"
+    )
+    parser.add_argument("--processes", type=int, help="fixed number of processes, overrides the min and max")
+    parser.add_argument("--min-processes", type=int, default=WORKER_MIN_PROCESSES)
+    parser.add_argument("--max-processes", type=int, default=WORKER_MAX_PROCESSES)
+    parser.add_argument("--queue", help="queue whose depth drives autoscaling")
+    parser.add_argument("--messages-per-process", type=int, default=WORKER_MESSAGES_PER_PROCESS)
+    args = parser.parse_args()
+
+    module_name = args.worker if "." in args.worker else f"boe.workers.{args.worker}"
+    shard_count = SHARDED_WORKERS.get(args.worker)
+    if shard_count is not None and args.processes and args.processes != shard_count:
+        parser.error(f"{args.worker} runs one process per shard, set its shard count to {args.processes} instead")
+
+    if args.processes:
+        min_processes = max_processes = args.processes
+    else:
+        min_processes, max_processes = args.min_processes, max(args.min_processes, args.max_processes)
+
+    single_process = args.worker in SINGLE_PROCESS_WORKERS
+    if single_process and max_processes > 1:
+        parser.error(
+            f"{args.worker} writes aggregates from an unsharded queue and runs a single process, "
+            f"got --processes/--max-processes {max_processes}"
+        )
+
+    supervisor = WorkerSupervisor(
+        module_name=module_name,
+        min_processes=min_processes,
+        max_processes=max_processes,
+        queue=args.queue,
+        messages_per_process=args.messages_per_process,
+        shard_count=shard_count,
+        single_process=single_process
+    )
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
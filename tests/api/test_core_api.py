@@ -0,0 +1,45 @@
+import uuid
+from http import HTTPStatus
+from unittest.mock import patch
+
+from boe.api.core_api import app
+from pytest import fixture
+
+
+@fixture
+def blob_store_mock():
+    with patch("boe.api.core_api.get_blob_store") as get_blob_store_mock:
+        yield get_blob_store_mock.return_value
+
+
+@fixture
+def task_manager_client_mock():
+    with patch("boe.api.core_api.TaskManagerWorkerClient") as client_mock:
+        yield client_mock.return_value
+
+
+@fixture
+def client_testable():
+    return app.test_client()
+
+
+def test_upload_task_evidence(client_testable, blob_store_mock, task_manager_client_mock):
+    task_id = uuid.uuid4()
+    blob_store_mock.put_stream.return_value = {"hash": "b" * 64}
+
+    response = client_testable.post(f"/api/v1/task/{task_id}/evidence", data=b"evidence", content_type="image/jpeg")
+
+    assert response.status_code == HTTPStatus.OK
+    assert blob_store_mock.put_stream.call_args.kwargs["mime_type"] == "image/jpeg"
+    task_manager_client_mock.publish_attach_evidence_event.assert_called_once_with(
+        task_id=task_id,
+        blob_ref=blob_store_mock.put_stream.return_value
+    )
+
+
+def test_upload_task_evidence_when_task_id_is_invalid(client_testable, blob_store_mock, task_manager_client_mock):
+    response = client_testable.post("/api/v1/task/not-a-uuid/evidence", data=b"evidence")
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    blob_store_mock.put_stream.assert_not_called()
+    task_manager_client_mock.publish_attach_evidence_event.assert_not_called()
@@ -11,6 +11,7 @@ from boe.lib.domains.bank_domain import (
     BankDomainAggregate,
     BankTransactionMethodEnum
 )
+import pytest
 from pytest import fixture
 
 
@@ -98,3 +99,145 @@ def test_bank_manager_app_when_handling_new_transaction_event(
     write_model_mock.assert_called()
     notification_worker_client_mock.assert_called()
     metric_publisher_mock.assert_called()
+
+
+def test_bank_manager_app_when_snapshotting_account(
+        metric_publisher_mock,
+        write_model_mock,
+        notification_worker_client_mock,
+        establish_new_account_event,
+):
+    with patch.object(BankManagerApp, "snapshotting_intervals", {BankDomainAggregate: 2}):
+        app = BankManagerApp()
+
+        app.handle_event(establish_new_account_event)
+        for _ in range(3):
+            aggregate_id = app.handle_event(
+                BankDomainAppEventFactory.build_new_transaction_event(
+                    account_id=str(establish_new_account_event.owner_id),
+                    item_id=str(uuid4()),
+                    value=5,
+                    transaction_method=BankTransactionMethodEnum.add
+                )
+            )
+
+    snapshots = list(app.snapshots.get(originator_id=aggregate_id))
+    aggregate = app.repository.get(aggregate_id=aggregate_id)
+
+    assert [snapshot.originator_version for snapshot in snapshots] == [2, 4]
+    assert aggregate.bank_account.balance == 15
+    assert len(aggregate.bank_transactions) == 3
+
+
+def test_bank_manager_app_when_handling_new_transaction_batch_event(
+        metric_publisher_mock,
+        write_model_mock,
+        notification_worker_client_mock,
+        bank_manager_app_testable,
+        establish_new_account_event,
+):
+    app = bank_manager_app_testable
+    app.handle_event(establish_new_account_event)
+
+    batch_event = BankDomainAppEventFactory.build_new_transaction_batch_event(
+        account_id=str(establish_new_account_event.owner_id),
+        transactions=[
+            {"item_id": str(uuid4()), "transaction_method": BankTransactionMethodEnum.add.value, "value": 10},
+            {"item_id": str(uuid4()), "transaction_method": BankTransactionMethodEnum.add.value, "value": 5},
+            {"item_id": str(uuid4()), "transaction_method": BankTransactionMethodEnum.subtract.value, "value": 3},
+        ]
+    )
+
+    aggregate_id = app.handle_event(batch_event)
+    aggregate = app.repository.get(aggregate_id=aggregate_id)
+
+    assert aggregate.bank_account.balance == 12
+    assert len(aggregate.bank_transactions) == 3
+    assert aggregate.version == 2
+    write_model_mock.return_value.save_bank_aggregate.assert_called()
+
+
+def test_bank_manager_app_when_handling_transactions_in_unit_of_work(
+        metric_publisher_mock,
+        write_model_mock,
+        notification_worker_client_mock,
+        establish_new_account_event,
+):
+    with patch.object(BankManagerApp, "snapshotting_intervals", {BankDomainAggregate: 2}):
+        app = BankManagerApp()
+        app.handle_event(establish_new_account_event)
+        write_model_mock.return_value.save_bank_aggregate.reset_mock()
+
+        with app.unit_of_work():
+            for _ in range(3):
+                aggregate_id = app.handle_event(
+                    BankDomainAppEventFactory.build_new_transaction_event(
+                        account_id=str(establish_new_account_event.owner_id),
+                        item_id=str(uuid4()),
+                        value=5,
+                        transaction_method=BankTransactionMethodEnum.add
+                    )
+                )
+
+    snapshots = list(app.snapshots.get(originator_id=aggregate_id))
+    aggregate = app.repository.get(aggregate_id=aggregate_id)
+
+    assert aggregate.bank_account.balance == 15
+    assert aggregate.version == 4
+    assert [snapshot.originator_version for snapshot in snapshots] == [2, 4]
+    write_model_mock.return_value.save_bank_aggregate.assert_called_once()
+
+
+def test_bank_manager_app_when_notifying_in_unit_of_work(
+        metric_publisher_mock,
+        write_model_mock,
+        notification_worker_client_mock,
+        bank_manager_app_testable,
+        establish_new_account_event,
+):
+    app = bank_manager_app_testable
+    app.handle_event(establish_new_account_event)
+    publish_app_event_mock = notification_worker_client_mock.return_value.publish_app_event
+    publish_app_event_mock.reset_mock()
+
+    with app.unit_of_work():
+        app.handle_event(
+            BankDomainAppEventFactory.build_new_transaction_event(
+                account_id=str(establish_new_account_event.owner_id),
+                item_id=str(uuid4()),
+                value=5,
+                transaction_method=BankTransactionMethodEnum.add
+            )
+        )
+
+        publish_app_event_mock.assert_not_called()
+
+    publish_app_event_mock.assert_called_once()
+
+
+def test_bank_manager_app_when_save_fails_in_unit_of_work(
+        metric_publisher_mock,
+        write_model_mock,
+        notification_worker_client_mock,
+        bank_manager_app_testable,
+        establish_new_account_event,
+):
+    app = bank_manager_app_testable
+    app.handle_event(establish_new_account_event)
+    publish_app_event_mock = notification_worker_client_mock.return_value.publish_app_event
+    publish_app_event_mock.reset_mock()
+
+    with patch.object(app, "save", side_effect=RuntimeError("event store down")), pytest.raises(RuntimeError):
+        with app.unit_of_work():
+            app.handle_event(
+                BankDomainAppEventFactory.build_new_transaction_event(
+                    account_id=str(establish_new_account_event.owner_id),
+                    item_id=str(uuid4()),
+                    value=5,
+                    transaction_method=BankTransactionMethodEnum.add
+                )
+            )
+
+    publish_app_event_mock.assert_not_called()
+    metric_publisher_mock.return_value.incr_transaction_processed_success_metric.assert_not_called()
+    assert app.repository.commit_callbacks == []
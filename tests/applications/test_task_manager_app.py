@@ -2,6 +2,8 @@ import datetime
 import uuid
 from unittest.mock import patch
 
+import pytest
+from boe.lib.blob_store import BlobNotFound, BlobRef
 from boe.applications.task_domain_apps import (
     TaskManagerApp,
     TaskManagerAppEventFactory,
@@ -17,7 +19,13 @@ def write_model_mock():
 
 
 @fixture
-def task_manager_app_testable():
+def blob_store_mock():
+    with patch("boe.applications.task_domain_apps.get_blob_store") as get_blob_store_mock:
+        yield get_blob_store_mock.return_value
+
+
+@fixture
+def task_manager_app_testable(blob_store_mock):
     return TaskManagerApp()
 
 
@@ -99,10 +107,12 @@ def test_task_manager_app_when_handling_update_task_value_event(
 
 def test_task_manager_app_when_handling_add_evidence_event(
         write_model_mock,
+        blob_store_mock,
         task_manager_app_testable,
         new_task_event_evidence_required
 ):
     app = task_manager_app_testable
+    blob_store_mock.put.return_value = BlobRef(hash='a' * 64, size=17, mime_type='application/octet-stream')
 
     task_id = app.handle_event(new_task_event_evidence_required)
 
@@ -115,5 +125,55 @@ def test_task_manager_app_when_handling_add_evidence_event(
 
     aggregate = app.get_task_aggregate(task_id=task_id)
 
-    assert aggregate.task.evidence_data == b'This is Test Data'
-    write_model_mock.assert_called()
\ No newline at end of file
+    blob_store_mock.put.assert_called_with(data=b'This is Test Data')
+    assert aggregate.task.evidence == blob_store_mock.put.return_value
+    assert aggregate.task.evidence_data is None
+    write_model_mock.assert_called()
+
+
+def test_task_manager_app_when_handling_attach_evidence_event(
+        write_model_mock,
+        task_manager_app_testable,
+        new_task_event_evidence_required
+):
+    app = task_manager_app_testable
+
+    task_id = app.handle_event(new_task_event_evidence_required)
+
+    evidence_event = TaskManagerAppEventFactory.build_attach_evidence_event(
+        task_id=str(task_id),
+        evidence_hash='b' * 64,
+        evidence_size=2048,
+        evidence_mime_type='image/jpeg'
+    )
+
+    app.handle_event(evidence_event)
+
+    aggregate = app.get_task_aggregate(task_id=task_id)
+
+    assert aggregate.task.evidence == BlobRef(hash='b' * 64, size=2048, mime_type='image/jpeg')
+    write_model_mock.assert_called()
+
+
+def test_task_manager_app_when_attaching_missing_evidence(
+        write_model_mock,
+        blob_store_mock,
+        task_manager_app_testable,
+        new_task_event_evidence_required
+):
+    app = task_manager_app_testable
+    blob_store_mock.exists.return_value = False
+
+    task_id = app.handle_event(new_task_event_evidence_required)
+
+    evidence_event = TaskManagerAppEventFactory.build_attach_evidence_event(
+        task_id=str(task_id),
+        evidence_hash='b' * 64,
+        evidence_size=2048,
+        evidence_mime_type='image/jpeg'
+    )
+
+    with pytest.raises(BlobNotFound):
+        app.handle_event(evidence_event)
+
+    assert app.get_task_aggregate(task_id=task_id).task.evidence is None
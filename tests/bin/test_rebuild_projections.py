@@ -0,0 +1,100 @@
+import datetime
+import uuid
+from unittest.mock import MagicMock, patch
+
+from bin import rebuild_projections
+from bin.rebuild_projections import (
+    drop_projections,
+    load_checkpoint,
+    make_chunks,
+    rebuild_chunk,
+    save_checkpoint
+)
+from boe.applications.task_domain_apps import TaskManagerApp, TaskManagerAppEventFactory
+from boe.utils.sharding_utils import get_shard_for_aggregate_id
+from pytest import fixture
+
+
+@fixture
+def task_manager_app_testable():
+    with patch("boe.applications.task_domain_apps.TaskDomainWriteModel"), \
+            patch("boe.applications.task_domain_apps.get_blob_store"):
+        app = TaskManagerApp()
+
+    app.write_model = MagicMock()
+    return app
+
+
+@fixture
+def worker_app_testable(monkeypatch, task_manager_app_testable):
+    monkeypatch.setattr(rebuild_projections, "_worker_app", task_manager_app_testable)
+    return task_manager_app_testable
+
+
+def _create_task(app: TaskManagerApp) -> uuid.UUID:
+    return app.handle_event(
+        TaskManagerAppEventFactory.build_new_task_event(
+            owner_id=str(uuid.uuid4()),
+            evidence_required=False,
+            due_date=datetime.datetime(year=2022, day=2, month=12),
+            description='Test Task',
+            name='TestTask',
+            value=5.00,
+            task_id=str(uuid.uuid4())
+        )
+    )
+
+
+def test_make_chunks():
+    aggregate_ids = [uuid.uuid4() for _ in range(20)]
+
+    chunks = make_chunks(aggregate_ids=aggregate_ids, partition_count=3, chunk_size=4)
+
+    assert sorted(aggregate_id for chunk in chunks for aggregate_id in chunk) == sorted(aggregate_ids)
+    assert all(0 < len(chunk) <= 4 for chunk in chunks)
+    for chunk in chunks:
+        shards = {get_shard_for_aggregate_id(aggregate_id=aggregate_id, shard_count=3) for aggregate_id in chunk}
+        assert len(shards) == 1
+
+
+def test_make_chunks_when_no_aggregates():
+    assert make_chunks(aggregate_ids=[], partition_count=4, chunk_size=10) == []
+
+
+def test_checkpoint_when_resuming(tmp_path):
+    checkpoint_path = str(tmp_path / "task.ckpt")
+    aggregate_ids = [uuid.uuid4() for _ in range(3)]
+
+    save_checkpoint(checkpoint_path=checkpoint_path, aggregate_ids=aggregate_ids[:1])
+    save_checkpoint(checkpoint_path=checkpoint_path, aggregate_ids=aggregate_ids[1:])
+
+    assert load_checkpoint(checkpoint_path=checkpoint_path) == set(aggregate_ids)
+
+
+def test_checkpoint_when_missing(tmp_path):
+    assert load_checkpoint(checkpoint_path=str(tmp_path / "missing.ckpt")) == set()
+    assert load_checkpoint(checkpoint_path=None) == set()
+
+
+def test_rebuild_chunk(worker_app_testable):
+    app = worker_app_testable
+    task_ids = [_create_task(app=app) for _ in range(2)]
+    app.write_model.reset_mock()
+
+    chunk_ids, event_count = rebuild_chunk(aggregate_ids=task_ids)
+
+    saved_aggregates = [call.args[0] for call in app.write_model.save_aggregate.call_args_list]
+    assert chunk_ids == task_ids
+    assert event_count == 2
+    assert [aggregate.id for aggregate in saved_aggregates] == task_ids
+    app.write_model.flush.assert_called_once()
+
+
+def test_drop_projections():
+    with patch("boe.lib.mongo_client_registry.get_mongo_client") as get_mongo_client_mock, \
+            patch("boe.lib.domains.read_model_indexes.set_up_read_model_indexes") as set_up_indexes_mock:
+        drop_projections(domain="bank")
+
+    database = get_mongo_client_mock.return_value.__getitem__.return_value
+    assert database.drop_collection.call_count == 2
+    set_up_indexes_mock.assert_called_once()
@@ -1,6 +1,8 @@
 import os
+from unittest.mock import Mock
 from uuid import UUID
 
+from boe.secrets import SecretProvider, set_secret_provider
 from pytest import fixture
 
 
@@ -9,6 +11,17 @@ def set_stage():
     os.environ['STAGE'] = 'TEST'
 
 
+@fixture(autouse=True)
+def set_secrets():
+    provider = Mock(spec=SecretProvider)
+    provider.get_secret.side_effect = lambda secret_name: {"username": "test", "password": "test"}
+    set_secret_provider(provider)
+
+    yield provider
+
+    set_secret_provider(None)
+
+
 @fixture
 def set_env():
     INFRASTRUCTURE_FACTORY = "eventsourcing.sqlite:Factory"
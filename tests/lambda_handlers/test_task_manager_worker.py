@@ -0,0 +1,59 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from uuid import UUID
+
+from boe.lib.blob_store import BLOB_STORE_BACKENDS, LocalFileBlobStore
+from pytest import fixture
+
+HANDLER_MODULE = "boe.lambda_handlers.task_manager_worker"
+
+EVENTS_PATH = Path(__file__).parent / "events"
+
+
+@fixture
+def sqs_event():
+    with open(EVENTS_PATH / "task_manager_sqs_event.json") as event_file:
+        return json.load(event_file)
+
+
+@fixture
+def handler_module(monkeypatch):
+    monkeypatch.setenv("INFRASTRUCTURE_FACTORY", "eventsourcing.popo:Factory")
+    monkeypatch.delenv("BLOB_STORE_PATH", raising=False)
+    monkeypatch.setitem(BLOB_STORE_BACKENDS, "local", LocalFileBlobStore)
+    with patch("boe.applications.task_domain_apps.TaskDomainWriteModel"), \
+            patch("boe.applications.task_domain_apps.get_blob_store"):
+        sys.modules.pop(HANDLER_MODULE, None)
+        yield importlib.import_module(HANDLER_MODULE)
+
+    sys.modules.pop(HANDLER_MODULE, None)
+
+
+def test_handler_when_handling_sqs_event(handler_module, sqs_event):
+    response = handler_module.handler(sqs_event, None)
+
+    assert response == {"batchItemFailures": [
+        {"itemIdentifier": "00000000-0000-0000-0000-000000000003"},
+        {"itemIdentifier": "00000000-0000-0000-0000-000000000004"},
+    ]}
+    task = handler_module.app.get_task_aggregate(task_id=UUID("10000000-0000-0000-0000-000000000001"))
+    assert task.task.value == 10.0
+
+
+def test_handler_when_invoked_twice(handler_module, sqs_event):
+    app = handler_module.app
+
+    handler_module.handler({"Records": sqs_event["Records"][:1]}, None)
+    response = handler_module.handler({"Records": sqs_event["Records"][1:2]}, None)
+
+    assert response == {"batchItemFailures": []}
+    assert handler_module.app is app
+    assert handler_module.worker.timings.count == 2
+
+
+
+def test_handler_when_blob_store_is_local(handler_module):
+    assert BLOB_STORE_BACKENDS["local"]().root_path == handler_module.LAMBDA_BLOB_STORE_PATH
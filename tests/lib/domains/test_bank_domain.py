@@ -1,3 +1,5 @@
+from copy import deepcopy
+from unittest.mock import patch
 from uuid import UUID, uuid4
 
 import pytest
@@ -10,8 +12,11 @@ from boe.lib.domains.bank_domain import (
     BankDomainFactory,
     BankDomainRepository,
     BankTransactionValueObject,
-    BankAccountStateEnum
+    BankAccountStateEnum,
+    BankDomainIntegrityError
 )
+from boe.utils.bson_utils import decode_uuid
+from eventsourcing.application import mutate_aggregate
 from pytest import fixture
 
 
@@ -195,3 +200,204 @@ def test_bank_account_aggregate_when_fetching_transaction_fails(
     aggregate: BankDomainAggregate = bank_domain_aggregate_testable
     with pytest.raises(ValueError):
         aggregate.get_transaction_by_id(transaction_id=uuid4())
+
+
+def test_bank_account_aggregate_when_tracking_method_subtotals(
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_subtract_testable)
+
+    assert aggregate.bank_account.balance == 90
+    assert aggregate.bank_account.balance == aggregate.calculate_account_balance()
+    assert aggregate.method_subtotals == {
+        BankTransactionMethodEnum.add: 100,
+        BankTransactionMethodEnum.subtract: 10
+    }
+
+
+def test_bank_account_aggregate_when_replaying_events(
+        bank_domain_aggregate_testable,
+        bank_account_uuid
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    created_events = deepcopy(aggregate.collect_events())
+
+    for value in range(1, 11):
+        aggregate.new_transaction(
+            account_id=bank_account_uuid,
+            item_id=uuid4(),
+            method=BankTransactionMethodEnum.add,
+            value=value
+        )
+
+    replayed_aggregate = mutate_aggregate(None, created_events + aggregate.collect_events())
+
+    assert replayed_aggregate.bank_account.balance == 55
+    assert replayed_aggregate.method_subtotals == aggregate.method_subtotals
+    replayed_aggregate.verify_account_balance()
+
+
+def test_bank_account_aggregate_when_integrity_check_fails(
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    aggregate.integrity_check_enabled = True
+
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+    aggregate.bank_transactions.clear()
+
+    with pytest.raises(BankDomainIntegrityError):
+        aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+
+
+def test_bank_account_aggregate_when_fetching_transactions_by_item_id(
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable,
+        item_uuid
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+
+    assert len(aggregate.get_transactions_by_item_id(item_id=item_uuid)) == 1
+
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_subtract_testable)
+    aggregate.new_transaction(
+        account_id=aggregate.id,
+        item_id=item_uuid,
+        method=BankTransactionMethodEnum.add,
+        value=5
+    )
+
+    transactions = aggregate.get_transactions_by_item_id(item_id=item_uuid)
+
+    assert [transaction.value for transaction in transactions] == [100, 5]
+    assert aggregate.get_transactions_by_item_id(item_id=uuid4()) == []
+
+
+def test_bank_account_aggregate_when_fetching_transactions_by_day(
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_subtract_testable)
+
+    transactions = aggregate.get_transactions_by_day(day=bank_transaction_entity_add_testable.created.date())
+
+    assert len(transactions) == 2
+    assert aggregate.get_transaction_by_id(
+        transaction_id=bank_transaction_entity_subtract_testable.id
+    ).value == 10
+
+
+@fixture
+def mongo_client_mock():
+    with patch("boe.lib.domains.bank_domain.get_mongo_client") as client_mock:
+        yield client_mock
+
+
+def test_bank_account_aggregate_when_fetching_unsaved_transactions(
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+    aggregate.collect_events()
+
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_subtract_testable)
+    aggregate.disable_account()
+
+    assert aggregate.get_unsaved_transactions() == [bank_transaction_entity_subtract_testable]
+
+
+def test_bank_domain_write_model_when_saving_aggregate(
+        mongo_client_mock,
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable
+):
+    write_model = BankDomainWriteModel()
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+
+    write_model.save_bank_aggregate(aggregate=aggregate)
+
+    collection = write_model.db.__getitem__.return_value
+    transaction_items = [request._doc for request in collection.bulk_write.call_args.kwargs['requests']]
+    account_query, account_update = collection.update_one.call_args.args
+    account_item = account_update['$set']
+
+    assert account_update['$unset'] == {"bank_account": "", "bank_transactions": ""}
+    assert {"version": {"$lte": aggregate.version}} in account_query['$or']
+    assert [decode_uuid(item['id']) for item in transaction_items] == [bank_transaction_entity_add_testable.id]
+    assert account_item['balance'] == 100
+    assert account_item['version'] == aggregate.version
+    assert 'transactions' not in account_item
+
+
+def test_bank_domain_write_model_when_saving_aggregate_delta(
+        mongo_client_mock,
+        bank_domain_aggregate_testable,
+        bank_transaction_entity_add_testable
+):
+    write_model = BankDomainWriteModel()
+    collection = write_model.db.__getitem__.return_value
+    collection.update_one.return_value.matched_count = 1
+
+    aggregate: BankDomainAggregate = bank_domain_aggregate_testable
+    aggregate.collect_events()
+    aggregate.apply_transaction_to_account(transaction=bank_transaction_entity_add_testable)
+    aggregate.disable_account()
+
+    write_model.save_bank_aggregate(aggregate=aggregate)
+
+    account_query, account_update = collection.update_one.call_args.args
+
+    assert account_query['version'] == aggregate.version - 2
+    assert account_update == {
+        "$set": {"balance": 100, "state": BankAccountStateEnum.disabled.value, "version": aggregate.version}
+    }
+
+
+def test_bank_account_aggregate_when_applying_transaction_batch(
+        bank_domain_aggregate_no_transactions_testable,
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_no_transactions_testable
+    transactions = [bank_transaction_entity_add_testable, bank_transaction_entity_subtract_testable]
+
+    aggregate.apply_transactions_to_account(transactions=transactions)
+
+    assert aggregate.bank_account.balance == 90
+    assert len(aggregate.pending_events) == 2
+    assert aggregate.get_unsaved_transactions() == transactions
+
+
+def test_bank_account_aggregate_when_fetching_unsaved_transaction_records(
+        bank_domain_aggregate_no_transactions_testable,
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable
+):
+    aggregate: BankDomainAggregate = bank_domain_aggregate_no_transactions_testable
+    aggregate.apply_transactions_to_account(
+        transactions=[bank_transaction_entity_add_testable, bank_transaction_entity_subtract_testable]
+    )
+    domain_events = aggregate.collect_events()
+
+    records = aggregate.get_unsaved_transaction_records(domain_events=domain_events)
+
+    assert [transaction for _, transaction in records] == [
+        bank_transaction_entity_add_testable,
+        bank_transaction_entity_subtract_testable
+    ]
+    assert len({record_id for record_id, _ in records}) == 2
+    assert aggregate.get_unsaved_transaction_records(domain_events=domain_events) == records
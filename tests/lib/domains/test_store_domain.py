@@ -11,7 +11,7 @@ from uuid import UUID
 
 @fixture
 def mongo_client_mock():
-    with patch("boe.lib.domains.store_domain.get_mongo_client_w_auth", autospec=True) as client_mock:
+    with patch("boe.lib.domains.store_domain.get_mongo_client", autospec=True) as client_mock:
         yield client_mock
 
 @fixture
@@ -1,6 +1,7 @@
 import datetime
 import uuid
 
+from boe.lib.blob_store import BlobRef
 from boe.lib.domains.task_domain import (
     TaskDomainFactory,
     TaskStatusEnum,
@@ -53,3 +54,12 @@ def test_task_aggregate_when_changing_value(task_aggregate_evidence_required_tes
     task_aggregate.change_value(value=300)
 
     assert task_aggregate.task.value == 300
+
+
+def test_task_aggregate_when_attaching_evidence(task_aggregate_evidence_required_testable):
+    task_aggregate = task_aggregate_evidence_required_testable
+
+    task_aggregate.attach_task_evidence(blob_hash='a' * 64, size=1024, mime_type='image/png')
+
+    assert task_aggregate.task.evidence == BlobRef(hash='a' * 64, size=1024, mime_type='image/png')
+    assert task_aggregate.task.evidence_data is None
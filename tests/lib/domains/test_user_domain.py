@@ -13,19 +13,14 @@ from boe.lib.domains.user_domain import (
 
     UserAccountTypeEnum
 )
+from boe.utils.bson_utils import encode_value
 from pytest import fixture
 from unittest.mock import patch
 
 
 @fixture()
-def add_item_utils_mock():
-    with patch("boe.lib.domains.user_domain.add_item", autospec=True) as mock:
-        yield mock
-
-
-@fixture()
-def update_item_utils_mock():
-    with patch("boe.lib.domains.user_domain.update_item", autospec=True) as mock:
+def projection_writer_mock():
+    with patch("boe.lib.domains.user_domain.ProjectionWriter", autospec=True) as mock:
         yield mock
 
 
@@ -190,7 +185,7 @@ def test_family_aggregate_when_changing_subscription(
 
 
 def test_user_domain_write_model_when_saving_family_aggregate(
-        add_item_utils_mock,
+        projection_writer_mock,
         family_aggregate,
         user_account_aggregate_w_local_credentials_adult,
         user_domain_write_model
@@ -198,9 +193,14 @@ def test_user_domain_write_model_when_saving_family_aggregate(
     family_aggregate.add_family_member(user_aggregate_id=user_account_aggregate_w_local_credentials_adult.id)
     user_domain_write_model.save_aggregate(family_aggregate)
 
+    save_kwargs = user_domain_write_model.family_writer.save_aggregate.call_args.kwargs
+    assert save_kwargs['aggregate'] is family_aggregate
+    user_account_id = user_account_aggregate_w_local_credentials_adult.id
+    assert save_kwargs['build_document']()['members'] == [encode_value(user_account_id)]
+
 
 def test_user_domain_write_model_when_saving_user_account_aggregate(
-        add_item_utils_mock,
+        projection_writer_mock,
         family_aggregate,
         user_account_aggregate_w_local_credentials_adult,
         user_domain_write_model
@@ -210,7 +210,7 @@ def test_user_domain_write_model_when_saving_user_account_aggregate(
 
 
 def test_user_domain_query_model_when_fetching_family_by_id(
-        add_item_utils_mock,
+        projection_writer_mock,
         get_item_utils_mock,
         user_domain_query_model,
         user_domain_write_model,
@@ -229,7 +229,7 @@ def test_user_domain_query_model_when_fetching_family_by_id(
 
 
 def test_user_domain_query_model_when_fetching_user_account_by_id(
-        add_item_utils_mock,
+        projection_writer_mock,
         get_item_utils_mock,
         user_domain_query_model,
         user_domain_write_model,
@@ -246,7 +246,7 @@ def test_user_domain_query_model_when_fetching_user_account_by_id(
 
 
 def test_user_domain_query_model_when_fetching_local_user_credentials(
-        add_item_utils_mock,
+        projection_writer_mock,
         get_item_utils_mock,
         user_domain_query_model,
         user_domain_write_model,
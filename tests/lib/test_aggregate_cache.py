@@ -0,0 +1,181 @@
+from unittest.mock import patch
+
+from boe.lib.aggregate_cache import AggregateCache, CachedApplication
+from eventsourcing.application import Repository
+from eventsourcing.domain import Aggregate, event
+from pytest import fixture
+
+
+class CounterAggregate(Aggregate):
+    def __init__(self):
+        self.count = 0
+
+    @event
+    def increment(self):
+        self.count += 1
+
+
+@fixture
+def cached_app_testable():
+    return CachedApplication()
+
+
+@fixture
+def saved_counter_aggregate(cached_app_testable):
+    aggregate = CounterAggregate()
+    cached_app_testable.save(aggregate)
+    return aggregate
+
+
+def test_cached_repository_when_getting_saved_aggregate(cached_app_testable, saved_counter_aggregate):
+    app = cached_app_testable
+
+    aggregate = app.repository.get(saved_counter_aggregate.id)
+
+    assert aggregate is saved_counter_aggregate
+    assert app.repository.cache.hits == 1
+    assert app.repository.cache.misses == 0
+
+
+def test_cached_repository_when_aggregate_not_saved_after_get(cached_app_testable, saved_counter_aggregate):
+    app = cached_app_testable
+
+    aggregate = app.repository.get(saved_counter_aggregate.id)
+    aggregate.increment()
+
+    aggregate = app.repository.get(saved_counter_aggregate.id)
+
+    assert aggregate is not saved_counter_aggregate
+    assert aggregate.count == 0
+    assert app.repository.cache.misses == 1
+
+
+def test_cached_repository_when_reading_without_checkout(cached_app_testable, saved_counter_aggregate):
+    app = cached_app_testable
+
+    app.repository.get(saved_counter_aggregate.id, checkout=False)
+    aggregate = app.repository.get(saved_counter_aggregate.id, checkout=False)
+
+    assert aggregate is saved_counter_aggregate
+    assert app.repository.cache.hits == 2
+    assert len(app.repository.cache) == 1
+
+
+def test_cached_repository_when_reading_uncached_aggregate(cached_app_testable, saved_counter_aggregate):
+    app = cached_app_testable
+    app.repository.cache.clear()
+
+    aggregate = app.repository.get(saved_counter_aggregate.id, checkout=False)
+
+    assert app.repository.get(saved_counter_aggregate.id) is aggregate
+    assert app.repository.cache.misses == 1
+    assert app.repository.cache.hits == 1
+
+
+def test_cached_repository_when_event_store_has_newer_version(cached_app_testable, saved_counter_aggregate):
+    app = cached_app_testable
+
+    other_writer_copy = Repository.get(app.repository, saved_counter_aggregate.id)
+    other_writer_copy.increment()
+    app.events.put(other_writer_copy.collect_events())
+
+    aggregate = app.repository.get(saved_counter_aggregate.id)
+
+    assert aggregate.count == 1
+    assert aggregate.version == other_writer_copy.version
+    assert app.repository.cache.stale == 1
+
+
+def test_aggregate_cache_when_exceeding_max_size():
+    cache = AggregateCache(max_size=2)
+    aggregates = [CounterAggregate() for _ in range(3)]
+    for aggregate in aggregates:
+        aggregate.collect_events()
+        cache.put(aggregate)
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.checkout(aggregates[0].id) is None
+    assert cache.checkout(aggregates[2].id) is aggregates[2]
+
+
+class CounterApp(CachedApplication):
+    async_projections = False
+
+    def __init__(self):
+        super().__init__()
+        self.projected = []
+        self.saves = 0
+
+    def save_projection(self, aggregate, domain_events):
+        self.projected.append((aggregate.id, len(domain_events)))
+
+    def save(self, *aggregates, **kwargs):
+        self.saves += 1
+        super().save(*aggregates, **kwargs)
+
+    def increment(self, aggregate_id):
+        aggregate = self.repository.get(aggregate_id)
+        aggregate.increment()
+        self._save_aggregate(aggregate=aggregate)
+
+
+@fixture
+def counter_app_testable():
+    app = CounterApp()
+    aggregate = CounterAggregate()
+    app._save_aggregate(aggregate=aggregate)
+    app.projected.clear()
+    app.saves = 0
+    return app, aggregate.id
+
+
+def test_unit_of_work_saves_each_aggregate_once(counter_app_testable):
+    app, aggregate_id = counter_app_testable
+
+    with app.unit_of_work():
+        for _ in range(3):
+            app.increment(aggregate_id)
+
+        assert app.saves == 0
+
+    assert app.saves == 1
+    assert app.projected == [(aggregate_id, 3)]
+    assert app.repository.get(aggregate_id).count == 3
+    assert app.repository.unit_of_work is None
+
+
+def test_unit_of_work_when_handler_fails(counter_app_testable):
+    app, aggregate_id = counter_app_testable
+
+    try:
+        with app.unit_of_work():
+            app.increment(aggregate_id)
+            raise RuntimeError("failed")
+    except RuntimeError:
+        pass
+
+    assert app.saves == 0
+    assert app.repository.get(aggregate_id).count == 0
+    assert app.repository.unit_of_work is None
+
+
+def test_save_aggregate_without_unit_of_work(counter_app_testable):
+    app, aggregate_id = counter_app_testable
+
+    app.increment(aggregate_id)
+    app.increment(aggregate_id)
+
+    assert app.saves == 2
+    assert app.projected == [(aggregate_id, 1), (aggregate_id, 1)]
+
+
+def test_save_aggregate_when_projection_fails(counter_app_testable):
+    app, aggregate_id = counter_app_testable
+
+    with patch.object(app, "save_projection", side_effect=RuntimeError("mongo down")) as save_projection_mock:
+        app.increment(aggregate_id)
+
+    assert app.saves == 1
+    assert save_projection_mock.call_args.kwargs["domain_events"][0].originator_version == 2
+    assert app.repository.get(aggregate_id).count == 1
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from boe.lib.async_consumer import ApplicationExecutor, AsyncLoopChannel, AsyncQueueConsumer
+from boe.lib.concurrent_consumer import make_ordering_key_getter, make_queue_consumer
+from pika.spec import Basic, BasicProperties
+
+
+@pytest.fixture
+def executor_testable():
+    executor = ApplicationExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_application_executor_when_new_caller_arrives_while_others_wait(executor_testable):
+    gate = threading.Event()
+    handled = []
+
+    def handle_first():
+        gate.wait(timeout=5)
+        handled.append("first")
+
+    async def run():
+        first = asyncio.ensure_future(executor_testable.run("key", handle_first))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(executor_testable.run("key", handled.append, "second"))
+        await asyncio.sleep(0)
+
+        gate.set()
+        await first
+        # The lock of the key is released and second is woken but does not hold it yet
+        third = asyncio.ensure_future(executor_testable.run("key", handled.append, "third"))
+        await asyncio.gather(second, third)
+
+    asyncio.run(run())
+
+    assert handled == ["first", "second", "third"]
+    assert executor_testable._key_locks == {}
+
+
+def test_application_executor_runs_keys_concurrently(executor_testable):
+    barrier = threading.Barrier(4, timeout=5)
+
+    async def run():
+        await asyncio.gather(*[executor_testable.run(key, barrier.wait) for key in "abcd"])
+
+    asyncio.run(run())
+
+    assert not barrier.broken
+
+
+def test_async_loop_channel_marshals_acks():
+    channel = MagicMock()
+
+    async def run():
+        loop_channel = AsyncLoopChannel(channel=channel, loop=asyncio.get_running_loop())
+        await asyncio.get_running_loop().run_in_executor(None, lambda: loop_channel.basic_ack(delivery_tag=1))
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: loop_channel.basic_nack(delivery_tag=2, requeue=False)
+        )
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    channel.basic_ack.assert_called_with(delivery_tag=1, multiple=False)
+    channel.basic_nack.assert_called_with(delivery_tag=2, multiple=False, requeue=False)
+
+
+def test_async_queue_consumer_handles_deliveries():
+    channel = MagicMock()
+    handler_threads = set()
+
+    def on_message_callback(ch, method, properties, body):
+        handler_threads.add(threading.get_ident())
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    consumer = AsyncQueueConsumer(
+        amqp_host="localhost",
+        amqp_username="guest",
+        amqp_password="guest",
+        queue_name="queue",
+        callback=on_message_callback,
+        get_ordering_key=make_ordering_key_getter("account_id"),
+        concurrency=2
+    )
+
+    async def run():
+        consumer.executor = ApplicationExecutor(max_workers=2)
+        for delivery_tag in range(1, 5):
+            consumer.on_message(channel, Basic.Deliver(delivery_tag=delivery_tag), BasicProperties(), b"not json")
+        await consumer.drain()
+        await asyncio.sleep(0)
+        consumer.executor.shutdown()
+
+    asyncio.run(run())
+
+    assert sorted(call.kwargs["delivery_tag"] for call in channel.basic_ack.call_args_list) == [1, 2, 3, 4]
+    assert threading.get_ident() not in handler_threads
+
+
+def test_async_queue_consumer_drains_on_stop():
+    channel = MagicMock()
+    channel.basic_qos.side_effect = lambda prefetch_count, callback: callback(None)
+    connection = MagicMock(is_open=True)
+
+    def on_message_callback(ch, method, properties, body):
+        time.sleep(0.02)
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    consumer = AsyncQueueConsumer(
+        amqp_host="localhost",
+        amqp_username="guest",
+        amqp_password="guest",
+        queue_name="queue",
+        callback=on_message_callback,
+        get_ordering_key=make_ordering_key_getter("account_id"),
+        concurrency=2
+    )
+
+    async def run():
+        closed = asyncio.get_running_loop().create_future()
+        consumer._open_channel = AsyncMock(return_value=(connection, channel, closed))
+
+        consuming = asyncio.ensure_future(consumer.consume_async())
+        while not channel.basic_consume.called:
+            await asyncio.sleep(0)
+
+        for delivery_tag in range(1, 4):
+            consumer.on_message(channel, Basic.Deliver(delivery_tag=delivery_tag), BasicProperties(), b"not json")
+        consumer.stop()
+        await consuming
+
+    asyncio.run(run())
+
+    assert sorted(call.kwargs["delivery_tag"] for call in channel.basic_ack.call_args_list) == [1, 2, 3]
+    channel.basic_cancel.assert_called_once()
+    connection.close.assert_called_once()
+
+
+def test_make_queue_consumer_runtime():
+    options = dict(
+        amqp_host="localhost",
+        amqp_username="guest",
+        amqp_password="guest",
+        queue="queue",
+        on_message_callback=MagicMock()
+    )
+
+    assert isinstance(make_queue_consumer(**options, runtime="asyncio"), AsyncQueueConsumer)
+
+    with pytest.raises(ValueError):
+        make_queue_consumer(**options, runtime="gevent")
@@ -0,0 +1,103 @@
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+from boe.lib.batch_consumer import BatchQueueConsumer, group_messages
+from boe.lib.concurrent_consumer import make_ordering_key_getter
+from pika.spec import Basic, BasicProperties
+
+
+def make_message(delivery_tag, account_id, value=1.0):
+    body = json.dumps({"NewTransactionEvent": {"account_id": account_id, "value": value}}).encode()
+    return Basic.Deliver(delivery_tag=delivery_tag), BasicProperties(), body
+
+
+@pytest.fixture
+def batch_consumer_testable():
+    handled = []
+    units_of_work = []
+
+    def handle_message(properties, body):
+        if b"fail" in body:
+            raise RuntimeError("failed")
+        handled.append(body)
+
+    @contextmanager
+    def unit_of_work():
+        units_of_work.append(len(handled))
+        yield
+
+    consumer = BatchQueueConsumer(
+        amqp_host="localhost",
+        amqp_username="guest",
+        amqp_password="guest",
+        queue_name="queue",
+        handle_message=handle_message,
+        unit_of_work=unit_of_work,
+        get_ordering_key=make_ordering_key_getter("account_id"),
+        batch_size=4,
+        on_failure=MagicMock()
+    )
+    consumer.handled = handled
+    consumer.units_of_work = units_of_work
+    return consumer
+
+
+def test_group_messages():
+    messages = [
+        make_message(1, "a"),
+        make_message(2, "b"),
+        make_message(3, "a"),
+        (Basic.Deliver(delivery_tag=4), BasicProperties(), b"not json")
+    ]
+
+    groups = group_messages(messages=messages, get_ordering_key=make_ordering_key_getter("account_id"))
+
+    assert [[method.delivery_tag for method, _, _ in group] for group in groups] == [[1, 3], [2], [4]]
+
+
+def test_batch_consumer_flushes_when_batch_full(batch_consumer_testable):
+    channel = MagicMock()
+
+    for delivery_tag, account_id in enumerate(["a", "b", "a"], start=1):
+        batch_consumer_testable._on_message(channel, *make_message(delivery_tag, account_id))
+
+    channel.connection.call_later.assert_called_once()
+    channel.basic_ack.assert_not_called()
+
+    batch_consumer_testable._on_message(channel, *make_message(4, "a"))
+
+    channel.connection.remove_timeout.assert_called_once()
+    channel.basic_ack.assert_called_once_with(delivery_tag=4, multiple=True)
+    channel.basic_nack.assert_not_called()
+    assert len(batch_consumer_testable.handled) == 4
+    assert len(batch_consumer_testable.units_of_work) == 2
+
+
+def test_batch_consumer_flushes_on_timeout(batch_consumer_testable):
+    channel = MagicMock()
+
+    batch_consumer_testable._on_message(channel, *make_message(1, "a"))
+    flush = channel.connection.call_later.call_args.args[1]
+    flush()
+
+    channel.basic_ack.assert_called_once_with(delivery_tag=1, multiple=True)
+
+
+def test_batch_consumer_nacks_failed_message(batch_consumer_testable):
+    channel = MagicMock()
+
+    messages = [make_message(1, "a"), make_message(2, "a", value="fail"), make_message(3, "b"),
+                make_message(4, "c", value="fail")]
+    for message in messages:
+        batch_consumer_testable._on_message(channel, *message)
+
+    assert [call.kwargs for call in channel.basic_nack.call_args_list] == [
+        {"delivery_tag": 2, "requeue": False},
+        {"delivery_tag": 4, "requeue": False}
+    ]
+    channel.basic_ack.assert_called_once_with(delivery_tag=3, multiple=True)
+    assert batch_consumer_testable.on_failure.call_count == 2
+    # The failed group of account a is handled again one message at a time
+    assert len(batch_consumer_testable.handled) == 3
@@ -0,0 +1,97 @@
+import hashlib
+import os
+
+import pytest
+from boe.lib.blob_store import (
+    BlobNotFound,
+    BlobRef,
+    LocalFileBlobStore,
+    get_blob_store,
+    guess_mime_type
+)
+
+PNG_DATA = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+@pytest.fixture
+def blob_store_testable(tmp_path):
+    return LocalFileBlobStore(root_path=str(tmp_path), chunk_size=16)
+
+
+def test_put_stream(blob_store_testable):
+    blob_ref = blob_store_testable.put_stream(chunks=[PNG_DATA[:50], PNG_DATA[50:]])
+
+    assert blob_ref == BlobRef(hash=hashlib.sha256(PNG_DATA).hexdigest(), size=len(PNG_DATA), mime_type="image/png")
+    assert blob_store_testable.exists(blob_hash=blob_ref.hash)
+    assert blob_store_testable.get(blob_hash=blob_ref.hash) == PNG_DATA
+
+
+def test_put_with_mime_type(blob_store_testable):
+    blob_ref = blob_store_testable.put(data=b"evidence", mime_type="text/plain")
+
+    assert blob_ref.mime_type == "text/plain"
+
+
+def test_put_dedups_content(blob_store_testable, tmp_path):
+    first_ref = blob_store_testable.put(data=PNG_DATA)
+    second_ref = blob_store_testable.put(data=PNG_DATA)
+
+    assert first_ref == second_ref
+    assert [name for name in os.listdir(tmp_path / first_ref.hash[:2])] == [first_ref.hash]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".upload-")]
+
+
+def test_put_stream_removes_upload_on_error(blob_store_testable, tmp_path):
+    def failing_chunks():
+        yield b"partial"
+        raise IOError("client disconnected")
+
+    with pytest.raises(IOError):
+        blob_store_testable.put_stream(chunks=failing_chunks())
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_iter_chunks(blob_store_testable):
+    blob_ref = blob_store_testable.put(data=PNG_DATA)
+
+    chunks = list(blob_store_testable.iter_chunks(blob_hash=blob_ref.hash))
+
+    assert all(len(chunk) <= 16 for chunk in chunks)
+    assert b"".join(chunks) == PNG_DATA
+
+
+def test_iter_chunks_when_blob_missing(blob_store_testable):
+    with pytest.raises(BlobNotFound):
+        list(blob_store_testable.iter_chunks(blob_hash="0" * 64))
+
+
+@pytest.mark.parametrize("blob_hash", ["../etc/passwd", "A" * 64, "0" * 63])
+def test_invalid_blob_hash(blob_store_testable, blob_hash):
+    with pytest.raises(ValueError):
+        blob_store_testable.exists(blob_hash=blob_hash)
+
+
+def test_local_file_blob_store_when_path_is_relative():
+    with pytest.raises(ValueError):
+        LocalFileBlobStore(root_path="_blobs")
+
+
+@pytest.mark.parametrize("head, mime_type", [
+    (PNG_DATA, "image/png"),
+    (b"\xff\xd8\xff\xe0", "image/jpeg"),
+    (b"GIF89a", "image/gif"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"%PDF-1.7", "application/pdf"),
+    (b"plain", "application/octet-stream"),
+])
+def test_guess_mime_type(head, mime_type):
+    assert guess_mime_type(head=head) == mime_type
+
+
+def test_get_blob_store():
+    assert isinstance(get_blob_store(backend="local"), LocalFileBlobStore)
+    assert get_blob_store(backend="local") is get_blob_store(backend="local")
+
+    with pytest.raises(ValueError):
+        get_blob_store(backend="unknown")
@@ -0,0 +1,144 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from boe.lib.concurrent_consumer import (
+    ConcurrentQueueConsumer,
+    OrderedDispatcher,
+    ThreadSafeChannel,
+    get_prefetch_count,
+    make_ordering_key_getter,
+    make_queue_consumer
+)
+from boe.utils.serialization_utils import MSGPACK_CONTENT_TYPE, serialize_envelope
+from cbaxter1988_utils.pika_utils import PikaQueueConsumerV2
+from pika.spec import BasicProperties
+
+
+@pytest.fixture
+def dispatcher_testable():
+    dispatcher = OrderedDispatcher(concurrency=4)
+    yield dispatcher
+    dispatcher.shutdown(wait=True)
+
+
+def test_ordered_dispatcher_keeps_order_per_key(dispatcher_testable):
+    keys = [str(uuid4()) for _ in range(8)]
+    handled = {key: [] for key in keys}
+
+    def handle(key, n):
+        time.sleep(0.0005 * (n % 3))
+        handled[key].append(n)
+
+    for n in range(50):
+        for key in keys:
+            dispatcher_testable.submit(key, handle, key, n)
+
+    dispatcher_testable.shutdown(wait=True)
+
+    assert all(handled[key] == list(range(50)) for key in keys)
+
+
+def test_ordered_dispatcher_runs_lanes_concurrently(dispatcher_testable):
+    keys = [str(uuid4()) for _ in range(64)]
+    lanes = {dispatcher_testable.get_lane(key) for key in keys}
+    barrier = threading.Barrier(len(lanes), timeout=5)
+
+    for lane in lanes:
+        key = next(key for key in keys if dispatcher_testable.get_lane(key) == lane)
+        dispatcher_testable.submit(key, barrier.wait)
+
+    dispatcher_testable.shutdown(wait=True)
+
+    assert not barrier.broken
+
+
+def test_ordered_dispatcher_get_lane(dispatcher_testable):
+    aggregate_id = uuid4()
+
+    assert dispatcher_testable.get_lane(aggregate_id) == dispatcher_testable.get_lane(str(aggregate_id))
+    assert dispatcher_testable.get_lane("username") == dispatcher_testable.get_lane("username")
+    assert {dispatcher_testable.get_lane(None) for _ in range(4)} == {0, 1, 2, 3}
+
+
+def test_ordered_dispatcher_survives_failing_task(dispatcher_testable):
+    handled = []
+
+    def fail():
+        raise RuntimeError("failed")
+
+    dispatcher_testable.submit("key", fail)
+    dispatcher_testable.submit("key", handled.append, 1)
+    dispatcher_testable.shutdown(wait=True)
+
+    assert handled == [1]
+
+
+def test_thread_safe_channel_marshals_acks():
+    channel = MagicMock()
+    thread_safe_channel = ThreadSafeChannel(channel=channel)
+
+    thread_safe_channel.basic_ack(delivery_tag=1)
+    thread_safe_channel.basic_nack(delivery_tag=2, requeue=False)
+
+    channel.basic_ack.assert_not_called()
+    channel.basic_nack.assert_not_called()
+
+    for call in channel.connection.add_callback_threadsafe.call_args_list:
+        call.args[0]()
+
+    channel.basic_ack.assert_called_with(delivery_tag=1, multiple=False)
+    channel.basic_nack.assert_called_with(delivery_tag=2, multiple=False, requeue=False)
+
+
+@pytest.mark.parametrize("content_type", [None, MSGPACK_CONTENT_TYPE])
+def test_make_ordering_key_getter(content_type):
+    get_ordering_key = make_ordering_key_getter("account_id", "owner_id")
+    properties = BasicProperties(content_type=content_type)
+
+    def make_body(payload):
+        return serialize_envelope(payload, content_type=content_type or "application/json")
+
+    assert get_ordering_key(properties, make_body({"account_id": "a", "owner_id": "b"})) == "a"
+    assert get_ordering_key(properties, make_body({"owner_id": "b"})) == "b"
+    assert get_ordering_key(properties, make_body({"value": 1})) is None
+
+
+def test_concurrent_queue_consumer_dispatch_without_ordering_key():
+    callback = MagicMock()
+    dispatcher = MagicMock()
+    method = MagicMock()
+
+    consumer = ConcurrentQueueConsumer(
+        amqp_host="localhost",
+        amqp_username="guest",
+        amqp_password="guest",
+        queue_name="queue",
+        callback=callback,
+        get_ordering_key=make_ordering_key_getter("account_id"),
+        concurrency=2
+    )
+
+    consumer._dispatch(dispatcher, "channel", method, BasicProperties(), b"not json")
+
+    dispatcher.submit.assert_called_with(None, callback, "channel", method, BasicProperties(), b"not json")
+
+
+def test_get_prefetch_count():
+    assert get_prefetch_count(concurrency=1) == 1
+    assert get_prefetch_count(concurrency=8) > 8
+
+
+def test_make_queue_consumer():
+    options = dict(
+        amqp_host="localhost",
+        amqp_username="guest",
+        amqp_password="guest",
+        queue="queue",
+        on_message_callback=MagicMock()
+    )
+
+    assert isinstance(make_queue_consumer(**options), PikaQueueConsumerV2)
+    assert isinstance(make_queue_consumer(**options, concurrency=4), ConcurrentQueueConsumer)
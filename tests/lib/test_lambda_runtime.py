@@ -0,0 +1,92 @@
+import base64
+import json
+from dataclasses import dataclass
+
+import msgpack
+import pytest
+from boe.lib.lambda_runtime import get_record_message, handle_batch_event
+from boe.lib.worker_runtime import Worker
+
+
+@dataclass
+class DepositEvent:
+    account_id: str
+    value: float
+
+
+class FakeApp:
+    def __init__(self):
+        self.handled = []
+
+    def handle_event(self, event):
+        if event.value < 0:
+            raise ValueError("negative deposit")
+        self.handled.append(event)
+
+
+EVENT_MAP = {
+    "DepositEvent": {
+        "event_factory": DepositEvent,
+        "event_class": DepositEvent
+    }
+}
+
+
+def make_record(message_id, account_id="a", value=1.0, queue_arn="arn:aws:sqs:us-east-1:000000000000:queue"):
+    return {
+        "messageId": message_id,
+        "body": json.dumps({"DepositEvent": {"account_id": account_id, "value": value}}),
+        "eventSource": "aws:sqs",
+        "eventSourceARN": queue_arn
+    }
+
+
+@pytest.fixture
+def worker_testable():
+    return Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, ordering_key_fields=("account_id",))
+
+
+def test_get_record_message_when_msgpack():
+    body = msgpack.packb({"DepositEvent": {"account_id": "a", "value": 1.0}})
+    record = {
+        "body": base64.b64encode(body).decode(),
+        "messageAttributes": {"content_type": {"stringValue": "application/msgpack", "dataType": "String"}}
+    }
+
+    properties, message_body = get_record_message(record=record)
+
+    assert properties.content_type == "application/msgpack"
+    assert message_body == body
+
+
+def test_handle_batch_event(worker_testable):
+    response = handle_batch_event(worker=worker_testable, event={"Records": [
+        make_record("1", account_id="a"),
+        make_record("2", account_id="a", value=-1.0),
+        make_record("3", account_id="b"),
+        make_record("4", account_id="a"),
+    ]})
+
+    # The later event of account a is retried with the failed one, account b is not held back
+    assert response == {"batchItemFailures": [{"itemIdentifier": "2"}, {"itemIdentifier": "4"}]}
+    assert [event.account_id for event in worker_testable.app.handled] == ["a", "b"]
+
+
+def test_handle_batch_event_when_fifo(worker_testable):
+    queue_arn = "arn:aws:sqs:us-east-1:000000000000:queue.fifo"
+
+    response = handle_batch_event(worker=worker_testable, event={"Records": [
+        make_record("1", value=-1.0, queue_arn=queue_arn),
+        make_record("2", account_id="b", queue_arn=queue_arn),
+    ]})
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "1"}, {"itemIdentifier": "2"}]}
+    assert worker_testable.app.handled == []
+
+
+def test_handle_batch_event_when_unknown_event(worker_testable):
+    record = dict(make_record("1"), body=json.dumps({"UnknownEvent": {}}))
+
+    response = handle_batch_event(worker=worker_testable, event={"Records": [record]})
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "1"}]}
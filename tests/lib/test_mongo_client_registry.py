@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock, patch
+
+from boe.lib.mongo_client_registry import (
+    MongoPoolMonitor,
+    close_mongo_clients,
+    get_mongo_client,
+    get_mongo_pool_stats
+)
+from pytest import fixture
+
+
+@fixture
+def mongo_client_mock():
+    with patch("boe.lib.mongo_client_registry.MongoClient") as client_mock:
+        yield client_mock
+
+    close_mongo_clients()
+
+
+def test_get_mongo_client_when_called_twice(mongo_client_mock):
+    client = get_mongo_client(db_host="mongo", db_port=27017, db_username="user", db_password="password")
+
+    assert get_mongo_client(db_host="mongo", db_port="27017", db_username="user", db_password="password") is client
+    assert get_mongo_pool_stats()["clients"] == 1
+    mongo_client_mock.assert_called_once()
+
+
+def test_get_mongo_client_when_configuring_pool(mongo_client_mock):
+    get_mongo_client(db_host="mongo", db_port=27017, db_username="user", db_password="password")
+
+    client_kwargs = mongo_client_mock.call_args.kwargs
+    assert client_kwargs["maxPoolSize"] == 100
+    assert client_kwargs["readPreference"] == "primary"
+    assert client_kwargs["waitQueueTimeoutMS"] == 5000
+    assert "socketTimeoutMS" not in client_kwargs
+
+
+def test_close_mongo_clients(mongo_client_mock):
+    get_mongo_client(db_host="mongo", db_port=27017, db_username="user", db_password="password")
+
+    close_mongo_clients()
+
+    mongo_client_mock.return_value.close.assert_called_once()
+    assert get_mongo_pool_stats()["clients"] == 0
+
+
+def test_mongo_pool_monitor_when_checking_out_connections():
+    monitor = MongoPoolMonitor()
+
+    monitor.connection_created(MagicMock())
+    monitor.connection_check_out_started(MagicMock())
+    monitor.connection_checked_out(MagicMock())
+    monitor.connection_check_out_started(MagicMock())
+    monitor.connection_check_out_failed(MagicMock())
+
+    stats = monitor.get_stats()
+    assert stats["checkouts"] == 1
+    assert stats["checkout_failures"] == 1
+    assert stats["connections_created"] == 1
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
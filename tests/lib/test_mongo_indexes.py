@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+from uuid import UUID
+
+from boe.env import BANK_TRANSACTION_TABLE
+from boe.lib.domains.bank_domain import BankDomainQueryModel
+from boe.lib.domains.read_model_indexes import get_read_model_indexes, get_read_model_queries
+from boe.lib.mongo_indexes import (
+    QueryDeclaration,
+    ensure_indexes,
+    find_collection_scans,
+    get_plan_stages,
+    is_query_indexed,
+    make_index
+)
+from bson.binary import Binary, UuidRepresentation
+
+
+def _make_explain(winning_plan: dict) -> dict:
+    return {"queryPlanner": {"winningPlan": winning_plan}}
+
+
+def test_read_model_queries_are_indexed():
+    indexes = get_read_model_indexes()
+
+    unindexed_queries = [query for query in get_read_model_queries() if not is_query_indexed(query, indexes)]
+
+    assert unindexed_queries == []
+
+
+def test_is_query_indexed_when_query_is_not_an_index_prefix():
+    indexes = [make_index("table", "account_id", "created")]
+
+    assert is_query_indexed(QueryDeclaration(collection="table", query={"account_id": 1}), indexes)
+    assert not is_query_indexed(QueryDeclaration(collection="table", query={"created": 1}), indexes)
+    assert not is_query_indexed(QueryDeclaration(collection="other_table", query={"account_id": 1}), indexes)
+
+
+def test_ensure_indexes():
+    database = MagicMock()
+
+    ensure_indexes(database=database, indexes=[make_index("table", "task.owner_id")])
+
+    database["table"].create_index.assert_called_once_with([("task.owner_id", 1)], name="task.owner_id_1", unique=False)
+
+
+def test_get_plan_stages():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+
+    assert get_plan_stages(plan=plan) == ["FETCH", "IXSCAN"]
+
+
+def test_find_collection_scans():
+    indexed_query = QueryDeclaration(collection="table", query={"account_id": 1}, sort=(("created", 1),))
+    scanned_query = QueryDeclaration(collection="table", query={"name": 1})
+    database = MagicMock()
+    cursor = database["table"].find.return_value
+    cursor.sort.return_value.explain.return_value = _make_explain({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}})
+    cursor.explain.return_value = _make_explain({"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}})
+
+    assert find_collection_scans(database=database, queries=[indexed_query, scanned_query]) == [scanned_query]
+
+
+def test_find_collection_scans_when_read_model_query_scans():
+    bank_transaction_query = next(
+        query for query in BankDomainQueryModel.queries if query.collection == BANK_TRANSACTION_TABLE
+    )
+    database = MagicMock()
+    collection = database[BANK_TRANSACTION_TABLE]
+    collection.find.return_value.sort.return_value.explain.return_value = _make_explain(
+        {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+    )
+
+    assert find_collection_scans(database=database, queries=[bank_transaction_query]) == [bank_transaction_query]
+    collection.find.assert_called_once_with(bank_transaction_query.query)
+    collection.find.return_value.sort.assert_called_once_with([("created", 1)])
+    assert collection.find.call_args.args[0]["account_id"]["$in"] == [
+        Binary.from_uuid(UUID(int=0), uuid_representation=UuidRepresentation.STANDARD),
+        str(UUID(int=0))
+    ]
@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from boe.applications.bank_domain_apps import BankDomainAppEventFactory, BankManagerApp
+from boe.lib.domains.bank_domain import BankTransactionMethodEnum
+from boe.lib.projection_processor import ProjectionProcessor
+from pytest import fixture
+
+
+@fixture
+def async_bank_manager_app_testable():
+    with patch("boe.applications.bank_domain_apps.BankDomainWriteModel"), \
+            patch("boe.applications.bank_domain_apps.NotificationWorkerClient"), \
+            patch("boe.applications.bank_domain_apps.ServiceMetricPublisher"), \
+            patch.object(BankManagerApp, "async_projections", True):
+        yield BankManagerApp()
+
+
+@fixture
+def tracking_collection_mock():
+    collection_mock = MagicMock()
+    collection_mock.find_one.return_value = None
+    return collection_mock
+
+
+def _handle_account_with_transactions(app: BankManagerApp, transaction_count: int):
+    owner_id = str(uuid4())
+    app.handle_event(
+        BankDomainAppEventFactory.build_establish_new_account_event(owner_id=owner_id, is_overdraft_protected=True)
+    )
+    for _ in range(transaction_count):
+        app.handle_event(
+            BankDomainAppEventFactory.build_new_transaction_event(
+                account_id=owner_id,
+                item_id=str(uuid4()),
+                transaction_method=BankTransactionMethodEnum.add.value,
+                value=10
+            )
+        )
+
+
+def test_bank_manager_app_when_async_projections(async_bank_manager_app_testable):
+    _handle_account_with_transactions(app=async_bank_manager_app_testable, transaction_count=1)
+
+    async_bank_manager_app_testable.write_model.save_bank_aggregate.assert_not_called()
+
+
+def test_projection_processor_when_processing_batches(async_bank_manager_app_testable, tracking_collection_mock):
+    app = async_bank_manager_app_testable
+    _handle_account_with_transactions(app=app, transaction_count=2)
+    processor = ProjectionProcessor(app=app, tracking_collection=tracking_collection_mock, batch_size=2)
+
+    assert processor.get_lag() == 3
+    assert processor.process_batch() == 2
+
+    save_kwargs = app.write_model.save_bank_aggregate.call_args.kwargs
+    assert save_kwargs['aggregate'].version == 2
+    assert len(save_kwargs['domain_events']) == 2
+    app.write_model.flush.assert_called_once()
+    tracking_collection_mock.update_one.assert_called_with(
+        {"_id": "BankManagerApp"}, {"$set": {"position": 2}}, upsert=True
+    )
+
+    assert processor.process_batch() == 1
+    assert app.write_model.save_bank_aggregate.call_args.kwargs['aggregate'].bank_account.balance == 20
+    assert processor.process_batch() == 0
+    assert processor.get_lag() == 0
+
+
+def test_projection_processor_when_resuming_from_tracking_position(
+        async_bank_manager_app_testable,
+        tracking_collection_mock
+):
+    app = async_bank_manager_app_testable
+    _handle_account_with_transactions(app=app, transaction_count=2)
+    tracking_collection_mock.find_one.return_value = {"_id": "BankManagerApp", "position": 2}
+    processor = ProjectionProcessor(app=app, tracking_collection=tracking_collection_mock)
+
+    assert processor.process_batch() == 1
+    assert app.write_model.save_bank_aggregate.call_args.kwargs['domain_events'][0].originator_version == 3
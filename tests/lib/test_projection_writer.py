@@ -0,0 +1,161 @@
+from unittest.mock import MagicMock
+
+from boe.lib.projection_writer import ProjectionDelta, ProjectionWriter, build_projection_delta
+from eventsourcing.domain import Aggregate, event
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pytest import fixture, raises
+
+
+class NoteAggregate(Aggregate):
+    def __init__(self):
+        self.tags = []
+        self.text = ""
+
+    @event
+    def add_tag(self, tag: str):
+        self.tags.append(tag)
+
+    @event
+    def set_text(self, text: str):
+        self.text = text
+
+
+NOTE_DELTA_BUILDERS = {
+    NoteAggregate.AddTag: lambda aggregate, domain_event: ProjectionDelta(push={"tags": [domain_event.tag]}),
+}
+
+
+@fixture
+def collection_mock():
+    return MagicMock()
+
+
+@fixture
+def note_aggregate_testable():
+    aggregate = NoteAggregate()
+    aggregate.collect_events()
+    return aggregate
+
+
+def test_projection_writer_when_upserting(collection_mock):
+    writer = ProjectionWriter(collection=collection_mock)
+
+    assert writer.upsert(record_id="record-1", document={"_id": "record-1", "name": "test"}, version=2) is True
+
+    query, update = collection_mock.update_one.call_args.args
+    assert query["_id"] == "record-1"
+    assert {"version": {"$lte": 2}} in query["$or"]
+    assert update == {"$set": {"name": "test", "version": 2}}
+    assert collection_mock.update_one.call_args.kwargs["upsert"] is True
+
+
+def test_projection_writer_when_upserting_without_version(collection_mock):
+    writer = ProjectionWriter(collection=collection_mock)
+
+    writer.upsert(record_id="record-1", document={"name": "test"}, unset=["old_field"])
+
+    query, update = collection_mock.update_one.call_args.args
+    assert query == {"_id": "record-1"}
+    assert update == {"$set": {"name": "test"}, "$unset": {"old_field": ""}}
+
+
+def test_projection_writer_when_upserting_stale_version(collection_mock):
+    collection_mock.update_one.side_effect = DuplicateKeyError("E11000")
+    writer = ProjectionWriter(collection=collection_mock)
+
+    assert writer.upsert(record_id="record-1", document={"name": "test"}, version=1) is False
+
+
+def test_projection_writer_when_buffering(collection_mock):
+    writer = ProjectionWriter(collection=collection_mock, buffer_size=2)
+
+    writer.upsert(record_id="record-1", document={"name": "v2"}, version=2)
+    writer.upsert(record_id="record-1", document={"name": "v1"}, version=1)
+    assert len(writer) == 1
+    collection_mock.bulk_write.assert_not_called()
+
+    writer.upsert(record_id="record-2", document={"name": "v1"}, version=1)
+
+    requests = collection_mock.bulk_write.call_args.kwargs["requests"]
+    assert len(requests) == 2
+    assert requests[0]._doc == {"$set": {"name": "v2", "version": 2}}
+    assert len(writer) == 0
+
+
+def test_projection_writer_when_flushing_stale_versions(collection_mock):
+    collection_mock.bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 0, "code": 11000}], "nUpserted": 0, "nModified": 1}
+    )
+    writer = ProjectionWriter(collection=collection_mock, buffer_size=10)
+    writer.upsert(record_id="record-1", document={"name": "test"}, version=1)
+    writer.upsert(record_id="record-2", document={"name": "test"}, version=1)
+
+    assert writer.flush() == 1
+
+
+def test_projection_writer_when_flushing_fails(collection_mock):
+    collection_mock.bulk_write.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 121}]})
+    writer = ProjectionWriter(collection=collection_mock, buffer_size=10)
+    writer.upsert(record_id="record-1", document={"name": "test"}, version=1)
+
+    with raises(BulkWriteError):
+        writer.flush()
+
+
+def test_build_projection_delta(note_aggregate_testable):
+    note_aggregate_testable.add_tag(tag="a")
+    note_aggregate_testable.add_tag(tag="b")
+
+    delta = build_projection_delta(aggregate=note_aggregate_testable, delta_builders=NOTE_DELTA_BUILDERS)
+
+    assert delta.to_update(version=3) == {"$set": {"version": 3}, "$push": {"tags": {"$each": ["a", "b"]}}}
+
+
+def test_build_projection_delta_when_event_has_no_builder(note_aggregate_testable):
+    note_aggregate_testable.add_tag(tag="a")
+    note_aggregate_testable.set_text(text="text")
+
+    assert build_projection_delta(aggregate=note_aggregate_testable, delta_builders=NOTE_DELTA_BUILDERS) is None
+
+
+def test_projection_delta_when_merging():
+    delta = ProjectionDelta(set={"items.a": 1}, push={"tags": ["a"]})
+    delta.merge(ProjectionDelta(unset=["items.a"], push={"tags": ["b"]}))
+
+    assert delta == ProjectionDelta(push={"tags": ["a", "b"]}, unset=["items.a"])
+
+
+def test_projection_writer_when_saving_aggregate_delta(collection_mock, note_aggregate_testable):
+    collection_mock.update_one.return_value.matched_count = 1
+    writer = ProjectionWriter(collection=collection_mock)
+    note_aggregate_testable.add_tag(tag="a")
+    build_document = MagicMock()
+
+    writer.save_aggregate(
+        record_id="record-1",
+        aggregate=note_aggregate_testable,
+        build_document=build_document,
+        delta_builders=NOTE_DELTA_BUILDERS
+    )
+
+    query, update = collection_mock.update_one.call_args.args
+    assert query == {"_id": "record-1", "version": 1}
+    assert update["$push"] == {"tags": {"$each": ["a"]}}
+    build_document.assert_not_called()
+
+
+def test_projection_writer_when_saving_aggregate_delta_falls_back(collection_mock, note_aggregate_testable):
+    collection_mock.update_one.return_value.matched_count = 0
+    writer = ProjectionWriter(collection=collection_mock)
+    note_aggregate_testable.add_tag(tag="a")
+
+    writer.save_aggregate(
+        record_id="record-1",
+        aggregate=note_aggregate_testable,
+        build_document=lambda: {"tags": note_aggregate_testable.tags},
+        delta_builders=NOTE_DELTA_BUILDERS
+    )
+
+    query, update = collection_mock.update_one.call_args.args
+    assert {"version": {"$lte": 2}} in query["$or"]
+    assert update == {"$set": {"tags": ["a"], "version": 2}}
@@ -0,0 +1,89 @@
+from threading import Thread
+from unittest.mock import patch
+
+import pytest
+from boe.lib.publisher_pool import PublisherPool, close_publisher_pools, get_publisher_pool
+from pika.exceptions import StreamLostError
+from pytest import fixture
+
+
+@fixture
+def blocking_connection_mock():
+    with patch("boe.lib.publisher_pool.BlockingConnection") as connection_mock:
+        connection_mock.return_value.is_open = True
+        connection_mock.return_value.channel.return_value.is_open = True
+        yield connection_mock
+
+    close_publisher_pools()
+
+
+@fixture
+def publisher_pool_testable(blocking_connection_mock):
+    return PublisherPool(amqp_host="rabbitmq", amqp_username="user", amqp_password="password")
+
+
+def test_get_publisher_pool_when_called_twice(blocking_connection_mock):
+    pool = get_publisher_pool(amqp_host="rabbitmq")
+
+    assert get_publisher_pool(amqp_host="rabbitmq") is pool
+    blocking_connection_mock.assert_not_called()
+
+
+def test_publisher_pool_when_publishing_twice(blocking_connection_mock, publisher_pool_testable):
+    publisher_pool_testable.publish_message(exchange="exchange", routing_key="key", body=b"1")
+    publisher_pool_testable.publish_message(exchange="exchange", routing_key="key", body=b"2")
+
+    blocking_connection_mock.assert_called_once()
+    assert blocking_connection_mock.return_value.channel.return_value.basic_publish.call_count == 2
+    assert publisher_pool_testable.get_stats() == {
+        "connections_opened": 1,
+        "idle_connections": 1,
+        "publishes": 2,
+        "reconnects": 0
+    }
+
+
+def test_publisher_pool_when_publishing_from_threads(blocking_connection_mock, publisher_pool_testable):
+    threads = [
+        Thread(target=publisher_pool_testable.publish_message, args=("exchange", "key", b"body"))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = publisher_pool_testable.get_stats()
+    assert stats["publishes"] == 4
+    assert stats["connections_opened"] == stats["idle_connections"] <= 4
+
+
+def test_publisher_pool_when_connection_dropped(blocking_connection_mock, publisher_pool_testable):
+    publisher_pool_testable.publish_message(exchange="exchange", routing_key="key", body=b"1")
+
+    connection = blocking_connection_mock.return_value
+    connection.process_data_events.side_effect = [StreamLostError("Connection reset"), None]
+    publisher_pool_testable.publish_message(exchange="exchange", routing_key="key", body=b"2")
+
+    assert blocking_connection_mock.call_count == 2
+    assert publisher_pool_testable.get_stats()["reconnects"] == 1
+    assert connection.channel.return_value.basic_publish.call_count == 2
+
+
+def test_publisher_pool_when_broker_unavailable(blocking_connection_mock, publisher_pool_testable):
+    blocking_connection_mock.return_value.process_data_events.side_effect = StreamLostError("Connection reset")
+
+    with pytest.raises(StreamLostError):
+        publisher_pool_testable.publish_message(exchange="exchange", routing_key="key", body=b"1")
+
+    assert publisher_pool_testable.get_stats()["idle_connections"] == 0
+
+
+def test_publisher_pool_when_connection_idle_too_long(blocking_connection_mock):
+    pool = PublisherPool(amqp_host="rabbitmq", amqp_username="user", amqp_password="password", max_idle_seconds=0)
+
+    pool.publish_message(exchange="exchange", routing_key="key", body=b"1")
+    pool.publish_message(exchange="exchange", routing_key="key", body=b"2")
+
+    assert blocking_connection_mock.call_count == 2
+    blocking_connection_mock.return_value.close.assert_called_once()
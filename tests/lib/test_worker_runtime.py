@@ -0,0 +1,176 @@
+import json
+from dataclasses import dataclass
+from unittest.mock import MagicMock
+
+import pytest
+from boe.lib.async_consumer import AsyncQueueConsumer
+from boe.lib.batch_consumer import BatchQueueConsumer
+from boe.lib.concurrent_consumer import ConcurrentQueueConsumer
+from boe.lib.worker_runtime import (
+    CONSUMER_STRATEGIES,
+    DispatchEntry,
+    UnknownEventError,
+    Worker,
+    WorkerStopped,
+    compile_dispatch_table,
+    register_consumer_strategy
+)
+from cbaxter1988_utils.pika_utils import PikaQueueConsumerV2
+from pika.spec import Basic, BasicProperties
+
+
+@dataclass
+class DepositEvent:
+    account_id: str
+    value: float
+
+
+class FakeApp:
+    def __init__(self):
+        self.handled = []
+        self.unit_of_work = MagicMock()
+
+    def handle_event(self, event):
+        if event.value < 0:
+            raise ValueError("negative deposit")
+        self.handled.append(event)
+
+
+EVENT_MAP = {
+    "DepositEvent": {
+        "event_factory": DepositEvent,
+        "event_class": DepositEvent
+    },
+    "LegacyDepositEvent": {
+        "event_factory": lambda **payload: dict(payload),
+        "event_class": DepositEvent
+    }
+}
+
+
+def make_body(event_name="DepositEvent", value=1.0):
+    return json.dumps({event_name: {"account_id": "a", "value": value}}).encode()
+
+
+@pytest.fixture
+def worker_testable():
+    return Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, ordering_key_fields=("account_id",))
+
+
+def test_compile_dispatch_table():
+    handler = MagicMock()
+
+    dispatch_table = compile_dispatch_table(event_map=EVENT_MAP, default_handler=handler)
+
+    assert dispatch_table["DepositEvent"] == DispatchEntry(
+        factory=DepositEvent,
+        handler=handler,
+        event_class=DepositEvent
+    )
+
+    with pytest.raises(ValueError):
+        compile_dispatch_table(event_map=EVENT_MAP)
+
+
+def test_worker_acks_handled_message(worker_testable):
+    channel = MagicMock()
+    method = Basic.Deliver(delivery_tag=7)
+
+    worker_testable.on_message_callback(channel, method, BasicProperties(), make_body())
+
+    channel.basic_ack.assert_called_once_with(delivery_tag=7)
+    assert worker_testable.app.handled == [DepositEvent(account_id="a", value=1.0)]
+    assert worker_testable.timings.get_stats()["DepositEvent"]["count"] == 1
+
+
+@pytest.mark.parametrize("body, error_class", [
+    (make_body(value=-1.0), ValueError),
+    (make_body(event_name="UnknownEvent"), UnknownEventError),
+    (make_body(event_name="LegacyDepositEvent"), TypeError),
+    (b"not json", ValueError),
+])
+def test_worker_nacks_failed_message(body, error_class):
+    on_failure = MagicMock()
+    worker = Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, on_failure=on_failure)
+    channel = MagicMock()
+
+    worker.on_message_callback(channel, Basic.Deliver(delivery_tag=3), BasicProperties(), body)
+
+    channel.basic_nack.assert_called_once_with(delivery_tag=3, requeue=False)
+    channel.basic_ack.assert_not_called()
+    assert isinstance(on_failure.call_args.args[0], error_class)
+
+
+def test_worker_timing_hooks():
+    hook = MagicMock()
+    worker = Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, hooks=[hook])
+
+    worker.handle_message(BasicProperties(), make_body())
+    with pytest.raises(ValueError):
+        worker.handle_message(BasicProperties(), make_body(value=-1.0))
+
+    assert [call.args[0] for call in hook.call_args_list] == ["DepositEvent", "DepositEvent"]
+    assert hook.call_args_list[0].args[2] is None
+    assert isinstance(hook.call_args_list[1].args[2], ValueError)
+    assert worker.timings.get_stats()["DepositEvent"]["failed"] == 1
+
+
+@pytest.mark.parametrize("options, strategy, consumer_class", [
+    ({}, "inline", PikaQueueConsumerV2),
+    ({"concurrency": 4}, "threaded", ConcurrentQueueConsumer),
+    ({"concurrency": 4, "runtime": "asyncio"}, "asyncio", AsyncQueueConsumer),
+    ({"batch_size": 50}, "batch", BatchQueueConsumer),
+])
+def test_worker_consumer_strategy(options, strategy, consumer_class):
+    worker = Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, **options)
+
+    assert worker.strategy == strategy
+    assert isinstance(worker.make_consumer(queue="queue"), consumer_class)
+
+
+def test_register_consumer_strategy():
+    consumer = MagicMock()
+    register_consumer_strategy("test", lambda worker, queue: consumer)
+    try:
+        worker = Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, strategy="test")
+
+        assert worker.make_consumer(queue="queue") is consumer
+    finally:
+        del CONSUMER_STRATEGIES["test"]
+
+    with pytest.raises(ValueError):
+        Worker(name="TestWorker", app=FakeApp(), event_map=EVENT_MAP, strategy="test")
+
+
+def test_worker_stop_drains_consumer(worker_testable):
+    consumer = MagicMock()
+    worker_testable._consumer = consumer
+
+    worker_testable.stop()
+
+    assert worker_testable.draining
+    consumer.stop.assert_called_once()
+
+
+def test_worker_stop_inline_consumer(worker_testable):
+    worker_testable._consumer = object()
+    channel = MagicMock()
+
+    with pytest.raises(WorkerStopped):
+        worker_testable.stop()
+
+    # A message in flight when the worker was told to stop is acked before the consumer stops
+    with pytest.raises(WorkerStopped):
+        worker_testable.on_message_callback(channel, Basic.Deliver(delivery_tag=1), BasicProperties(), make_body())
+
+    channel.basic_ack.assert_called_once_with(delivery_tag=1)
+
+
+def test_worker_run_when_stopped(worker_testable):
+    consumer = MagicMock()
+    consumer.consume.side_effect = WorkerStopped()
+    worker_testable.make_consumer = MagicMock(return_value=consumer)
+
+    worker_testable.run(queue="queue")
+
+    consumer.consume.assert_called_once()
@@ -0,0 +1,123 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+from unittest.mock import Mock
+
+import boe.secrets
+from boe.secrets import (
+    MONGO_DB_CRED_SECRET,
+    RABBITMQ_CRED_SECRET,
+    CachedFileSecretProvider,
+    EnvSecretProvider,
+    FileSecretProvider,
+    SecretNotFound,
+    SecretProvider,
+    SecretProviderChain,
+    get_mongo_db_credentials,
+    get_rabbitmq_credentials,
+    get_secret,
+    make_secret_provider_chain,
+    set_secret_provider
+)
+from pytest import raises
+
+
+def _make_provider(secret=None):
+    provider = Mock(spec=SecretProvider)
+    provider.get_secret.return_value = secret
+    return provider
+
+
+def test_importing_modules_does_not_resolve_secrets():
+    script = (
+        "import sys, boe.secrets, boe.clients.client, boe.lib.mongo_client_registry, boe.lib.worker_runtime;"
+        "assert not boe.secrets._secrets;"
+        "assert 'boto3' not in sys.modules"
+    )
+
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_get_secret_when_called_twice(set_secrets):
+    assert get_secret(MONGO_DB_CRED_SECRET) is get_secret(MONGO_DB_CRED_SECRET)
+
+    set_secrets.get_secret.assert_called_once_with(MONGO_DB_CRED_SECRET)
+
+
+def test_get_secret_when_not_found():
+    set_secret_provider(_make_provider())
+
+    with raises(SecretNotFound):
+        get_secret(MONGO_DB_CRED_SECRET)
+
+
+def test_get_credentials():
+    set_secret_provider(_make_provider(secret={"username": "user", "password": "password"}))
+
+    assert get_mongo_db_credentials() == ("user", "password")
+    assert get_rabbitmq_credentials() == ("user", "password")
+    assert boe.secrets.RABBITMQ_PASSWORD == "password"
+
+
+def test_env_secret_provider(monkeypatch):
+    monkeypatch.setenv("RABBITMQ_USERNAME", "user")
+    monkeypatch.setenv("RABBITMQ_PASSWORD", "password")
+    monkeypatch.delenv("MONGO_DB_PASSWORD", raising=False)
+
+    provider = EnvSecretProvider()
+
+    assert provider.get_secret(RABBITMQ_CRED_SECRET) == {"username": "user", "password": "password"}
+    assert provider.get_secret(MONGO_DB_CRED_SECRET) is None
+    assert provider.get_secret("unknown") is None
+
+
+def test_file_secret_provider(tmp_path):
+    secrets_path = tmp_path / "secrets.json"
+    secrets_path.write_text(json.dumps({MONGO_DB_CRED_SECRET: {"username": "user", "password": "password"}}))
+
+    assert FileSecretProvider(path=str(secrets_path)).get_secret(MONGO_DB_CRED_SECRET)["username"] == "user"
+    assert FileSecretProvider(path=str(tmp_path / "missing.json")).get_secret(MONGO_DB_CRED_SECRET) is None
+
+
+def test_cached_file_secret_provider(tmp_path):
+    cache_path = tmp_path / "cache" / "secrets.json"
+    source = _make_provider(secret={"username": "user", "password": "password"})
+
+    assert CachedFileSecretProvider(provider=source, path=str(cache_path)).get_secret(MONGO_DB_CRED_SECRET)
+    assert CachedFileSecretProvider(provider=source, path=str(cache_path)).get_secret(MONGO_DB_CRED_SECRET)
+
+    source.get_secret.assert_called_once()
+    assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+
+def test_cached_file_secret_provider_when_expired(tmp_path):
+    source = _make_provider(secret={"username": "user", "password": "password"})
+    provider = CachedFileSecretProvider(provider=source, path=str(tmp_path / "secrets.json"), ttl=0)
+
+    provider.get_secret(MONGO_DB_CRED_SECRET)
+    provider.get_secret(MONGO_DB_CRED_SECRET)
+
+    assert source.get_secret.call_count == 2
+
+
+def test_secret_provider_chain():
+    chain = SecretProviderChain(providers=[
+        _make_provider(),
+        _make_provider(secret={"username": "first"}),
+        _make_provider(secret={"username": "second"})
+    ])
+
+    assert chain.get_secret(MONGO_DB_CRED_SECRET) == {"username": "first"}
+    chain.providers[2].get_secret.assert_not_called()
+
+
+def test_make_secret_provider_chain():
+    chain = make_secret_provider_chain("env, file")
+
+    # The file provider is skipped while SECRETS_FILE is not set
+    assert [type(provider) for provider in chain.providers] == [EnvSecretProvider]
+
+    with raises(ValueError):
+        make_secret_provider_chain("vault")
@@ -0,0 +1,125 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+import pytest
+from bson import BSON
+from bson.binary import Binary, UuidRepresentation
+
+from boe.utils.bson_utils import (
+    decode_bytes,
+    decode_datetime,
+    decode_document,
+    decode_uuid,
+    encode_value,
+    match_uuid
+)
+
+
+class ColorEnum(Enum):
+    red = 0
+    blue = 1
+
+
+@dataclass
+class PartModel:
+    id: UUID
+    name: str
+
+
+@dataclass
+class CarModel:
+    id: UUID
+    make: str
+    color: ColorEnum
+    built: datetime
+    parts: List[PartModel]
+    part_map: Dict[str, PartModel] = field(default_factory=dict)
+    owner_id: Optional[UUID] = None
+    photo: bytes = None
+
+
+@pytest.fixture
+def car_model():
+    part = PartModel(id=uuid4(), name='Wheel')
+
+    return CarModel(
+        id=uuid4(),
+        make='Bmw',
+        color=ColorEnum.blue,
+        built=datetime(2021, 3, 4, 5, 6, 7),
+        parts=[part],
+        part_map={str(part.id): part},
+        owner_id=uuid4(),
+        photo=b'\x89PNG'
+    )
+
+
+def test_encode_value(car_model):
+    document = encode_value(car_model)
+
+    assert isinstance(document['id'], Binary)
+    assert document['color'] == 1
+    assert document['built'] == car_model.built
+    assert document['parts'] == [{'id': encode_value(car_model.parts[0].id), 'name': 'Wheel'}]
+    assert document['photo'] == b'\x89PNG'
+
+    BSON.encode(document)
+
+
+def test_encode_value_with_uuid_dict_keys():
+    key = uuid4()
+
+    assert encode_value({key: 1}) == {str(key): 1}
+
+
+def test_decode_document_round_trip(car_model):
+    document = BSON.decode(BSON.encode(encode_value(car_model)))
+
+    assert decode_document(CarModel, document) == car_model
+
+
+def test_decode_document_with_optional_none(car_model):
+    car_model.owner_id = None
+    car_model.photo = None
+
+    assert decode_document(CarModel, encode_value(car_model)) == car_model
+
+
+def test_decode_document_with_legacy_strings(car_model):
+    document = {
+        'id': str(car_model.id),
+        'make': car_model.make,
+        'color': car_model.color.value,
+        'built': car_model.built.isoformat(),
+        'parts': [{'id': str(part.id), 'name': part.name} for part in car_model.parts],
+        'part_map': {key: {'id': str(part.id), 'name': part.name} for key, part in car_model.part_map.items()},
+        'owner_id': str(car_model.owner_id),
+        'photo': car_model.photo.decode('latin-1'),
+    }
+    car_model.photo = car_model.photo.decode('latin-1').encode()
+
+    assert decode_document(CarModel, document) == car_model
+
+
+def test_decode_helpers():
+    uuid = uuid4()
+    now = datetime.now()
+
+    assert decode_uuid(encode_value(uuid)) == uuid
+    assert decode_uuid(str(uuid)) == uuid
+    assert decode_uuid(uuid) == uuid
+    assert decode_datetime(now.isoformat()) == now
+    assert decode_datetime(now) == now
+    assert decode_bytes('data') == b'data'
+    assert decode_bytes(b'data') == b'data'
+
+
+def test_match_uuid():
+    value = uuid4()
+
+    assert match_uuid(value) == {
+        "$in": [Binary.from_uuid(value, uuid_representation=UuidRepresentation.STANDARD), str(value)]
+    }
@@ -0,0 +1,116 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List
+from uuid import uuid4
+
+import pytest
+from boe.applications.bank_domain_apps import BankDomainAppEventFactory
+from boe.applications.task_domain_apps import TaskManagerAppEventFactory
+from boe.lib.domains.bank_domain import BankTransactionMethodEnum
+from boe.utils.core_utils import extract_name_from_object
+from boe.utils.serialization_utils import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    deserialize_envelope,
+    encode_json_value,
+    encode_msgpack_value,
+    get_envelope_encoder,
+    serialize_envelope,
+    serialize_object
+)
+
+
+@dataclass(frozen=True)
+class WheelModel:
+    size: int
+
+
+@dataclass(frozen=True)
+class CarModel:
+    make: str
+    wheels: List[WheelModel]
+    built: datetime
+
+
+def legacy_envelope(event) -> str:
+    return json.dumps({extract_name_from_object(event): json.loads(serialize_object(event))})
+
+
+@pytest.fixture
+def car_model():
+    return CarModel(make='Bmw', wheels=[WheelModel(size=18)], built=datetime(2021, 3, 4))
+
+
+def test_encode_json_value(car_model):
+    assert encode_json_value(car_model) == {'make': 'Bmw', 'wheels': [{'size': 18}], 'built': '2021-03-04T00:00:00'}
+
+
+def test_get_envelope_encoder_is_cached():
+    assert get_envelope_encoder(CarModel) is get_envelope_encoder(CarModel)
+    assert get_envelope_encoder(CarModel)[0] == 'CarModel'
+
+
+@pytest.mark.parametrize("event", [
+    TaskManagerAppEventFactory.build_add_evidence_event(task_id=str(uuid4()), data=b'evidence'),
+    TaskManagerAppEventFactory.build_new_task_event(
+        name='Clean Room',
+        description='Clean the room',
+        due_date=datetime.now(),
+        owner_id=str(uuid4()),
+        task_id=str(uuid4()),
+        evidence_required=True,
+        value=10.0
+    ),
+    BankDomainAppEventFactory.build_new_transaction_batch_event(
+        account_id=str(uuid4()),
+        transactions=[
+            {"item_id": str(uuid4()), "value": 10.0, "transaction_method": BankTransactionMethodEnum.add.value},
+            {"item_id": str(uuid4()), "value": 5.0, "transaction_method": BankTransactionMethodEnum.subtract.value},
+        ]
+    ),
+])
+def test_serialize_envelope_is_wire_compatible(event):
+    assert serialize_envelope(event) == legacy_envelope(event)
+
+
+def test_encode_msgpack_value_keeps_bytes():
+    assert encode_msgpack_value({'data': b'\x89PNG'}) == {'data': b'\x89PNG'}
+
+
+def test_get_envelope_encoder_is_cached_per_content_type():
+    assert get_envelope_encoder(CarModel, MSGPACK_CONTENT_TYPE) is not get_envelope_encoder(CarModel)
+
+
+def test_serialize_envelope_msgpack_round_trip(car_model):
+    body = serialize_envelope(car_model, content_type=MSGPACK_CONTENT_TYPE)
+
+    assert deserialize_envelope(body, content_type=MSGPACK_CONTENT_TYPE) == json.loads(serialize_envelope(car_model))
+
+
+def test_serialize_envelope_msgpack_carries_native_bytes():
+    task_id = str(uuid4())
+    event = TaskManagerAppEventFactory.build_add_evidence_event(task_id=task_id, data=b'\x89PNG\r\n')
+
+    envelope = deserialize_envelope(
+        serialize_envelope(event, content_type=MSGPACK_CONTENT_TYPE),
+        content_type=MSGPACK_CONTENT_TYPE
+    )
+
+    assert envelope == {'AddEvidenceEvent': {'task_id': task_id, 'data': b'\x89PNG\r\n'}}
+    assert TaskManagerAppEventFactory.build_add_evidence_event(**envelope['AddEvidenceEvent']) == event
+
+
+@pytest.mark.parametrize("content_type", [None, JSON_CONTENT_TYPE])
+def test_deserialize_envelope_json(car_model, content_type):
+    body = serialize_envelope(car_model).encode()
+
+    assert deserialize_envelope(body, content_type=content_type) == json.loads(body)
+
+
+def test_unsupported_content_type(car_model):
+    with pytest.raises(ValueError):
+        serialize_envelope(car_model, content_type='text/plain')
+
+    with pytest.raises(ValueError):
+        deserialize_envelope(b'', content_type='text/plain')
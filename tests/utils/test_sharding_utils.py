@@ -0,0 +1,35 @@
+from collections import Counter
+from uuid import uuid4
+
+import pytest
+from boe.utils.sharding_utils import get_shard_for_aggregate_id, jump_consistent_hash
+
+
+@pytest.fixture
+def aggregate_ids():
+    return [uuid4() for _ in range(2000)]
+
+
+def test_get_shard_for_aggregate_id_is_stable(aggregate_ids):
+    for aggregate_id in aggregate_ids:
+        assert get_shard_for_aggregate_id(aggregate_id, 8) == get_shard_for_aggregate_id(str(aggregate_id), 8)
+
+
+def test_get_shard_for_aggregate_id_spreads_ids(aggregate_ids):
+    shard_counts = Counter(get_shard_for_aggregate_id(aggregate_id, 4) for aggregate_id in aggregate_ids)
+
+    assert set(shard_counts) == {0, 1, 2, 3}
+    assert min(shard_counts.values()) > 350
+
+
+def test_get_shard_for_aggregate_id_when_adding_shard(aggregate_ids):
+    for aggregate_id in aggregate_ids:
+        old_shard = get_shard_for_aggregate_id(aggregate_id, 4)
+        new_shard = get_shard_for_aggregate_id(aggregate_id, 5)
+
+        assert new_shard in (old_shard, 4)
+
+
+def test_jump_consistent_hash_fails_without_shards():
+    with pytest.raises(ValueError):
+        jump_consistent_hash(key=1, shard_count=0)
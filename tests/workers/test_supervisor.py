@@ -0,0 +1,161 @@
+import sys
+import time
+
+import pytest
+from boe.workers.supervisor import SINGLE_PROCESS_WORKERS, WorkerSupervisor, get_desired_process_count, main
+
+
+def crashing_worker(module_name):
+    sys.exit(1)
+
+
+def idle_worker(module_name):
+    time.sleep(30)
+
+
+def idle_shard_worker(module_name, shard):
+    time.sleep(30)
+
+
+def crashing_shard_worker(module_name, shard):
+    if shard == 1:
+        sys.exit(1)
+
+    time.sleep(30)
+
+
+def wait_for_exit(supervisor, timeout=5):
+    deadline = time.monotonic() + timeout
+    while any(process.is_alive() for process in supervisor.processes) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_supervisor():
+    supervisors = []
+
+    def make(**kwargs):
+        supervisor = WorkerSupervisor(module_name="test_worker", drain_timeout=5, **kwargs)
+        supervisors.append(supervisor)
+        return supervisor
+
+    yield make
+
+    for supervisor in supervisors:
+        supervisor.stop()
+
+
+@pytest.mark.parametrize("queue_depth, desired", [(0, 1), (499, 1), (501, 2), (1500, 3), (100000, 4)])
+def test_get_desired_process_count(queue_depth, desired):
+    assert get_desired_process_count(
+        queue_depth=queue_depth,
+        min_processes=1,
+        max_processes=4,
+        messages_per_process=500
+    ) == desired
+
+
+def test_supervisor_restarts_crashed_process(make_supervisor):
+    supervisor = make_supervisor(target=crashing_worker)
+    supervisor.start_process()
+    wait_for_exit(supervisor)
+
+    supervisor.reap()
+
+    assert supervisor.restarts == 1
+    assert supervisor.processes == []
+
+    supervisor._restart_at = [0]
+    supervisor.target = idle_worker
+    supervisor.reap()
+
+    assert len(supervisor.processes) == 1
+    assert supervisor.processes[0].is_alive()
+
+
+def test_supervisor_scales_on_queue_depth(make_supervisor):
+    queue_depths = [1200]
+    supervisor = make_supervisor(
+        target=idle_worker,
+        min_processes=1,
+        max_processes=4,
+        queue="queue",
+        messages_per_process=500,
+        get_queue_depth=lambda queue: queue_depths[0]
+    )
+    supervisor.start_process()
+
+    supervisor.scale()
+    assert len(supervisor.active_processes) == 3
+
+    queue_depths[0] = 0
+    supervisor.scale()
+    assert len(supervisor.active_processes) == 2
+
+    wait_for_exit_of = supervisor.processes[-1]
+    wait_for_exit_of.join(timeout=5)
+    supervisor.reap()
+
+    assert len(supervisor.processes) == 2
+    assert supervisor.restarts == 0
+
+
+def test_supervisor_stop_drains_processes(make_supervisor):
+    supervisor = make_supervisor(target=idle_worker, min_processes=2, max_processes=2)
+    for _ in range(2):
+        supervisor.start_process()
+
+    supervisor.stop()
+
+    assert supervisor.processes == []
+    assert supervisor.restarts == 0
+
+
+def test_supervisor_when_sharded(make_supervisor):
+    supervisor = make_supervisor(target=crashing_shard_worker, shard_count=3, min_processes=1, max_processes=8)
+    for _ in range(3):
+        supervisor.start_process()
+
+    assert not supervisor.autoscaling
+    assert sorted(supervisor.shards.values()) == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        supervisor.start_process()
+
+    crashed = next(process for process in supervisor.processes if supervisor.shards[process.pid] == 1)
+    crashed.join(timeout=5)
+    supervisor.reap()
+    assert sorted(supervisor.shards.values()) == [0, 2]
+
+    supervisor._restart_at = [0]
+    supervisor.target = idle_shard_worker
+    supervisor.reap()
+
+    assert sorted(supervisor.shards.values()) == [0, 1, 2]
+    assert supervisor.processes[-1].name == "test_worker-shard-1"
+    assert supervisor.processes[-1].is_alive()
+
+
+def test_supervisor_invalid_process_range():
+    with pytest.raises(ValueError):
+        WorkerSupervisor(module_name="test_worker", min_processes=3, max_processes=2)
+
+
+def test_supervisor_when_single_process(make_supervisor):
+    with pytest.raises(ValueError):
+        make_supervisor(target=idle_worker, min_processes=1, max_processes=4, queue="queue", single_process=True)
+
+    supervisor = make_supervisor(target=idle_worker, queue="queue", single_process=True)
+
+    assert supervisor.max_processes == 1
+    assert not supervisor.autoscaling
+
+
+@pytest.mark.parametrize("worker", sorted(SINGLE_PROCESS_WORKERS))
+@pytest.mark.parametrize("argv", [["--processes", "2"], ["--max-processes", "2"], ["--min-processes", "2"]])
+def test_supervisor_main_when_single_process_worker_scaled(monkeypatch, worker, argv):
+    monkeypatch.setattr(sys, "argv", ["supervisor", worker, *argv])
+
+    with pytest.raises(SystemExit) as err:
+        main()
+
+    assert err.value.code == 2
@@ -0,0 +1,16 @@
+import os
+
+import pytest
+from boe.env import APP_DB
+from boe.lib.domains.read_model_indexes import get_read_model_queries, set_up_read_model_indexes
+from boe.lib.mongo_client_registry import get_mongo_client
+from boe.lib.mongo_indexes import find_collection_scans
+from cbaxter1988_utils.pymongo_utils import get_database
+
+
+@pytest.mark.skipif(not os.getenv("MONGO_HOST"), reason="needs a MongoDB server, set MONGO_HOST")
+def test_read_model_queries_do_not_scan_collections():
+    set_up_read_model_indexes()
+    database = get_database(client=get_mongo_client(), db_name=APP_DB)
+
+    assert find_collection_scans(database=database, queries=get_read_model_queries()) == []